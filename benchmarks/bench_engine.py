@@ -0,0 +1,234 @@
+"""Measure the allocation engine, the totals and the paste parsing.
+
+Needs no display, only a QCoreApplication for the sheet model:
+
+    python benchmarks/bench_engine.py
+    python benchmarks/bench_engine.py --grids 10x8,1000x50 --json before.json
+    python benchmarks/bench_engine.py --compare before.json
+
+Grids are panels x sizes. Every case reports operations per second and
+the peak memory one operation allocates, traced in a separate run so the
+tracing does not slow the timed runs. The single cell edits also report
+the most array cells one edit touched (IncrementalAllocator.cells_touched),
+and the run exits with status 1 when that exceeds TOUCH_FACTOR times
+panels + sizes, i.e. when an edit stopped being incremental. --json writes
+the results with the current commit, --compare prints the speed ratio
+against such a file.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import numpy as np
+from PyQt6.QtCore import QCoreApplication
+
+from allocation_engine import IncrementalAllocator, compute_allocation
+from table_models import SewingAreaModel, parse_area, parse_quantity
+
+DEFAULT_GRIDS = "10x8,100x20,1000x50,5000x200"
+ECODOWN_WEIGHT = 1200.0
+GARMENT_WEIGHT = 450.0
+# Cells one single cell edit may touch, per panel plus size of the grid
+TOUCH_FACTOR = 3
+
+
+def make_sheet(n_panels, n_sizes, seed=0):
+    rng = np.random.default_rng(seed)
+    quantities = rng.integers(1, 10, n_panels)
+    areas = np.round(rng.random((n_sizes, n_panels)) * 100, 2)
+    return quantities, areas
+
+
+def clipboard_text(quantities, areas):
+    """The sheet as copied from a spreadsheet: name, quantity, one area per size"""
+    lines = []
+    for panel, quantity in enumerate(quantities.tolist()):
+        cells = [f"PANEL {panel}", str(quantity)]
+        cells.extend(f"{area:.2f}" for area in areas[:, panel].tolist())
+        lines.append("\t".join(cells))
+    return "\n".join(lines)
+
+
+def engine_cases(n_panels, n_sizes):
+    """(name, setup, operation, allocator) tuples.
+
+    setup runs untimed before each operation. allocator is the engine a
+    single cell edit goes through, None for the other cases.
+    """
+    quantities, areas = make_sheet(n_panels, n_sizes)
+    names = [f"PANEL {panel}" for panel in range(n_panels)]
+    allocator = IncrementalAllocator()
+    allocator.load(quantities.copy(), areas.copy(), 0)
+    rng = np.random.default_rng(1)
+    text = clipboard_text(quantities, areas)
+    model = SewingAreaModel(n_panels, n_sizes)
+
+    def full_allocation():
+        # What update_bottom_table derived before the engine was incremental
+        compute_allocation(names, quantities, areas, 0, ECODOWN_WEIGHT, GARMENT_WEIGHT)
+
+    def load():
+        # calculate_totals(): column totals of every size plus the base allocation
+        IncrementalAllocator().load(quantities, areas, 0)
+
+    def switch_base():
+        allocator._base_cache.clear()  # Measure the uncached switch
+        allocator.set_base_size((allocator.base_size + 1) % n_sizes)
+
+    def area_edit():
+        size, panel = int(rng.integers(n_sizes)), int(rng.integers(n_panels))
+        allocator.set_area(size, panel, float(rng.random() * 100))
+
+    def quantity_edit():
+        panel = int(rng.integers(n_panels))
+        allocator.set_quantity(panel, int(rng.integers(10)))  # 0 empties the cell
+
+    def weights():
+        allocator.weights(ECODOWN_WEIGHT)
+        allocator.weights(GARMENT_WEIGHT)
+
+    def bottom_totals():
+        allocator.totals(ECODOWN_WEIGHT).tolist()
+        allocator.totals(GARMENT_WEIGHT).tolist()
+
+    def parse_cells():
+        # The per-cell parsing typing goes through, over one full sheet
+        for quantity in quantities.tolist():
+            parse_quantity(str(quantity))
+        for area in areas.ravel().tolist():
+            parse_area(f"{area:.2f}")
+
+    def clear_model():
+        model.reset_shape(n_panels, n_sizes)
+
+    def paste():
+        # paste_to_selection(): split the clipboard text, validate and write it
+        grid = [row.split("\t") for row in text.split("\n") if row.strip()]
+        model.paste_block(2, 0, grid)
+
+    return [
+        ("compute_allocation", None, full_allocation, None),
+        ("load (column totals)", None, load, None),
+        ("switch base size", None, switch_base, None),
+        ("area edit", None, area_edit, allocator),
+        ("quantity edit", None, quantity_edit, allocator),
+        ("weights", None, weights, None),
+        ("bottom totals", None, bottom_totals, None),
+        ("parse cells", None, parse_cells, None),
+        ("paste parse+validate", clear_model, paste, None),
+    ]
+
+
+def measure(setup, operation, min_time, max_runs):
+    """Operations per second, timed over at least min_time seconds of runs"""
+    elapsed = 0.0
+    runs = 0
+    while runs < max_runs and (elapsed < min_time or runs == 0):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        operation()
+        elapsed += time.perf_counter() - start
+        runs += 1
+    return runs / elapsed, runs
+
+
+def peak_memory(setup, operation):
+    """Peak bytes allocated while one operation runs"""
+    if setup is not None:
+        setup()
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        operation()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def cells_touched(operation, allocator, runs=200):
+    """Most array cells one operation touched over runs operations"""
+    most = 0
+    for _ in range(runs):
+        before = allocator.cells_touched
+        operation()
+        most = max(most, allocator.cells_touched - before)
+    return most
+
+
+def current_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def parse_grids(text):
+    grids = []
+    for grid in text.split(","):
+        panels, sizes = grid.lower().split("x")
+        grids.append((int(panels), int(sizes)))
+    return grids
+
+
+def main_benchmark():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--grids", default=DEFAULT_GRIDS,
+                        help=f"comma separated PANELSxSIZES (default {DEFAULT_GRIDS})")
+    parser.add_argument("--min-time", type=float, default=0.2,
+                        help="seconds to keep repeating each case (default 0.2)")
+    parser.add_argument("--max-runs", type=int, default=10000)
+    parser.add_argument("--json", metavar="PATH", help="write the results to PATH")
+    parser.add_argument("--compare", metavar="PATH", help="compare with results from --json")
+    args = parser.parse_args()
+
+    # Only held so the application lives for the whole run
+    _app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+    baseline = {}
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = {(r["grid"], r["case"]): r for r in json.load(f)["results"]}
+
+    results = []
+    not_incremental = []
+    for n_panels, n_sizes in parse_grids(args.grids):
+        grid = f"{n_panels}x{n_sizes}"
+        print(f"{n_panels} panels x {n_sizes} sizes")
+        for name, setup, operation, allocator in engine_cases(n_panels, n_sizes):
+            ops, runs = measure(setup, operation, args.min_time, args.max_runs)
+            peak = peak_memory(setup, operation)
+            result = {"grid": grid, "case": name, "ops_per_sec": ops,
+                      "runs": runs, "peak_bytes": peak}
+            line = f"  {name:22} {ops:14.1f} ops/s {peak / 1024:12.1f} KiB peak"
+            if allocator is not None:
+                touched = cells_touched(operation, allocator)
+                limit = TOUCH_FACTOR * (n_panels + n_sizes)
+                result["cells_touched"] = touched
+                line += f" {touched:8d} cells (limit {limit})"
+                if touched > limit:
+                    not_incremental.append(f"{grid} {name}")
+                    line += "  NOT INCREMENTAL"
+            results.append(result)
+            earlier = baseline.get((grid, name))
+            if earlier:
+                line += f"   x{ops / earlier['ops_per_sec']:.2f} vs {args.compare}"
+            print(line)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"commit": current_commit(), "python": sys.version.split()[0],
+                       "numpy": np.__version__, "results": results}, f, indent=2)
+            f.write("\n")
+    sys.exit(1 if not_incremental else 0)
+
+
+if __name__ == "__main__":
+    main_benchmark()
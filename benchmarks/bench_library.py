@@ -0,0 +1,143 @@
+"""Time the style library lookups on a library of tens of thousands of styles.
+
+    python benchmarks/bench_library.py
+    python benchmarks/bench_library.py --styles 50000 --db /tmp/library.sqlite3
+
+Fills a fresh library (or reuses --db when it already holds enough
+styles) with random sheets of buyers, styles, seasons and stages, then
+times every lookup the "Open from Library" dialog makes: filtered first
+pages, a page deep into the results, the match count, fuzzy searches with
+typos, similar style suggestions and loading the chosen sheet. Exits with
+status 1 when a lookup takes longer than --budget-ms, a search longer
+than --search-budget-ms or a suggestion longer than --similar-budget-ms.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import numpy as np
+
+from bench_engine import make_sheet
+from similarity_index import FEATURE_PANELS, MIN_FEATURE_PANELS
+from style_library import StyleLibrary
+
+SEASONS = ["SS", "AW", "SP", "FW"]
+PANEL_PARTS = ["FRONT", "BACK", "SLEEVE", "HOOD", "COLLAR", "POCKET", "YOKE", "CUFF",
+               "PLACKET", "SIDE", "LINING", "BAFFLE", "CHIN GUARD", "STORM FLAP", "WAISTBAND"]
+STAGES = ["SIZE SET", "P TEST SAMPLE", "FIT SAMPLE", "PP SAMPLE", "DEVELOPMENT",
+          "PHOTO SAMPLE", "SHIPMENT SAMPLE", "BULK", "SMS SAMPLE"]
+
+
+def fill_library(library, first, n_styles, rng, n_buyers=200):
+    buyers = [f"BUYER {index:03d}" for index in range(n_buyers)]
+    for index in range(first, first + n_styles):
+        n_panels, n_sizes = int(rng.integers(10, 60)), int(rng.integers(4, 12))
+        quantities, areas = make_sheet(n_panels, n_sizes, seed=index)
+        library.save({
+            "form": {"buyer": buyers[index % n_buyers], "style": f"JK{index:06d}",
+                     "season": SEASONS[index % len(SEASONS)],
+                     "garments_stage": STAGES[index % len(STAGES)],
+                     "date": f"20{18 + index % 8}-{1 + index % 12:02d}-{1 + index % 28:02d}"},
+            "size_names": [f"S{size}" for size in range(n_sizes)],
+            "panel_names": [f"{PANEL_PARTS[int(part)]} {panel}"
+                            for panel, part in enumerate(rng.integers(0, len(PANEL_PARTS),
+                                                                      n_panels))],
+            "quantities": quantities,
+            "areas": areas,
+            "area_valid": np.ones(areas.shape, dtype=bool),
+        })
+
+
+def best_of(function, repeats=5):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        times.append((time.perf_counter() - start) * 1000)
+    return min(times)
+
+
+def deep_page(library, pages=50, **filters):
+    rows = library.list_styles(**filters)
+    for _ in range(pages):
+        rows = library.list_styles(after=rows[-1], **filters) or rows
+
+
+def main_benchmark():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--styles", type=int, default=20000)
+    parser.add_argument("--db", metavar="PATH", help="library to fill and reuse")
+    parser.add_argument("--budget-ms", type=float, default=100)
+    parser.add_argument("--search-budget-ms", type=float, default=50)
+    parser.add_argument("--similar-budget-ms", type=float, default=20)
+    args = parser.parse_args()
+
+    path = args.db or os.path.join(tempfile.mkdtemp(), "library.sqlite3")
+    library = StyleLibrary(path)
+    existing = library.count_styles()
+    missing = args.styles - existing
+    if missing > 0:
+        start = time.perf_counter()
+        fill_library(library, existing, missing, np.random.default_rng(existing))
+        print(f"Filled {missing} styles in {time.perf_counter() - start:.1f} s")
+    print(f"{library.count_styles()} styles in {path}")
+
+    some_id = library.list_styles(buyer="BUYER 121", season="AW")[0][0]
+    lookups = [
+        ("first page", lambda: library.list_styles()),
+        ("buyer prefix", lambda: library.list_styles(buyer="BUYER 12")),
+        ("style prefix", lambda: library.list_styles(style="JK0123")),
+        ("season + stage", lambda: library.list_styles(season="AW", garments_stage="BULK")),
+        ("buyer + season", lambda: library.list_styles(buyer="BUYER 121", season="AW")),
+        ("count, season", lambda: library.count_styles(season="SS")),
+        ("page 50, season", lambda: deep_page(library, season="FW")),
+        ("load sheet", lambda: library.load(some_id)),
+    ]
+    start = time.perf_counter()
+    library.search_index()
+    print(f"  {'build search index':18} {(time.perf_counter() - start) * 1000:8.2f} ms")
+    searches = [
+        ("search buyer typo", lambda: library.search("BYUER 121")),
+        ("search style typo", lambda: library.search("JK01234")),
+        ("search partial", lambda: library.search("JK0")),
+        ("search panel typo", lambda: library.search("SLEVE")),
+        ("search mixed", lambda: library.search("BUYER 121 CHIN GARD", season="AW")),
+    ]
+    start = time.perf_counter()
+    for n_areas in range(MIN_FEATURE_PANELS, FEATURE_PANELS + 1):
+        library.similarity_index().nearest(np.zeros(n_areas))
+    print(f"  {'build kd-trees':18} {(time.perf_counter() - start) * 1000:8.2f} ms")
+    # A stored style typed into its third size column, graded 10% larger
+    # and a little differently
+    stored = library.load(some_id)["areas"][0]
+    areas = np.zeros((3, len(stored)))
+    areas[2] = stored * 1.1 * np.random.default_rng(1).uniform(0.97, 1.03, len(stored))
+    similar = []
+    for n_areas in (3, 5, FEATURE_PANELS):
+        valid = np.zeros(areas.shape, dtype=bool)
+        valid[2, :n_areas] = True
+        similar.append((f"similar, {n_areas} areas",
+                        lambda valid=valid: library.similar_styles(areas, valid)))
+    found = [style_id for (style_id, *_), distance in similar[-1][1]()]
+    print(f"  typed style found at rank {found.index(some_id) + 1 if some_id in found else '-'}")
+
+    budgets = {"search": args.search_budget_ms, "similar": args.similar_budget_ms}
+    over_budget = []
+    for name, lookup in lookups + searches + similar:
+        elapsed = best_of(lookup)
+        flag = ""
+        budget = budgets.get(name.split()[0].rstrip(","), args.budget_ms)
+        if elapsed > budget:
+            over_budget.append(name)
+            flag = "  over budget"
+        print(f"  {name:18} {elapsed:8.2f} ms{flag}")
+    library.close()
+    sys.exit(1 if over_budget else 0)
+
+
+if __name__ == "__main__":
+    main_benchmark()
@@ -0,0 +1,216 @@
+"""Replay user scenarios on the whole window and time every action.
+
+Runs offscreen, so it needs no display:
+
+    python benchmarks/bench_scenarios.py
+    python benchmarks/bench_scenarios.py --panels 2000 --sizes 40 --json after.json
+
+Each scenario gets a fresh DownAllocationApp holding a random sheet of
+--panels x --sizes (the paste scenario starts from the default sheet and
+lets the paste grow it). An action is timed until every recompute it
+queued has run, including one on the worker thread. Besides latency
+percentiles, every scenario reports how often update_bottom_table and
+calculate_totals ran, the two ends of the signal cascades.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import numpy as np
+from PyQt6.QtCore import Qt
+from PyQt6.QtWidgets import QApplication, QDialog
+
+import main
+from bench_engine import clipboard_text, current_commit, make_sheet
+
+COUNTED = ("update_bottom_table", "calculate_totals")
+
+
+class CallCounter:
+    """Counts calls of DownAllocationApp methods, on every window"""
+
+    def __init__(self, names):
+        self.counts = dict.fromkeys(names, 0)
+        for name in names:
+            self._wrap(name)
+
+    def _wrap(self, name):
+        method = getattr(main.DownAllocationApp, name)
+
+        def counted(window, *args, **kwargs):
+            self.counts[name] += 1
+            return method(window, *args, **kwargs)
+
+        setattr(main.DownAllocationApp, name, counted)
+
+    def reset(self):
+        for name in self.counts:
+            self.counts[name] = 0
+
+
+def quiet_dialogs():
+    # Modal dialogs would wait for a user that a benchmark does not have
+    main.DownAllocationApp.show_factory_edit = lambda self: None
+    main.QMessageBox.warning = staticmethod(lambda *args: None)
+    main.ConfirmationDialog.exec = lambda self: QDialog.DialogCode.Accepted
+
+
+def settle(window):
+    """Run everything the last action queued, the worker thread included"""
+    QApplication.processEvents()
+    while window.recalc_worker.is_busy() or window.recalc_scheduler.is_pending():
+        window.recalc_worker.wait()
+        QApplication.processEvents()
+        window.recalc_scheduler.flush()
+
+
+def build_window(n_panels, n_sizes):
+    window = main.DownAllocationApp()
+    if n_panels and n_sizes:
+        quantities, areas = make_sheet(n_panels, n_sizes)
+        window.resize_sheet(n_panels, n_sizes)
+        window.top_model.load_sheet([f"S{size}" for size in range(n_sizes)],
+                                    [f"PANEL {panel}" for panel in range(n_panels)],
+                                    quantities, areas)
+        window.update_base_size_dropdown()
+        window.base_size_combo.setCurrentText("S0")
+    window.ecodown_input.setText("1200")
+    window.garment_weight_input.setText("450")
+    window.show()
+    settle(window)
+    return window
+
+
+def type_areas(window, rng, count=500):
+    model = window.top_model
+    for _ in range(count):
+        index = model.index(int(rng.integers(2, model.n_panels + 2)),
+                            int(rng.integers(2, model.n_sizes + 2)))
+        yield lambda index=index, value=f"{rng.random() * 100:.2f}": model.setData(
+            index, value, Qt.ItemDataRole.EditRole)
+
+
+def paste_block(window, rng, rows=1000, cols=30):
+    quantities, areas = make_sheet(rows, cols - 2)
+    table = window.top_table
+    QApplication.clipboard().setText(clipboard_text(quantities, areas))
+    table.setCurrentIndex(window.top_model.index(2, 0))
+    yield table.paste_to_selection
+
+
+def resize(window, rng):
+    model = window.top_model
+    for panels, sizes in ((model.n_panels * 2, model.n_sizes + 10),
+                          (model.n_panels, model.n_sizes),
+                          (max(model.n_panels // 2, 1), max(model.n_sizes // 2, 1))):
+        def set_dimensions(panels=panels, sizes=sizes):
+            window.row_input.setText(str(panels))
+            window.col_input.setText(str(sizes))
+            window.set_table_dimensions()
+        yield set_dimensions
+
+
+def flip_base_size(window, rng, count=50):
+    bases = [window.base_size_combo.itemText(1), window.base_size_combo.itemText(2)]
+    for flip in range(count):
+        yield lambda base=bases[flip % 2]: window.base_size_combo.setCurrentText(base)
+
+
+def undo_redo(window, rng, count=100):
+    # Something to undo first, untimed
+    for action in type_areas(window, rng, count // 2):
+        action()
+    settle(window)
+    table = window.top_table
+    for step in range(count):
+        yield table.undo if step < count // 2 else table.redo
+
+
+def reset(window, rng):
+    yield window.reset_table
+
+
+def save_open_project(window, rng, count=5):
+    path = os.path.join(tempfile.mkdtemp(), "bench" + main.FILE_EXTENSION)
+    for _ in range(count):
+        yield lambda: window.write_project(path)
+        yield lambda: window.read_project(path)
+
+
+SCENARIOS = [
+    ("type 500 areas", type_areas, True),
+    ("paste 1000x30", paste_block, False),
+    ("resize", resize, True),
+    ("flip base size x50", flip_base_size, True),
+    ("undo/redo x100", undo_redo, True),
+    ("reset", reset, True),
+    ("save/open x5", save_open_project, True),
+]
+
+
+def percentile(latencies, q):
+    return float(np.percentile(latencies, q)) if latencies else 0.0
+
+
+def run_scenario(make_actions, window, counter, rng):
+    latencies = []
+    actions = make_actions(window, rng)
+    counter.reset()
+    while True:
+        # Setting up the next action is not part of its latency
+        try:
+            action = next(actions)
+        except StopIteration:
+            break
+        start = time.perf_counter()
+        action()
+        settle(window)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies, dict(counter.counts)
+
+
+def main_benchmark():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--panels", type=int, default=1000)
+    parser.add_argument("--sizes", type=int, default=30)
+    parser.add_argument("--json", metavar="PATH", help="write the results to PATH")
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    quiet_dialogs()
+    counter = CallCounter(COUNTED)
+
+    print(f"{args.panels} panels x {args.sizes} sizes")
+    print(f"  {'scenario':20} {'actions':>7} {'p50':>9} {'p90':>9} {'p99':>9} {'max':>9} "
+          f"{'total':>10}   update_bottom_table calculate_totals")
+    results = []
+    for name, make_actions, preload in SCENARIOS:
+        window = build_window(args.panels if preload else 0, args.sizes if preload else 0)
+        latencies, counts = run_scenario(make_actions, window, counter, np.random.default_rng(0))
+        result = {"scenario": name, "actions": len(latencies),
+                  "p50_ms": percentile(latencies, 50), "p90_ms": percentile(latencies, 90),
+                  "p99_ms": percentile(latencies, 99), "max_ms": max(latencies, default=0.0),
+                  "total_ms": sum(latencies), "calls": counts}
+        results.append(result)
+        print(f"  {name:20} {result['actions']:7d} {result['p50_ms']:9.2f} {result['p90_ms']:9.2f} "
+              f"{result['p99_ms']:9.2f} {result['max_ms']:9.2f} {result['total_ms']:10.1f}   "
+              f"{counts['update_bottom_table']:19d} {counts['calculate_totals']:16d}")
+        window.close()
+        window.deleteLater()
+        app.processEvents()
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"commit": current_commit(), "panels": args.panels, "sizes": args.sizes,
+                       "results": results}, f, indent=2)
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main_benchmark()
@@ -0,0 +1,96 @@
+"""Time how long the two tables take to paint a large sheet.
+
+Runs offscreen, so it needs no display:
+
+    python benchmarks/bench_table_paint.py --panels 1000 --sizes 50
+
+Every frame paints the whole viewport of both tables into a pixmap, so
+the offscreen screen size does not clip what is drawn. The base size switch
+flips between two base sizes and repaints the bottom table each time.
+"""
+import argparse
+import os
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import numpy as np
+from PyQt6.QtGui import QPixmap
+from PyQt6.QtWidgets import QApplication
+
+import main
+
+
+def build_window(n_panels, n_sizes, width=2560, height=1600):
+    # The factory dialog is modal, a benchmark has nobody to fill it in
+    main.DownAllocationApp.show_factory_edit = lambda self: None
+    window = main.DownAllocationApp()
+    window.resize_sheet(n_panels, n_sizes)
+
+    rng = np.random.default_rng(0)
+    model = window.top_model
+    size_names = [f"S{size}" for size in range(n_sizes)]
+    panel_names = [f"PANEL {panel}" for panel in range(n_panels)]
+    quantities = rng.integers(1, 10, n_panels)
+    areas = np.round(rng.random((n_sizes, n_panels)) * 100, 2)
+    model.load_sheet(size_names, panel_names, quantities, areas)
+    window.update_base_size_dropdown()
+    window.ecodown_input.setText("1200")
+    window.garment_weight_input.setText("450")
+    window.base_size_combo.setCurrentText(size_names[0])
+    window.recalc_scheduler.flush()
+
+    # Give both tables a large viewport, the window layout keeps them small
+    for table in (window.top_table, window.bottom_table):
+        table.setFixedSize(width, height // 2)
+    window.show()
+    QApplication.processEvents()
+    return window
+
+
+def time_frames(frames, paint):
+    paint()  # Warm up caches and layouts
+    start = time.perf_counter()
+    for _ in range(frames):
+        paint()
+    return (time.perf_counter() - start) / frames * 1000
+
+
+def main_benchmark():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--panels", type=int, default=1000)
+    parser.add_argument("--sizes", type=int, default=50)
+    parser.add_argument("--frames", type=int, default=50)
+    parser.add_argument("--width", type=int, default=2560)
+    parser.add_argument("--height", type=int, default=1600)
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    window = build_window(args.panels, args.sizes, args.width, args.height)
+    top, bottom = window.top_table.viewport(), window.bottom_table.viewport()
+    canvas = QPixmap(top.size())
+
+    def repaint_both():
+        top.render(canvas)
+        bottom.render(canvas)
+
+    bases = [window.base_size_combo.itemText(1), window.base_size_combo.itemText(2)]
+    switches = iter(range(10 ** 9))
+
+    def switch_base():
+        window.base_size_combo.setCurrentText(bases[next(switches) % 2])
+        window.recalc_scheduler.flush()
+        bottom.render(canvas)
+
+    print(f"{args.panels} panels x {args.sizes} sizes, {args.frames} frames, "
+          f"viewports {top.width()}x{top.height()} and {bottom.width()}x{bottom.height()}")
+    print(f"  repaint both tables   {time_frames(args.frames, repaint_both):8.2f} ms/frame")
+    print(f"  switch base size      {time_frames(args.frames, switch_base):8.2f} ms/switch")
+    window.close()
+    app.processEvents()
+
+
+if __name__ == "__main__":
+    main_benchmark()
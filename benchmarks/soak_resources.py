@@ -0,0 +1,131 @@
+"""Check that a long session of resizes and pastes does not leak.
+
+Runs offscreen, so it needs no display:
+
+    python benchmarks/soak_resources.py
+    python benchmarks/soak_resources.py --cycles 500 --log soak.jsonl
+
+Each cycle grows the sheet, pastes a block into it, undoes every other
+paste and shrinks the sheet back. After a warm-up, the signal receiver
+counts and the QObjects under the window must not change at all. The undo
+journal runs with a small --journal-budget-mb, so it fills up early in the
+run and then has to stop growing. RSS and the Python object count may only
+grow within a small allowance. Exits with status 1 and names every number
+that grew.
+"""
+import argparse
+import gc
+import os
+import sys
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from PyQt6.QtWidgets import QApplication
+
+from bench_engine import clipboard_text, make_sheet
+from bench_scenarios import build_window, quiet_dialogs, settle
+from resource_telemetry import ResourceTelemetry
+
+
+def run_cycle(window, cycle, paste_text):
+    table = window.top_table
+    base_panels, base_sizes = 50, 12
+    window.resize_sheet(base_panels + 20 + cycle % 7, base_sizes + 4)
+    settle(window)
+    table.setCurrentIndex(window.top_model.index(2 + cycle % 10, 0))
+    QApplication.clipboard().setText(paste_text)
+    table.paste_to_selection()
+    settle(window)
+    if cycle % 2:
+        table.undo()
+        settle(window)
+    window.resize_sheet(base_panels, base_sizes)
+    settle(window)
+
+
+def check_growth(first, last, max_rss_growth, max_object_growth):
+    failures = []
+    for name, count in last["receivers"].items():
+        if count != first["receivers"][name]:
+            failures.append(f"{name} receivers {first['receivers'][name]} -> {count}")
+    if last["qobjects"] != first["qobjects"]:
+        failures.append(f"QObjects under the window {first['qobjects']} -> {last['qobjects']}")
+    if first["rss_bytes"] is not None:
+        growth = last["rss_bytes"] - first["rss_bytes"]
+        if growth > max_rss_growth:
+            failures.append(f"RSS grew by {growth / 2 ** 20:.1f} MiB")
+    if last["python_objects"] > first["python_objects"] * (1 + max_object_growth):
+        failures.append(f"Python objects {first['python_objects']} -> {last['python_objects']}")
+    return failures
+
+
+def check_journal_levels_off(samples, cycles, budget):
+    """The undo journal filled its budget, dropping old steps, and stopped growing"""
+    failures = []
+    journal_bytes = [sample["journal_bytes"] for sample in samples]
+    if max(journal_bytes) > budget:
+        failures.append(f"undo journal {max(journal_bytes)} bytes over its {budget} byte budget")
+    if samples[-1]["undo_steps"] >= cycles // 2:
+        failures.append("undo journal never reached its budget, lower --journal-budget-mb")
+    half = len(journal_bytes) // 2
+    if max(journal_bytes[half:]) > max(journal_bytes[:half]):
+        failures.append(f"undo journal kept growing, {max(journal_bytes[:half])} -> "
+                        f"{max(journal_bytes[half:])} bytes in the second half of the run")
+    return failures
+
+
+def main_benchmark():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cycles", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--max-rss-growth-mb", type=float, default=16)
+    parser.add_argument("--journal-budget-mb", type=float, default=2,
+                        help="undo journal memory budget for the run (default 2)")
+    parser.add_argument("--max-object-growth", type=float, default=0.05,
+                        help="allowed growth of the Python object count (default 0.05)")
+    parser.add_argument("--log", metavar="PATH", help="append every sample as a JSON line")
+    args = parser.parse_args()
+
+    # Only held so the application lives for the whole run
+    _app = QApplication.instance() or QApplication(sys.argv)
+    quiet_dialogs()
+    window = build_window(50, 12)
+    journal = window.top_table.journal
+    journal.memory_budget = int(args.journal_budget_mb * 2 ** 20)
+    telemetry = ResourceTelemetry(window, args.log)
+    quantities, areas = make_sheet(30, 14, seed=2)
+    paste_text = clipboard_text(quantities, areas)
+
+    for cycle in range(args.warmup):
+        run_cycle(window, cycle, paste_text)
+    # Count only what survives a collection, not garbage waiting for one
+    gc.collect()
+    first = telemetry.sample()
+    samples = [first]
+    for cycle in range(args.cycles):
+        run_cycle(window, cycle, paste_text)
+        if (cycle + 1) % 20 == 0:
+            gc.collect()
+            samples.append(telemetry.sample())
+            telemetry.log_sample()
+    last = samples[-1]
+
+    failures = check_growth(first, last, args.max_rss_growth_mb * 2 ** 20, args.max_object_growth)
+    failures += check_journal_levels_off(samples, args.cycles, journal.memory_budget)
+
+    print(f"{args.cycles} resize/paste cycles after {args.warmup} warm-up cycles")
+    for sample in samples:
+        rss = sample["rss_bytes"] / 2 ** 20 if sample["rss_bytes"] is not None else float("nan")
+        print(f"  {sample['elapsed_s']:8.1f} s  RSS {rss:7.1f} MiB  journal "
+              f"{sample['journal_bytes'] / 1024:8.1f} KiB ({sample['undo_steps']} steps)  "
+              f"QObjects {sample['qobjects']}  Python objects {sample['python_objects']}  "
+              f"receivers {sum(sample['receivers'].values())}")
+    for failure in failures:
+        print(f"LEAK: {failure}", file=sys.stderr)
+    window.close()
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main_benchmark()
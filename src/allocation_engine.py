@@ -0,0 +1,339 @@
+import numpy as np
+
+
+class AllocationResult:
+    """Down and garment weight distribution for one style.
+
+    down and garment are sizes x panels matrices holding the weight of a
+    single panel piece. The totals are per size and already multiplied by
+    the panel quantity.
+    """
+
+    def __init__(self, panel_names, quantities, down, garment,
+                 total_base_area, down_totals, garment_totals):
+        self.panel_names = panel_names
+        self.quantities = quantities
+        self.down = down
+        self.garment = garment
+        self.total_base_area = total_base_area
+        self.down_totals = down_totals
+        self.garment_totals = garment_totals
+
+    @property
+    def valid_panels(self):
+        return self.quantities > 0
+
+
+def compute_allocation(panel_names, quantities, areas, base_size,
+                       ecodown_weight, garment_weight):
+    """Distribute the ecodown and garment weights over every panel and size.
+
+    quantities holds one panel quantity per panel (0 for an empty or invalid
+    cell), areas is a sizes x panels matrix of sewing areas and base_size is
+    the row index of the base size in areas, or None when none is selected.
+    """
+    quantities = np.asarray(quantities, dtype=np.int64)
+    areas = np.asarray(areas, dtype=np.float64)
+    n_sizes = areas.shape[0]
+
+    down = np.zeros_like(areas)
+    garment = np.zeros_like(areas)
+    total_base_area = 0.0
+
+    if base_size is not None and 0 <= base_size < n_sizes:
+        base_areas = areas[base_size]
+        # Panels without a quantity still count once towards the base area
+        weights = np.where(quantities > 0, quantities, 1)
+        total_base_area = float(base_areas @ weights)
+
+        if total_base_area > 0:
+            active = (quantities > 0) & (base_areas > 0)
+            share = np.where(active, 1.0 / total_base_area, 0.0)
+            np.multiply(areas, share, out=down)
+            np.multiply(down, garment_weight, out=garment)
+            down *= ecodown_weight
+
+    down_totals = down @ quantities
+    garment_totals = garment @ quantities
+
+    return AllocationResult(list(panel_names), quantities, down, garment,
+                            total_base_area, down_totals, garment_totals)
+
+
+# Cells summed between two cancelled() checks of a background allocation
+ALLOCATION_CHUNK_CELLS = 1 << 18
+
+
+def base_allocation(quantities, areas, base_size, cancelled=None):
+    """Allocated quantity of every panel and the allocated area of every size.
+
+    Only panels with a quantity and an area in the base size are allocated.
+    Reads every cell once, so callers may run it off the GUI thread. The
+    sizes are summed a chunk of rows at a time and None is returned as
+    soon as cancelled() is true between two chunks.
+    """
+    if base_size is None:
+        alloc_weights = np.zeros_like(quantities)
+    else:
+        active = (quantities > 0) & (areas[base_size] > 0)
+        alloc_weights = np.where(active, quantities, 0)
+    if cancelled is None:
+        return alloc_weights, areas @ alloc_weights
+
+    alloc_sums = np.empty(areas.shape[0])
+    chunk_rows = max(1, ALLOCATION_CHUNK_CELLS // max(1, areas.shape[1]))
+    for start in range(0, areas.shape[0], chunk_rows):
+        if cancelled():
+            return None
+        alloc_sums[start:start + chunk_rows] = areas[start:start + chunk_rows] @ alloc_weights
+    return alloc_weights, alloc_sums
+
+
+def load_allocator(quantities, areas, base_size, cancelled=None):
+    """Build an allocator for a whole sheet, or None once cancelled() is true.
+
+    Meant for a worker thread: nothing outside the new allocator is written.
+    cancelled() is checked after the column totals and while allocating.
+    """
+    allocator = IncrementalAllocator()
+    allocator.load(quantities, areas, None)
+    if cancelled is not None and cancelled():
+        return None
+    if base_size is not None and not 0 <= base_size < allocator.n_sizes:
+        base_size = None
+    allocation = base_allocation(allocator.quantities, allocator.areas, base_size, cancelled)
+    if allocation is None:
+        return None
+    allocator.set_base_size(base_size, allocation)
+    return allocator
+
+
+class IncrementalAllocator:
+    """Keeps the allocation of one sheet current, one edit at a time.
+
+    The sheet is held as a sizes x panels area matrix plus panel quantities.
+    Column totals and the allocated sums per size are maintained so that a
+    single cell edit costs O(panels + sizes). cells_touched counts the array
+    elements read or written, which makes that cost observable.
+
+    column_totals holds the total area of every size, i.e. total_base_area
+    for every candidate base size at once. The allocation of a base size
+    the user switched away from is cached, so flipping between base sizes
+    only re-sums the sizes edited since, instead of the whole grid.
+
+    load() keeps references to the arrays it is given instead of copying
+    them. A caller that owns those arrays writes a value in place and then
+    calls area_changed() or quantity_changed(); set_area() and
+    set_quantity() do both steps for callers that do not.
+    """
+
+    def __init__(self, n_panels=0, n_sizes=0):
+        self.cells_touched = 0
+        self.resize(n_panels, n_sizes)
+
+    def resize(self, n_panels, n_sizes):
+        self.load(np.zeros(n_panels, dtype=np.int64),
+                  np.zeros((n_sizes, n_panels), dtype=np.float64), None)
+
+    def load(self, quantities, areas, base_size):
+        """Replace the whole sheet and recompute everything once"""
+        self.quantities = np.asarray(quantities)
+        if self.quantities.dtype.kind not in "iu":
+            self.quantities = self.quantities.astype(np.int64)
+        self.areas = np.asarray(areas, dtype=np.float64)
+        # Panels without a quantity still count once towards the totals
+        self._weights = np.where(self.quantities > 0, self.quantities, 1)
+        self.column_totals = self.areas @ self._weights
+        self.cells_touched += self.areas.size
+        self.base_size = None
+        self._base_cache = {}
+        self.set_base_size(base_size)
+
+    @property
+    def n_panels(self):
+        return self.areas.shape[1]
+
+    @property
+    def n_sizes(self):
+        return self.areas.shape[0]
+
+    @property
+    def total_base_area(self):
+        if self.base_size is None:
+            return 0.0
+        return float(self.column_totals[self.base_size])
+
+    def set_base_size(self, base_size, allocation=None):
+        """Allocate from another base size.
+
+        allocation may hold the result of base_allocation() for it, computed
+        elsewhere from the same arrays.
+        """
+        if base_size is not None and not 0 <= base_size < self.n_sizes:
+            base_size = None
+        if self.base_size is not None:
+            # Keep the allocation being left, with no size edited since
+            self._base_cache[self.base_size] = (self._alloc_weights, self._alloc_sums, set())
+        self.base_size = base_size
+
+        cached = self._base_cache.pop(base_size, None) if base_size is not None else None
+        if cached is not None:
+            self._alloc_weights, self._alloc_sums, stale_sizes = cached
+            for size in stale_sizes:
+                self._alloc_sums[size] = self.areas[size] @ self._alloc_weights
+                self.cells_touched += self.n_panels
+            return
+
+        if allocation is None:
+            allocation = base_allocation(self.quantities, self.areas, base_size)
+        self._alloc_weights, self._alloc_sums = allocation
+        self.cells_touched += self.areas.size
+
+    def is_cached(self, base_size):
+        """Whether switching to base_size needs no full pass over the grid"""
+        return base_size is None or base_size == self.base_size or base_size in self._base_cache
+
+    def set_area(self, size, panel, value):
+        """Set one sewing area.
+
+        Returns the set of size indices whose allocation changed, or None
+        when total_base_area changed and every size has to be rescaled.
+        """
+        if self.areas[size, panel] == value:
+            return set()
+        self.areas[size, panel] = value
+        return self.area_changed(size, panel)
+
+    def area_changed(self, size, panel):
+        """Update the derived sums after areas[size, panel] was written"""
+        self.column_totals[size] = self.areas[size] @ self._weights
+        self.cells_touched += self.n_panels
+
+        if size == self.base_size:
+            self._update_panel(panel)
+        self._alloc_sums[size] = self.areas[size] @ self._alloc_weights
+        # A cached base size column decides its own weights, drop it. The
+        # others only have to re-sum this size when they are switched to.
+        self._base_cache.pop(size, None)
+        for _, _, stale_sizes in self._base_cache.values():
+            stale_sizes.add(size)
+        self.cells_touched += self.n_panels
+        return None if size == self.base_size else {size}
+
+    def set_quantity(self, panel, quantity):
+        """Set one panel quantity (0 for empty). Always rescales every size."""
+        old_quantity = int(self.quantities[panel])
+        if old_quantity == quantity:
+            return set()
+        self.quantities[panel] = quantity
+        return self.quantity_changed(panel)
+
+    def quantity_changed(self, panel):
+        """Update the derived sums after quantities[panel] was written"""
+        quantity = int(self.quantities[panel])
+        old_weight = int(self._weights[panel])
+        new_weight = quantity if quantity > 0 else 1
+        self._weights[panel] = new_weight
+        if new_weight != old_weight:
+            self.column_totals += self.areas[:, panel] * (new_weight - old_weight)
+            self.cells_touched += self.n_sizes
+            if self.base_size is not None:
+                # Re-derive total_base_area exactly so rounding never drifts
+                self.column_totals[self.base_size] = self.areas[self.base_size] @ self._weights
+                self.cells_touched += self.n_panels
+        self._update_panel(panel)
+        self._base_cache.clear()  # Every cached allocation weighs this panel
+        return None
+
+    def attach(self, quantities, areas):
+        """Point at the caller's arrays again after it reallocated them.
+
+        The arrays must hold the same values the derived sums were kept
+        for, i.e. after insert_*() or remove_*() was called for the change.
+        """
+        self.quantities = quantities
+        self.areas = areas
+
+    def insert_panels(self, position, count):
+        """Make room for empty panels, they add nothing to any total"""
+        self._base_cache.clear()
+        self._weights = np.insert(self._weights, position, np.ones(count, dtype=self._weights.dtype))
+        self._alloc_weights = np.insert(self._alloc_weights, position,
+                                        np.zeros(count, dtype=self._alloc_weights.dtype))
+        self.cells_touched += count
+
+    def remove_panels(self, position, count):
+        """Drop panels from the totals. Call this while areas still holds them."""
+        self._base_cache.clear()
+        removed = slice(position, position + count)
+        self.column_totals -= self.areas[:, removed] @ self._weights[removed]
+        self._alloc_sums -= self.areas[:, removed] @ self._alloc_weights[removed]
+        self.cells_touched += count * self.n_sizes
+        self._weights = np.delete(self._weights, removed)
+        self._alloc_weights = np.delete(self._alloc_weights, removed)
+        if self.base_size is not None:
+            # Re-derive total_base_area exactly so rounding never drifts
+            kept = np.delete(self.areas[self.base_size], removed)
+            self.column_totals[self.base_size] = kept @ self._weights
+            self.cells_touched += len(kept)
+
+    def insert_sizes(self, position, count):
+        """Make room for empty sizes"""
+        self._base_cache.clear()
+        self.column_totals = np.insert(self.column_totals, position, np.zeros(count))
+        self._alloc_sums = np.insert(self._alloc_sums, position, np.zeros(count))
+        if self.base_size is not None and self.base_size >= position:
+            self.base_size += count
+        self.cells_touched += count
+
+    def remove_sizes(self, position, count):
+        """Drop sizes. Removing the base size leaves nothing allocated."""
+        self._base_cache.clear()
+        removed = slice(position, position + count)
+        self.column_totals = np.delete(self.column_totals, removed)
+        self._alloc_sums = np.delete(self._alloc_sums, removed)
+        if self.base_size is not None:
+            if self.base_size >= position + count:
+                self.base_size -= count
+            elif self.base_size >= position:
+                self.base_size = None
+                self._alloc_weights[:] = 0
+                self._alloc_sums[:] = 0.0
+        self.cells_touched += count
+
+    def _update_panel(self, panel):
+        old_weight = int(self._alloc_weights[panel])
+        new_weight = 0
+        if (self.base_size is not None and self.quantities[panel] > 0
+                and self.areas[self.base_size, panel] > 0):
+            new_weight = int(self.quantities[panel])
+        if new_weight != old_weight:
+            self._alloc_weights[panel] = new_weight
+            self._alloc_sums += self.areas[:, panel] * (new_weight - old_weight)
+            self.cells_touched += self.n_sizes
+
+    def share(self):
+        total_base_area = self.total_base_area
+        return 1.0 / total_base_area if total_base_area > 0 else 0.0
+
+    def panel_weight(self, size, panel, weight):
+        """Allocated weight of one piece of one panel for one size"""
+        if self._alloc_weights[panel] <= 0:
+            return 0.0
+        return float(self.areas[size, panel]) * self.share() * weight
+
+    def size_weights(self, size, weight):
+        """Allocated weight of one piece of every panel for one size"""
+        self.cells_touched += self.n_panels
+        return np.where(self._alloc_weights > 0,
+                        self.areas[size] * (self.share() * weight), 0.0)
+
+    def weights(self, weight):
+        """Allocated weight of one piece for every size and panel"""
+        self.cells_touched += self.areas.size
+        return np.where(self._alloc_weights > 0,
+                        self.areas * (self.share() * weight), 0.0)
+
+    def totals(self, weight):
+        """Allocated weight per size, multiplied by the panel quantity"""
+        return self._alloc_sums * (self.share() * weight)
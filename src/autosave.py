@@ -0,0 +1,158 @@
+import glob
+import json
+import os
+import re
+
+from PyQt6.QtCore import QLockFile, QObject, QStandardPaths, QTimer
+
+from project_file import ProjectFileError, load_project, save_project
+
+AUTOSAVE_VERSION = 1
+GENERATION_PATTERN = re.compile(r"journal-(\d+)\.log$")
+
+
+def default_autosave_dir():
+    data_dir = QStandardPaths.writableLocation(QStandardPaths.StandardLocation.GenericDataLocation)
+    return os.path.join(data_dir, "DownAllocation", "autosave")
+
+
+def _sync_directory(directory):
+    # Makes the renames and new files durable, not possible on every platform
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class AutosaveJournal(QObject):
+    """Crash-safe copy of the open sheet: a snapshot plus every edit since.
+
+    checkpoint() writes the whole sheet as a project file and starts an
+    empty journal next to it. Each later edit is appended to the journal as
+    one JSON line and flushed, so a crash of the process loses nothing, and
+    an fsync at most every SYNC_INTERVAL_MS bounds what a power cut can
+    lose. An edit costs the size of its record; the sheet is only written
+    whole at the next checkpoint, never on a timer. Snapshot and journal
+    are numbered by generation and the old pair is removed only once the
+    new one is on disk, so a crash during a checkpoint still leaves a
+    matching pair to recover.
+    """
+
+    SYNC_INTERVAL_MS = 1000
+
+    def __init__(self, directory=None, parent=None):
+        super().__init__(parent)
+        self.directory = directory or default_autosave_dir()
+        os.makedirs(self.directory, exist_ok=True)
+        self.generation = max(self._generations(), default=0)
+        self._lock = QLockFile(os.path.join(self.directory, "autosave.lock"))
+        self._file = None
+        self._unsynced = False
+        self._sync_timer = QTimer(self)
+        self._sync_timer.setSingleShot(True)
+        self._sync_timer.setInterval(self.SYNC_INTERVAL_MS)
+        self._sync_timer.timeout.connect(self.sync)
+
+    def _generations(self):
+        names = (os.path.basename(path)
+                 for path in glob.glob(os.path.join(self.directory, "journal-*.log")))
+        return sorted(int(match.group(1)) for match in map(GENERATION_PATTERN.match, names)
+                      if match)
+
+    def snapshot_path(self, generation):
+        return os.path.join(self.directory, f"snapshot-{generation}.dap")
+
+    def journal_path(self, generation):
+        return os.path.join(self.directory, f"journal-{generation}.log")
+
+    def acquire(self):
+        """Take the autosave folder, False while another window holds it"""
+        return self._lock.tryLock(0)
+
+    def find_recovery(self):
+        """The newest snapshot with unsaved edits after it, or None.
+
+        Returns (project, records). project is the snapshot as load_project()
+        returns it, plus the "project_path" the sheet had been saved to. A
+        record torn by the crash ends the journal.
+        """
+        for generation in reversed(self._generations()):
+            try:
+                with open(self.journal_path(generation), encoding="utf-8") as f:
+                    lines = iter(f)
+                    header = json.loads(next(lines, "null"))
+                    if not isinstance(header, dict) or header.get("format") != AUTOSAVE_VERSION:
+                        continue
+                    records = []
+                    for line in lines:
+                        if not line.endswith("\n"):
+                            break
+                        try:
+                            records.append(json.loads(line))
+                        except ValueError:
+                            break
+                project = load_project(self.snapshot_path(generation))
+            except (OSError, ValueError, ProjectFileError):
+                continue
+            if not records:
+                return None
+            project["project_path"] = header.get("project_path")
+            return project, records
+        return None
+
+    def checkpoint(self, project, project_path=None):
+        """Snapshot the whole sheet and continue with an empty journal"""
+        generation = self.generation + 1
+        save_project(self.snapshot_path(generation), project)
+        new_file = open(self.journal_path(generation), "w", encoding="utf-8")
+        new_file.write(json.dumps({"format": AUTOSAVE_VERSION, "project_path": project_path}) + "\n")
+        new_file.flush()
+        os.fsync(new_file.fileno())
+        _sync_directory(self.directory)
+
+        if self._file is not None:
+            self._file.close()
+        self._file = new_file
+        self._unsynced = False
+        self._sync_timer.stop()
+        self.generation = generation
+        self._remove_generations(below=generation)
+
+    def append(self, record):
+        """Add one edit to the journal, it survives a crash from now on"""
+        if self._file is None:
+            return
+        self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self._file.flush()
+        self._unsynced = True
+        if not self._sync_timer.isActive():
+            self._sync_timer.start()
+
+    def sync(self):
+        if self._unsynced and self._file is not None:
+            os.fsync(self._file.fileno())
+            self._unsynced = False
+
+    def discard(self):
+        """Remove everything on a clean exit, nothing is left to recover"""
+        self._sync_timer.stop()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._remove_generations(below=self.generation + 1)
+        self._lock.unlock()
+
+    def _remove_generations(self, below):
+        for generation in self._generations():
+            if generation < below:
+                for path in (self.journal_path(generation), self.snapshot_path(generation)):
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
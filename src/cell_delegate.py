@@ -0,0 +1,120 @@
+from PyQt6.QtCore import Qt, QPointF
+from PyQt6.QtGui import QColor, QFont, QFontMetrics, QPen, QStaticText, QTextOption
+from PyQt6.QtWidgets import QApplication, QStyle, QStyledItemDelegate, QStyleOptionFocusRect
+
+from table_models import CellStyle, CellStyleRole
+
+DISPLAY_ROLE = Qt.ItemDataRole.DisplayRole
+SELECTED = QStyle.StateFlag.State_Selected
+HAS_FOCUS = QStyle.StateFlag.State_HasFocus
+
+
+class CellDelegate(QStyledItemDelegate):
+    """Paints table cells from their CellStyle flag.
+
+    The default delegate builds a full style option for every cell it
+    paints, asking the model for each role. This one only asks for the text
+    and the style flag, and draws with fonts, pens and laid out text that
+    are shared by every cell, so painting a large grid creates no objects
+    per cell.
+    """
+
+    TEXT_COLOR = QColor(0, 0, 0)
+    HIGHLIGHT_COLOR = QColor(0, 0, 255)
+    PLACEHOLDER_COLOR = QColor(150, 150, 150)
+    MAX_CACHED_TEXTS = 4096
+    PADDING = 3
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._view_font = None
+        self._fonts = None
+        self._metrics = None
+        self._texts = {}
+        self._pens = {color.rgb(): QPen(color) for color in
+                      (self.TEXT_COLOR, self.HIGHLIGHT_COLOR, self.PLACEHOLDER_COLOR)}
+
+    def placeholder_text(self, index):
+        """Grey hint shown in an empty cell"""
+        return ""
+
+    def _fonts_for(self, font):
+        # Fonts follow the view font, rebuilt only when it changes
+        if font != self._view_font:
+            self._view_font = QFont(font)
+            bold = QFont(font)
+            bold.setBold(True)
+            self._fonts = (self._view_font, bold)
+            self._metrics = (QFontMetrics(self._view_font), QFontMetrics(bold))
+            self._texts.clear()
+        return self._fonts
+
+    def _static_text(self, text, bold, font, width):
+        key = (text, bold)
+        static = self._texts.get(key)
+        if static is None:
+            if len(self._texts) >= self.MAX_CACHED_TEXTS:
+                self._texts.clear()
+            static = QStaticText(text)
+            static.setTextFormat(Qt.TextFormat.PlainText)
+            static.prepare(font=font)
+            self._texts[key] = static
+        if static.size().width() > width:
+            # Too wide for the cell, wrap at spaces or elide like the default delegate
+            key = (text, bold, width)
+            fitted = self._texts.get(key)
+            if fitted is None:
+                if " " in text:
+                    fitted = QStaticText(text)
+                    fitted.setTextWidth(width)
+                    fitted.setTextOption(QTextOption(Qt.AlignmentFlag.AlignHCenter))
+                else:
+                    metrics = self._metrics[bold]
+                    fitted = QStaticText(metrics.elidedText(text, Qt.TextElideMode.ElideRight, width))
+                fitted.setTextFormat(Qt.TextFormat.PlainText)
+                fitted.prepare(font=font)
+                self._texts[key] = fitted
+            static = fitted
+        return static
+
+    def paint(self, painter, option, index):
+        text = index.data(DISPLAY_ROLE)
+        style = index.data(CellStyleRole) or CellStyle.PLAIN
+        color = self.HIGHLIGHT_COLOR if style & CellStyle.HIGHLIGHT else self.TEXT_COLOR
+        if not text:
+            text = self.placeholder_text(index)
+            color = self.PLACEHOLDER_COLOR
+
+        rect = option.rect
+        if option.state & SELECTED:
+            painter.fillRect(rect, option.palette.highlight())
+        if option.state & HAS_FOCUS:
+            self._draw_focus(painter, option)
+        if not text:
+            return
+
+        bold = bool(style & CellStyle.BOLD)
+        font = self._fonts_for(option.font)[bold]
+        static = self._static_text(text, bold, font, rect.width() - 2 * self.PADDING)
+        size = static.size()
+        position = QPointF(rect.x() + (rect.width() - size.width()) / 2,
+                           rect.y() + (rect.height() - size.height()) / 2)
+
+        painter.save()
+        painter.setFont(font)
+        painter.setPen(self._pens[color.rgb()])
+        painter.drawStaticText(position, static)
+        painter.restore()
+
+    def _draw_focus(self, painter, option):
+        # The current cell keeps its frame for keyboard navigation
+        focus = QStyleOptionFocusRect()
+        focus.rect = option.rect
+        focus.state = option.state
+        focus.palette = option.palette
+        focus.backgroundColor = option.palette.color(
+            option.palette.ColorRole.Highlight if option.state & SELECTED
+            else option.palette.ColorRole.Base)
+        widget = option.widget
+        style = widget.style() if widget is not None else QApplication.style()
+        style.drawPrimitive(QStyle.PrimitiveElement.PE_FrameFocusRect, focus, painter, widget)
@@ -0,0 +1,144 @@
+import json
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+
+from PyQt6.QtCore import QTimer
+from PyQt6.QtWidgets import QLabel
+
+
+class ActionRecord:
+    """Hot-path calls made on behalf of one user action.
+
+    calls maps a method name to [count, total ms, slowest ms]. Times are
+    inclusive, a calculate_totals inside update_table counts for both.
+    """
+
+    __slots__ = ("label", "started", "calls")
+
+    def __init__(self, label, started):
+        self.label = label
+        self.started = started
+        self.calls = {}
+
+    def add(self, name, elapsed_ms):
+        stats = self.calls.get(name)
+        if stats is None:
+            self.calls[name] = [1, elapsed_ms, elapsed_ms]
+        else:
+            stats[0] += 1
+            stats[1] += elapsed_ms
+            stats[2] = max(stats[2], elapsed_ms)
+
+    def summary(self):
+        slowest_first = sorted(self.calls.items(), key=lambda item: -item[1][1])
+        parts = [f"{name} x{count} ({total:.1f} ms)"
+                 for name, (count, total, _) in slowest_first]
+        return f"{self.label}: " + (", ".join(parts) if parts else "no recompute")
+
+    def to_dict(self):
+        return {
+            "action": self.label,
+            "started_s": round(self.started, 3),
+            "calls": {name: {"count": count, "total_ms": round(total, 3),
+                             "max_ms": round(slowest, 3)}
+                      for name, (count, total, slowest) in self.calls.items()},
+        }
+
+
+class Instrumentation:
+    """Opt-in counters and timers for the recompute hot paths.
+
+    Every timed call is charged to the newest user action. Work that a
+    QTimer runs after the action returned, like a scheduled recompute,
+    still belongs to it until the next action starts. Actions started
+    while another one runs, e.g. the base size combo cleared by a reset,
+    are part of the outer one.
+    """
+
+    def __init__(self, max_actions=500):
+        self.actions = deque(maxlen=max_actions)
+        self._clock_start = time.perf_counter()
+        self._action_depth = 0
+        self.start_action("Startup")
+
+    @property
+    def current(self):
+        return self.actions[-1]
+
+    def start_action(self, label):
+        """A user action begins, unless it happens inside another one"""
+        if self._action_depth == 0:
+            self.actions.append(ActionRecord(label, time.perf_counter() - self._clock_start))
+
+    @contextmanager
+    def action(self, label):
+        self.start_action(label)
+        self._action_depth += 1
+        try:
+            yield
+        finally:
+            self._action_depth -= 1
+
+    @contextmanager
+    def timed(self, name):
+        record = self.current  # The call stays with the action it started in
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            record.add(name, (time.perf_counter() - start) * 1000)
+
+    def time_methods(self, cls, names):
+        """Count and time every call of the named methods of cls"""
+        for name in names:
+            method = getattr(cls, name)
+            setattr(cls, name, self._wrap(method, name, None))
+
+    def action_method(self, cls, name, label):
+        """Treat every call of cls.name as a user action, and time it.
+
+        label is a string or a function of the call arguments returning one.
+        """
+        method = getattr(cls, name)
+        setattr(cls, name, self._wrap(method, name, label))
+
+    def _wrap(self, method, name, label):
+        @wraps(method)
+        def wrapper(*args, **kwargs):
+            if label is None:
+                with self.timed(name):
+                    return method(*args, **kwargs)
+            text = label(*args, **kwargs) if callable(label) else label
+            with self.action(text), self.timed(name):
+                return method(*args, **kwargs)
+        return wrapper
+
+    def to_dict(self):
+        return {"actions": [record.to_dict() for record in self.actions]}
+
+    def dump(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+            f.write("\n")
+
+
+class InstrumentationOverlay(QLabel):
+    """Status bar line showing what the newest user action cost"""
+
+    REFRESH_MS = 250
+
+    def __init__(self, instrumentation, parent=None):
+        super().__init__(parent)
+        self.instrumentation = instrumentation
+        self.setStyleSheet("color: #555; font-family: 'Courier New';")
+        self._timer = QTimer(self)
+        self._timer.timeout.connect(self.refresh)
+        self._timer.start(self.REFRESH_MS)
+
+    def refresh(self):
+        text = self.instrumentation.current.summary()
+        if text != self.text():
+            self.setText(text)
+            self.setToolTip(text)
@@ -1,14 +1,37 @@
+import time
+_startup_started = time.perf_counter()  # --profile-startup times the imports below
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                              QLabel, QLineEdit, QComboBox, QDateEdit, QPushButton,
                              QDialog, QListWidget, QDialogButtonBox, QFormLayout,
-                             QFrame, QSizePolicy, QStyleFactory, QTableWidget,
-                             QTableWidgetItem, QHeaderView, QAbstractItemView, QStyledItemDelegate,
-                             QMessageBox, QProgressBar)
-from PyQt6.QtGui import QFont, QDoubleValidator, QPalette, QColor, QIntValidator, QKeyEvent, QIcon, QPixmap
-from PyQt6.QtCore import Qt, QDate, QSettings, QEvent, QTimer, QCoreApplication, QPoint, QTimer, QPropertyAnimation, QEasingCurve
+                             QFrame, QSizePolicy, QStyleFactory, QTableView, QHeaderView, QAbstractItemView, QStyledItemDelegate,
+                             QMessageBox, QProgressDialog, QFileDialog)
+from PyQt6.QtGui import QFont, QDoubleValidator, QPalette, QColor, QIntValidator, QKeyEvent, QIcon, QPixmap, QAction, QKeySequence
+from PyQt6.QtCore import Qt, pyqtSignal, QItemSelection, QItemSelectionModel, QDate, QSettings, QTimer, QCoreApplication, QPoint, QTimer, QPropertyAnimation, QEasingCurve
+_pyqt_imported = time.perf_counter()
+import argparse
+import sqlite3
 import sys
 import os
+from contextlib import contextmanager, nullcontext
+import numpy as np
 from splash_screen import SplashScreen
+from autosave import AutosaveJournal
+from allocation_engine import IncrementalAllocator, base_allocation, load_allocator
+from recalc_scheduler import RecalcScheduler
+from recalc_worker import RecalcWorker
+from undo_journal import UndoJournal
+from table_models import (AREA_DECIMALS, SewingAreaModel, StyleListModel, VisibleRowsProxy,
+                          WeightDistributionModel)
+from cell_delegate import CellDelegate
+from instrumentation import Instrumentation, InstrumentationOverlay
+from project_file import FILE_EXTENSION, ProjectFileError, load_project, save_project
+from resource_telemetry import ResourceTelemetry
+from stall_watchdog import StallWatchdog
+from similarity_index import FEATURE_PANELS, MIN_FEATURE_PANELS, sheet_features
+from style_library import StyleLibrary, default_library_path
+from startup_profile import (StartupProfile, check_regressions, load_baseline, save_baseline,
+                             write_report)
+_modules_imported = time.perf_counter()
 import warnings
 warnings.filterwarnings("ignore", category=DeprecationWarning)
 
@@ -60,7 +83,7 @@ class FactoryEditDialog(QDialog):
                 self.factory_location_input.text().strip())
 
 
-class TableItemDelegate(QStyledItemDelegate):
+class TableItemDelegate(CellDelegate):
     def __init__(self, parent=None):
         super().__init__(parent)
 
@@ -80,7 +103,7 @@ class TableItemDelegate(QStyledItemDelegate):
                 validator = QIntValidator(1, 9, parent)
                 editor.setValidator(validator)
             elif index.column() >= 2:  # Sewing area columns
-                validator = QDoubleValidator(0, 9999, 2, parent)
+                validator = QDoubleValidator(0, 9999, AREA_DECIMALS, parent)
                 validator.setNotation(
                     QDoubleValidator.Notation.StandardNotation)
                 editor.setValidator(validator)
@@ -100,36 +123,36 @@ class TableItemDelegate(QStyledItemDelegate):
                 return True
         return super().eventFilter(editor, event)
 
-    def initStyleOption(self, option, index):
-        super().initStyleOption(option, index)
-        # Set text alignment to center for all cells
-        option.displayAlignment = Qt.AlignmentFlag.AlignCenter
-        # Show hint text for empty cells with gray color
-        if not index.data(Qt.ItemDataRole.DisplayRole):
-            option.palette.setColor(
-                QPalette.ColorRole.Text, QColor(150, 150, 150))
-            if index.row() == 1 and index.column() >= 2:  # Size headers
-                option.text = f"SIZE {index.column()-1}"
-            elif index.row() >= 2 and index.row() < self.parent().rowCount() - 1:
-                if index.column() == 0:  # Panel Name
-                    option.text = "PANEL NAME"
-                elif index.column() == 1:  # Panel Quantity
-                    option.text = "0"
-                elif index.column() >= 2:  # Sewing area
-                    option.text = "0.00"
-
-
-class TableWidget(QTableWidget):
-    def __init__(self, rows, cols, parent=None):
-        super().__init__(rows, cols, parent)
+    def placeholder_text(self, index):
+        # Show hint text for empty cells, painted gray
+        if index.row() == 1 and index.column() >= 2:  # Size headers
+            return f"SIZE {index.column()-1}"
+        elif index.row() >= 2 and index.row() < self.parent().rowCount() - 1:
+            if index.column() == 0:  # Panel Name
+                return "PANEL NAME"
+            elif index.column() == 1:  # Panel Quantity
+                return "0"
+            elif index.column() >= 2:  # Sewing area
+                return "0.00"
+        return ""
+
+
+class TableWidget(QTableView):
+    PASTE_CHUNK_ROWS = 256  # Rows validated and written between progress updates
+
+    # (row, col, text) of cells changed by a user action, an undo or a redo
+    cellsChanged = pyqtSignal(list)
+
+    def __init__(self, model, parent=None):
+        super().__init__(parent)
+        self.setModel(model)
         self.setup_table()
         self.pasted_cells = []
-        self.undo_stack = []
-        self.redo_stack = []
-        self.initial_state_saved = False  # Track if initial state is saved
+        # Cell deltas of every user action
+        self.journal = UndoJournal(
+            on_commit=lambda group: self.cellsChanged.emit(group.redo_changes()))
         self.programmatic_change = False  # Flag to prevent undo tracking during restore
-        self._updating_table = False
-        self._updating_bottom_table = False
+        self.pasting = False  # The window recomputes once for the whole paste, not per chunk
 
     def setup_table(self):
         self.setSelectionBehavior(
@@ -139,41 +162,29 @@ class TableWidget(QTableWidget):
         self.setEditTriggers(QAbstractItemView.EditTrigger.DoubleClicked |
                              QAbstractItemView.EditTrigger.EditKeyPressed)
         self.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
-        
-        # Connect itemChanged signal to track user changes
-        self.itemChanged.connect(self.on_item_changed)
+        self.setItemDelegate(TableItemDelegate(self))
+
+        # Connect cellEdited signal to track user changes
+        self.model().cellEdited.connect(self.on_cell_edited)
+
+    def rowCount(self):
+        return self.model().rowCount()
 
-    def on_item_changed(self, item):
+    def columnCount(self):
+        return self.model().columnCount()
+
+    def on_cell_edited(self, row, col, old_text):
         """Track when user manually changes items"""
         if not self.programmatic_change:
-            # Save initial state if this is the first user change
-            if not self.initial_state_saved:
-                # Save the state before this change by temporarily reverting
-                current_text = item.text()
-                self.programmatic_change = True
-                item.setText("")  # Temporarily clear to save previous state
-                self.push_undo_state()
-                item.setText(current_text)  # Restore current text
-                self.programmatic_change = False
-                self.initial_state_saved = True
-            
-            # Apply uppercase conversion for specific cells
-            row, col = item.row(), item.column()
-            if col == 0 or (row == 1 and col >= 2):
-                if item.text() != item.text().upper():
-                    self.programmatic_change = True
-                    item.setText(item.text().upper())
-                    self.programmatic_change = False
+            self.journal.record(row, col, old_text, self.model().cell_text(row, col, exact=True))
 
     def keyPressEvent(self, event: QKeyEvent):
         if event.key() == Qt.Key.Key_C and event.modifiers() == Qt.KeyboardModifier.ControlModifier:
             self.copy_selection()
         elif event.key() == Qt.Key.Key_V and event.modifiers() == Qt.KeyboardModifier.ControlModifier:
-            self.push_undo_state()
             self.paste_to_selection()
             self.select_pasted_cells()
         elif event.key() == Qt.Key.Key_Delete:
-            self.push_undo_state()
             self.clear_selection()
         elif event.key() in (Qt.Key.Key_Return, Qt.Key.Key_Enter, Qt.Key.Key_F2):
             current = self.currentIndex()
@@ -193,28 +204,25 @@ class TableWidget(QTableWidget):
             if current.isValid() and current.row() < self.rowCount() - 1:
                 if event.modifiers() & Qt.KeyboardModifier.KeypadModifier:
                     self.edit(current)
-                    if self.cellWidget(current.row(), current.column()):
-                        self.cellWidget(
-                            current.row(), current.column()).keyPressEvent(event)
+                    if self.indexWidget(current):
+                        self.indexWidget(current).keyPressEvent(event)
                     return
             super().keyPressEvent(event)
         elif event.text() and not event.modifiers():
             current = self.currentIndex()
             if current.isValid() and current.row() < self.rowCount() - 1:
                 self.edit(current)
-                if self.cellWidget(current.row(), current.column()):
-                    self.cellWidget(current.row(), current.column()
-                                    ).keyPressEvent(event)
+                if self.indexWidget(current):
+                    self.indexWidget(current).keyPressEvent(event)
                 return
             super().keyPressEvent(event)
         elif event.key() in (Qt.Key.Key_Up, Qt.Key.Key_Down, Qt.Key.Key_Left, Qt.Key.Key_Right):
             current = self.currentIndex()
             if current.isValid():
                 if self.state() == QAbstractItemView.State.EditingState:
-                    self.commitData(self.cellWidget(
-                        current.row(), current.column()))
-                    self.closePersistentEditor(
-                        self.item(current.row(), current.column()))
+                    if self.indexWidget(current):
+                        self.commitData(self.indexWidget(current))
+                    self.closePersistentEditor(current)
 
                 row, col = current.row(), current.column()
                 if event.key() == Qt.Key.Key_Up:
@@ -235,88 +243,38 @@ class TableWidget(QTableWidget):
         else:
             super().keyPressEvent(event)
 
-    def save_state(self):
-        state = []
-        for row in range(self.rowCount()):
-            row_data = []
-            for col in range(self.columnCount()):
-                item = self.item(row, col)
-                row_data.append(item.text() if item else "")
-            state.append(row_data)
-        return state
-
-    def push_undo_state(self):
-        """Only save undo state when there are actual user changes"""
-        if self.programmatic_change:
-            return
-            
-        current_state = self.save_state()
-        
-        # Don't save duplicate states
-        if self.undo_stack and current_state == self.undo_stack[-1]:
-            return
-            
-        self.undo_stack.append(current_state)
-        self.redo_stack = []  # Clear redo stack when new action is performed
-        
-        # Limit undo stack size
-        if len(self.undo_stack) > 100:
-            self.undo_stack.pop(0)
-
     def undo(self):
-        if not self.undo_stack:
-            return
-            
-        # Save current state to redo stack
-        current_state = self.save_state()
-        self.redo_stack.append(current_state)
-        
-        # Get and restore previous state
-        previous_state = self.undo_stack.pop()
-        self.restore_state(previous_state)
-        
-        # Limit redo stack size
-        if len(self.redo_stack) > 100:
-            self.redo_stack.pop(0)
+        group = self.journal.take_undo()
+        if group:
+            self.restore_state(group.undo_changes())
 
     def redo(self):
-        if not self.redo_stack:
-            return
-            
-        # Save current state to undo stack
-        current_state = self.save_state()
-        self.undo_stack.append(current_state)
-        
-        # Get and restore next state
-        next_state = self.redo_stack.pop()
-        self.restore_state(next_state)
-        
-        # Limit undo stack size
-        if len(self.undo_stack) > 100:
-            self.undo_stack.pop(0)
-
-    def restore_state(self, state):
-        """Restore table state without triggering undo tracking"""
+        group = self.journal.take_redo()
+        if group:
+            self.restore_state(group.redo_changes())
+
+    def restore_state(self, changes):
+        """Write back (row, col, text) cells without tracking them for undo"""
+        model = self.model()
+        # Steps recorded before the table shrank may point past its end
+        changes = [(row, col, text) for row, col, text in changes
+                   if row < model.rowCount() - 1 and col < model.columnCount()]
         self.programmatic_change = True
-        self.blockSignals(True)
-        
         try:
-            for row in range(min(self.rowCount(), len(state))):
-                for col in range(min(self.columnCount(), len(state[row]))):
-                    item = self.item(row, col)
-                    if not item:
-                        item = QTableWidgetItem()
-                        self.setItem(row, col, item)
-                    item.setText(state[row][col])
+            if len(changes) == 1:
+                model.set_cell_text(*changes[0])
+            else:
+                model.set_cells(changes)
         finally:
-            self.blockSignals(False)
             self.programmatic_change = False
-            self.viewport().update()
-            
-            # Recalculate totals if main window has the method
-            main_window = self.window()
-            if hasattr(main_window, 'calculate_totals'):
-                main_window.calculate_totals()
+        if changes:
+            self.cellsChanged.emit(changes)
+
+    def roll_back(self):
+        """Undo the newest step for good, e.g. after its action was cancelled"""
+        group = self.journal.discard_undo()
+        if group:
+            self.restore_state(group.undo_changes())
 
     def copy_selection(self):
         selection = self.selectedIndexes()
@@ -331,178 +289,144 @@ class TableWidget(QTableWidget):
         for r in range(min_row, max_row + 1):
             row_text = []
             for c in range(min_col, max_col + 1):
-                item = self.item(r, c)
-                row_text.append(item.text() if item else "")
+                row_text.append(self.model().cell_text(r, c, exact=True))
             text += "\t".join(row_text) + "\n"
         clipboard.setText(text.strip())
 
     def paste_to_selection(self):
-        try:
-            # Show progress dialog immediately
-            progress = ProgressDialog("Pasting Data", "Processing paste operation...", self)
-            progress.show()
-            QApplication.processEvents()
-            progress.update_progress(5)
-
-            # Get selection and clipboard data (10-15% progress)
-            selection = self.selectedIndexes()
-            if not selection:
-                progress.close()
-                return
+        # Hold recomputes until the whole block is in, then run exactly one
+        scheduler = getattr(self.window(), 'recalc_scheduler', None)
+        with scheduler.suspended() if scheduler else nullcontext():
+            try:
+                # Get selection and clipboard data
+                selection = self.selectedIndexes()
+                if not selection:
+                    return
 
-            first_row = selection[0].row()
-            first_col = selection[0].column()
-            clipboard = QApplication.clipboard()
-            text = clipboard.text()
+                first_row = selection[0].row()
+                first_col = selection[0].column()
+                clipboard = QApplication.clipboard()
+                text = clipboard.text()
             
-            if not text.strip():
-                progress.close()
-                return
+                if not text.strip():
+                    return
 
-            rows = [row for row in text.split('\n') if row.strip()]
-            grid = [row.split('\t') for row in rows]
-            progress.update_progress(15)
-
-            # Check if we're pasting into size headers (15-20% progress)
-            is_size_header_paste = (first_row == 1)
-            if is_size_header_paste:
-                is_vertical = all(len(row) == 1 for row in grid) and len(grid) > 1
-                if is_vertical:
-                    transposed = []
-                    for i in range(len(grid[0])):
-                        row_data = []
-                        for j in range(len(grid)):
-                            if i < len(grid[j]):
-                                row_data.append(grid[j][i])
-                            else:
-                                row_data.append('')
-                        transposed.append(row_data)
-                    grid = transposed
-            progress.update_progress(20)
-
-            # Calculate needed dimensions (20-25% progress)
-            main_window = self.window()
-            needed_rows = len(grid)
-            needed_cols = max(len(row) for row in grid)
-            current_editable_rows = self.rowCount() - 3
-            current_editable_cols = self.columnCount() - 2
-
-            rows_to_add = max(0, (first_row + needed_rows) - (current_editable_rows + 2))
-            cols_to_add = max(0, (first_col + needed_cols) - (current_editable_cols + 2))
-            progress.update_progress(25)
-
-            # Expand table if needed (25-50% progress)
-            if rows_to_add > 0 or cols_to_add > 0:
-                progress.label.setText("Adjusting table size...")
-                
-                if hasattr(main_window, 'default_data_rows'):
-                    main_window.default_data_rows += rows_to_add
-                if hasattr(main_window, 'default_cols'):
-                    main_window.default_cols += cols_to_add
-                
-                # Save existing data before expansion (30-40% progress)
-                if hasattr(main_window, 'save_table_data'):
-                    saved_data = main_window.save_table_data()
-                progress.update_progress(40)
-                
-                # Rebuild table with new dimensions (40-45% progress)
-                if hasattr(main_window, 'setup_table'):
-                    main_window.setup_table()
-                progress.update_progress(45)
-                
-                # Restore data after expansion (45-50% progress)
-                if hasattr(main_window, 'restore_table_data'):
-                    main_window.restore_table_data(saved_data)
-                
-                if hasattr(main_window, 'row_input'):
-                    main_window.row_input.setText(str(main_window.default_data_rows))
-                if hasattr(main_window, 'col_input'):
-                    main_window.col_input.setText(str(main_window.default_cols - 2))
-            
-            progress.update_progress(50)
-            progress.label.setText("Pasting data...")
+                rows = [row for row in text.split('\n') if row.strip()]
+                grid = [row.split('\t') for row in rows]
+
+                # Check if we're pasting into size headers
+                is_size_header_paste = (first_row == 1)
+                if is_size_header_paste:
+                    is_vertical = all(len(row) == 1 for row in grid) and len(grid) > 1
+                    if is_vertical:
+                        transposed = []
+                        for i in range(len(grid[0])):
+                            row_data = []
+                            for j in range(len(grid)):
+                                if i < len(grid[j]):
+                                    row_data.append(grid[j][i])
+                                else:
+                                    row_data.append('')
+                            transposed.append(row_data)
+                        grid = transposed
+
+                # Calculate needed dimensions
+                main_window = self.window()
+                needed_rows = len(grid)
+                needed_cols = max(len(row) for row in grid)
+                current_editable_rows = self.rowCount() - 3
+                current_editable_cols = self.columnCount() - 2
+
+                rows_to_add = max(0, (first_row + needed_rows) - (current_editable_rows + 2))
+                cols_to_add = max(0, (first_col + needed_cols) - (current_editable_cols + 2))
+                can_resize = hasattr(main_window, 'resize_sheet')
+
+                progress = self.progress_dialog()
+                with progress.operation("Pasting Data", "Pasting data...",
+                                        needed_rows, cancellable=True):
+                    # Expand table if needed, only the new rows and columns are created
+                    if (rows_to_add > 0 or cols_to_add > 0) and can_resize:
+                        progress.advance(0, "Adjusting table size...")
+                        main_window.resize_sheet(current_editable_rows + rows_to_add,
+                                                 current_editable_cols + cols_to_add)
+                        progress.advance(0, "Pasting data...")
+
+                    # Validate and write the block a slice of rows at a time, the
+                    # whole paste is still one undo step
+                    self.pasting = True
+                    try:
+                        with self.journal.group("Paste") as group:
+                            for start in range(0, needed_rows, self.PASTE_CHUNK_ROWS):
+                                chunk = grid[start:start + self.PASTE_CHUNK_ROWS]
+                                group.extend(self.model().paste_block(first_row + start,
+                                                                      first_col, chunk))
+                                progress.advance(len(chunk))
+                                if progress.wasCanceled():
+                                    break
+                        cancelled = progress.wasCanceled()
+                        if cancelled and group:
+                            # Put back every cell written so far
+                            self.roll_back()
+                    finally:
+                        self.pasting = False
+                    if group and hasattr(main_window, 'on_block_edited'):
+                        main_window.on_block_edited(
+                            first_row, first_col,
+                            min(first_row + needed_rows, self.rowCount() - 1) - 1,
+                            min(first_col + needed_cols, self.columnCount()) - 1)
+
+                if cancelled:
+                    # Put back the old table size
+                    if (rows_to_add > 0 or cols_to_add > 0) and can_resize:
+                        main_window.resize_sheet(current_editable_rows, current_editable_cols)
+                    self.pasted_cells = []
+                    return
 
-            # Process paste operation (50-90% progress)
-            self.pasted_cells = []
-            total_cells = len(grid) * max(len(row) for row in grid) if grid else 1
-            processed_cells = 0
-            
-            # Set programmatic flag to prevent undo tracking during paste
-            self.programmatic_change = True
-            
-            try:
-                for r, row in enumerate(grid):
-                    for c, value in enumerate(row):
-                        current_row = first_row + r
-                        current_col = first_col + c
-
-                        # Update progress every 10 cells
-                        processed_cells += 1
-                        if processed_cells % 10 == 0:
-                            progress_val = 50 + (40 * processed_cells / total_cells)
-                            progress.update_progress(min(90, int(progress_val)))
-                            QApplication.processEvents()
-
-                        if (current_row >= self.rowCount() or 
-                            current_col >= self.columnCount() or
-                            current_row == 0 or 
-                            current_row == self.rowCount() - 1):
-                            continue
-
-                        # Apply validation rules
-                        if current_row != 1:  # Not size header
-                            if current_col == 1:  # Panel Quantity column
-                                if not value.isdigit() or not (1 <= int(value) <= 9):
-                                    continue
-                            elif current_col >= 2:  # Sewing area
-                                try:
-                                    float(value)
-                                except ValueError:
-                                    continue
-
-                        # Create item if needed
-                        if not self.item(current_row, current_col):
-                            self.setItem(current_row, current_col, QTableWidgetItem())
-
-                        # Set text with uppercase conversion where needed
-                        if current_col == 0 or (current_row == 1 and current_col >= 2):
-                            self.item(current_row, current_col).setText(value.strip().upper())
-                        else:
-                            self.item(current_row, current_col).setText(value.strip())
-                        
-                        self.pasted_cells.append((current_row, current_col))
-            finally:
-                self.programmatic_change = False
-
-            # Final updates (90-100% progress)
-            progress.update_progress(95)
-            self.select_pasted_cells()
-            
-            if hasattr(main_window, 'calculate_totals'):
-                main_window.calculate_totals()
-            
-            progress.update_progress(100)
+                # Select what was pasted
+                top_row = max(first_row, 1)
+                last_row = min(first_row + needed_rows, self.rowCount() - 1) - 1
+                last_col = min(first_col + needed_cols, self.columnCount()) - 1
+                self.pasted_cells = []
+                if top_row <= last_row and first_col <= last_col:
+                    self.pasted_cells = [(top_row, first_col), (last_row, last_col)]
+                self.select_pasted_cells()
 
-        except Exception as e:
-            QMessageBox.warning(self, "Paste Error", f"Failed to paste data: {str(e)}")
-            if 'progress' in locals():
-                progress.close()
+            except Exception as e:
+                QMessageBox.warning(self, "Paste Error", f"Failed to paste data: {str(e)}")
+
+    def progress_dialog(self):
+        """The window's shared progress dialog"""
+        main_window = self.window()
+        if not hasattr(main_window, 'progress_dialog'):
+            main_window.progress_dialog = ProgressDialog(main_window)
+        return main_window.progress_dialog
 
     def select_pasted_cells(self):
         if not self.pasted_cells:
             return
-        self.clearSelection()
-        for row, col in self.pasted_cells:
-            item = self.item(row, col)
-            if item:
-                item.setSelected(True)
+        rows = [row for row, col in self.pasted_cells]
+        cols = [col for row, col in self.pasted_cells]
+        selection = QItemSelection(self.model().index(min(rows), min(cols)),
+                                   self.model().index(max(rows), max(cols)))
+        self.selectionModel().select(
+            selection, QItemSelectionModel.SelectionFlag.ClearAndSelect)
 
     def clear_selection(self):
+        # Empty the whole selection with one write, like undo and redo
+        model = self.model()
+        edits = []
         for index in self.selectedIndexes():
-            if index.row() == 0 or index.row() == self.rowCount() - 1:
+            row, col = index.row(), index.column()
+            if row == 0 or row == self.rowCount() - 1 or not model.is_editable(row, col):
                 continue
-            if self.item(index.row(), index.column()):
-                self.item(index.row(), index.column()).setText("")
+            old = model.cell_text(row, col, exact=True)
+            if old:
+                edits.append((row, col, old, ""))
+        if not edits:
+            return
+        with self.journal.group("Delete") as group:
+            group.extend(edits)
+            model.set_cells([(row, col, new) for row, col, old, new in edits])
 
 class UpperCaseLineEdit(QLineEdit):
     def __init__(self, parent=None):
@@ -536,109 +460,41 @@ class UpperCaseLineEdit(QLineEdit):
             self.insertPlainText(source.text().upper())
 
 
-class UpperCaseItemDelegate(QStyledItemDelegate):
-    def __init__(self, parent=None):
-        super().__init__(parent)
+class ProgressDialog(QProgressDialog):
+    """Progress of a long operation, one per window and reused by each.
 
-    def createEditor(self, parent, option, index):
-        # Apply to Panel Name column (column 0) and Size Headers (row 1, columns ≥2)
-        if index.column() == 0 or (index.row() == 1 and index.column() >= 2):
-            editor = UpperCaseLineEdit(parent)
-            return editor
-        return super().createEditor(parent, option, index)
+    Operations report the work units they have actually finished. The
+    dialog only appears once an operation has run for MINIMUM_DURATION_MS
+    and is expected to take longer, so quick operations never show it.
+    """
 
-    def setEditorData(self, editor, index):
-        if isinstance(editor, UpperCaseLineEdit):
-            editor.blockSignals(True)
-            editor.setText(index.data(Qt.ItemDataRole.DisplayRole) or "")
-            editor.blockSignals(False)
-        else:
-            super().setEditorData(editor, index)
-
-    def setModelData(self, editor, model, index):
-        if isinstance(editor, UpperCaseLineEdit):
-            model.setData(index, editor.text().strip().upper(),
-                          Qt.ItemDataRole.EditRole)
-        else:
-            super().setModelData(editor, model, index)
-
-    def updateEditorGeometry(self, editor, option, index):
-        editor.setGeometry(option.rect)
+    MINIMUM_DURATION_MS = 200
 
-    def eventFilter(self, editor, event):
-        if isinstance(editor, UpperCaseLineEdit):
-            if event.type() == QEvent.Type.KeyPress:
-                if event.text():
-                    editor.keyPressEvent(event)
-                    self.commitData.emit(editor)
-                    return True
-            elif event.type() == QEvent.Type.FocusOut:
-                self.commitData.emit(editor)
-                self.closeEditor.emit(
-                    editor, QStyledItemDelegate.EndEditHint.NoHint)
-                return True
-        return super().eventFilter(editor, event)
-
-
-class ProgressDialog(QDialog):
-    def __init__(self, title="Processing", message="Please wait...", parent=None):
+    def __init__(self, parent=None):
         super().__init__(parent)
+        self.setWindowModality(Qt.WindowModality.WindowModal)
+        self.setMinimumDuration(self.MINIMUM_DURATION_MS)
+        self.setAutoReset(False)  # Hidden by reset() when the operation ends
+        self.reset()  # QProgressDialog starts its show timer on construction
+
+    @contextmanager
+    def operation(self, title, label, total_units, cancellable=False):
+        """Track one operation, the dialog is hidden again when it ends"""
         self.setWindowTitle(title)
-        self.setModal(True)
-        self.setFixedSize(300, 100)
-        self.setWindowFlags(self.windowFlags() & ~Qt.WindowType.WindowCloseButtonHint)
-        
-        layout = QVBoxLayout()
-        self.setLayout(layout)
-        
-        self.label = QLabel(message)
-        self.label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        layout.addWidget(self.label)
-        
-        self.progress = QProgressBar()
-        self.progress.setRange(0, 100)
-        self.progress.setValue(0)
-        self.progress.setTextVisible(True)
-        self.progress.setStyleSheet("""
-            QProgressBar {
-                border: 1px solid #ccc;
-                border-radius: 5px;
-                text-align: center;
-                background: #f0f0f0;
-            }
-            QProgressBar::chunk {
-                background-color: #4CAF50;
-                width: 10px;
-                border-radius: 4px;
-            }
-        """)
-        layout.addWidget(self.progress)
-        
-        # Timer for smooth progress animation
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.increment_progress)
-        self.current_progress = 0
-        self.target_progress = 0
-        self.step = 1
-        
-    def increment_progress(self):
-        if self.current_progress < self.target_progress:
-            self.current_progress += self.step
-            self.progress.setValue(self.current_progress)
-            QApplication.processEvents()
-        else:
-            self.timer.stop()
-            if self.current_progress >= 100:
-                self.close()
-    
-    def update_progress(self, value):
-        self.target_progress = value
-        self.step = max(1, (self.target_progress - self.current_progress) // 10)
-        self.timer.start(30)  # Update every 30ms for smooth animation
-    
-    def closeEvent(self, event):
-        self.timer.stop()
-        super().closeEvent(event)
+        self.setLabelText(label)
+        self.setCancelButtonText("Cancel" if cancellable else None)
+        self.setRange(0, max(total_units, 1))
+        self.setValue(0)  # Starts the minimum duration clock
+        try:
+            yield self
+        finally:
+            self.reset()
+
+    def advance(self, units=1, label=None):
+        """Count finished work units. A shown dialog handles Cancel in here."""
+        if label is not None:
+            self.setLabelText(label)
+        self.setValue(min(self.value() + units, self.maximum()))
 
 class ConfirmationDialog(QDialog):
     def __init__(self, title="Confirm Action", message="Are you sure you want to proceed?", parent=None):
@@ -711,9 +567,99 @@ class ConfirmationDialog(QDialog):
             }
         """)
 
+class LibraryDialog(QDialog):
+    """Find a style in the library by buyer, style, season and stage"""
+
+    def __init__(self, library, seasons, stages, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Open from Library")
+        self.resize(800, 500)
+
+        layout = QVBoxLayout()
+        self.setLayout(layout)
+
+        # Typo tolerant search over buyer, style and panel names
+        self.search_input = UpperCaseLineEdit()
+        self.search_input.setPlaceholderText("Search buyer, style or panel names")
+        layout.addWidget(self.search_input)
+
+        # Filters, buyer and style match from the start
+        filter_layout = QHBoxLayout()
+        self.buyer_filter = UpperCaseLineEdit()
+        self.buyer_filter.setPlaceholderText("Buyer")
+        self.style_filter = UpperCaseLineEdit()
+        self.style_filter.setPlaceholderText("Style")
+        self.season_filter = QComboBox()
+        self.season_filter.addItems(seasons)
+        self.stage_filter = QComboBox()
+        self.stage_filter.addItems(stages)
+        for widget in (self.buyer_filter, self.style_filter, self.season_filter, self.stage_filter):
+            filter_layout.addWidget(widget)
+        layout.addLayout(filter_layout)
+
+        self.model = StyleListModel(library, self)
+        self.results = QTableView()
+        self.results.setModel(self.model)
+        self.results.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.results.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.results.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.results.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        self.results.verticalHeader().setVisible(False)
+        self.results.doubleClicked.connect(self.accept)
+        self.results.selectionModel().currentRowChanged.connect(self.update_open_button)
+        layout.addWidget(self.results)
+
+        self.count_label = QLabel()
+        layout.addWidget(self.count_label)
+
+        button_box = QDialogButtonBox(
+            QDialogButtonBox.StandardButton.Open | QDialogButtonBox.StandardButton.Cancel)
+        self.open_btn = button_box.button(QDialogButtonBox.StandardButton.Open)
+        button_box.accepted.connect(self.accept)
+        button_box.rejected.connect(self.reject)
+        layout.addWidget(button_box)
+
+        self.search_input.textChanged.connect(self.apply_filters)
+        self.buyer_filter.textChanged.connect(self.apply_filters)
+        self.style_filter.textChanged.connect(self.apply_filters)
+        self.season_filter.currentTextChanged.connect(self.apply_filters)
+        self.stage_filter.currentTextChanged.connect(self.apply_filters)
+        self.apply_filters()
+
+    def apply_filters(self):
+        searching = bool(self.search_input.text().strip())
+        # A search ranks by buyer and style itself
+        self.buyer_filter.setEnabled(not searching)
+        self.style_filter.setEnabled(not searching)
+        self.model.set_filters(search=self.search_input.text().upper(),
+                               buyer=self.buyer_filter.text().strip().upper(),
+                               style=self.style_filter.text().strip().upper(),
+                               season=self.season_filter.currentText(),
+                               garments_stage=self.stage_filter.currentText())
+        self.count_label.setText(f"{self.model.total} style(s)")
+        if self.model.rowCount():
+            self.results.selectRow(0)
+        self.update_open_button()
+
+    def update_open_button(self):
+        self.open_btn.setEnabled(self.results.currentIndex().isValid())
+
+    def selected_style_id(self):
+        index = self.results.currentIndex()
+        return self.model.style_id(index.row()) if index.isValid() else None
+
+
 class DownAllocationApp(QMainWindow):
-    def __init__(self):
+    STARTUP_STEPS = 5  # startup_step() calls made while the window is built
+
+    def __init__(self, on_startup_step=None, instrumentation=None):
         super().__init__()
+        self._on_startup_step = on_startup_step
+        self.instrumentation = instrumentation  # Opt-in hot-path counters, see --instrument
+        self.project_path = None  # File the sheet was last opened from or saved to
+        self.autosave = None  # Crash recovery journal, see enable_autosave()
+        self.library_path = None  # Style library database, the default one when None
+        self.library = None  # Opened on first use
 
         # Configuration variables
         self.input_field_width = 250
@@ -730,6 +676,12 @@ class DownAllocationApp(QMainWindow):
         self.default_cols = 10       # Total columns (2 fixed + size columns)
         self.input_field_height = 10  # New variable for consistent input field height
         self.horizontal_form_spacing = 30  # New variable for horizontal spacing in form
+        self.input_debounce_ms = 150  # Delay before weight inputs trigger a recompute
+        self.ecodown_weight = 0.0  # Weight inputs, parsed once when their text changes
+        self.garment_weight = 0.0
+        self.background_recalc_cells = 200_000  # Sheets this large recompute on a worker thread
+        self.suggestion_delay_ms = 300  # Typing pause before similar styles are looked up
+        self.suggestions = []  # Library rows offered in the suggestion bar
 
         self.top_fixed_header = None
         self.bottom_fixed_header = None
@@ -745,24 +697,47 @@ class DownAllocationApp(QMainWindow):
         self.sewing_area_col_width = 100
 
         self.base_font = QFont("Courier New", self.row_column_count_size)
+
+        # Allocation engine kept in sync with the top table one edit at a time
+        self.allocation = IncrementalAllocator(self.default_data_rows, self.default_cols - 2)
+        # Every recompute request goes through here, at most one run per event-loop turn
+        self.recalc_scheduler = RecalcScheduler(self.run_recalculation, self)
+        # Full reloads and base size switches of large sheets run here, off the GUI thread
+        self.recalc_worker = RecalcWorker(self)
+        # Shared by every long operation, it only shows up for slow ones
+        self.progress_dialog = ProgressDialog(self)
+        self._reload_pending = False  # The running job reloads the whole engine
+        self._pending_base_size = None
         
         # Initialize UI
         self.init_ui()
 
         # Connect change trackers for reset all fields
+        self.startup_step("Connecting inputs...")
         self.connect_change_trackers()
 
         # Check if factory info exists
+        self.startup_step("Reading settings...")
+        self.load_factory_info()
+
+    def load_factory_info(self):
         self.settings = QSettings("DownAllocation", "FactoryInfo")
         factory_name = self.settings.value("factory_name", "")
         factory_location = self.settings.value("factory_location", "")
 
         if not factory_name or not factory_location:
-            self.show_factory_edit()
+            # Ask once the window is up, not behind the splash screen
+            QTimer.singleShot(0, self.show_factory_edit)
         else:
             self.update_factory_display(factory_name, factory_location)
 
+    def startup_step(self, text):
+        """Tell whoever shows the startup progress that the next step begins"""
+        if self._on_startup_step is not None:
+            self._on_startup_step(text)
+
     def init_ui(self):
+        self.startup_step("Building window...")
         self.setWindowTitle("Automatic Down Allocation System")
         self.setMinimumSize(1300, 900)
         self.setFont(self.base_font)
@@ -771,8 +746,7 @@ class DownAllocationApp(QMainWindow):
         icon_path = os.path.join(os.path.dirname(__file__), '..', 'assets', 'app_icon.ico')
         icon_path = os.path.abspath(icon_path)
         self.setWindowIcon(QIcon(icon_path))
-
-        self.showMaximized()
+        self.create_file_menu()
 
         # Main widget
         main_widget = QWidget()
@@ -965,8 +939,6 @@ class DownAllocationApp(QMainWindow):
                                 Qt.AlignmentFlag.AlignVCenter)
         self.base_size_combo = QComboBox()
         self.base_size_combo.setFixedWidth(self.input_field_width)
-        self.base_size_combo.currentTextChanged.connect(
-            self.highlight_base_size)
         base_layout.addWidget(base_label)
         base_layout.addWidget(self.base_size_combo)
         col2.addLayout(base_layout)
@@ -1043,13 +1015,13 @@ class DownAllocationApp(QMainWindow):
 
         # Row input - shows just the data rows count
         self.row_input = QLineEdit(str(self.default_data_rows))
-        self.row_input.setValidator(QIntValidator(1, 100))
+        self.row_input.setValidator(QIntValidator(1, 10000))
         self.row_input.setFixedWidth(60)
         self.row_input.setAlignment(Qt.AlignmentFlag.AlignCenter)
 
         # Column input - shows just the size columns count (excluding first 2 columns)
         self.col_input = QLineEdit(str(self.default_cols - 2))
-        self.col_input.setValidator(QIntValidator(1, 50))
+        self.col_input.setValidator(QIntValidator(1, 500))
         self.col_input.setFixedWidth(60)
         self.col_input.setAlignment(Qt.AlignmentFlag.AlignCenter)
 
@@ -1107,16 +1079,53 @@ class DownAllocationApp(QMainWindow):
         row_col_layout.addWidget(self.reset_btn)
         table_layout.addWidget(self.row_col_frame)
 
-        # Create top table (renamed from self.top_table to self.top_table)
-        self.top_table = TableWidget(self.default_total_rows, self.default_cols)
+        # Similar styles from the library, shown once a few areas are typed
+        self.suggestion_frame = QFrame()
+        suggestion_layout = QHBoxLayout(self.suggestion_frame)
+        suggestion_layout.setContentsMargins(0, 0, 0, 0)
+        self.suggestion_combo = QComboBox()
+        self.suggestion_combo.setSizeAdjustPolicy(QComboBox.SizeAdjustPolicy.AdjustToContents)
+        prefill_btn = QPushButton("PREFILL PANELS | SIZES")
+        prefill_btn.clicked.connect(self.prefill_from_suggestion)
+        dismiss_btn = QPushButton("DISMISS")
+        dismiss_btn.clicked.connect(self.suggestion_frame.hide)
+        suggestion_label = QLabel("SIMILAR STYLES:")
+        suggestion_label.setToolTip(
+            "Library styles whose panel areas are in the closest proportions to the\n"
+            "first panels typed in one size column, the base size if it has as many")
+        suggestion_layout.addWidget(suggestion_label)
+        suggestion_layout.addWidget(self.suggestion_combo)
+        suggestion_layout.addWidget(prefill_btn)
+        suggestion_layout.addWidget(dismiss_btn)
+        suggestion_layout.addStretch()
+        self.suggestion_frame.hide()
+        table_layout.addWidget(self.suggestion_frame)
+
+        self.suggestion_timer = QTimer(self)
+        self.suggestion_timer.setSingleShot(True)
+        self.suggestion_timer.setInterval(self.suggestion_delay_ms)
+        self.suggestion_timer.timeout.connect(self.suggest_similar_styles)
+
+        # Create top table, backed by the typed sewing area model
+        self.startup_step("Setting up tables...")
+        self.top_model = SewingAreaModel(self.default_data_rows, self.default_cols - 2, self)
+        self.top_table = TableWidget(self.top_model)
         self.top_table.setFont(QFont("Courier New", self.top_table_font_size))
         self.setup_table()  # This will setup the top table
+        # Later resets reach the engine through on_sheet_reset()
+        self.allocation.load(self.top_model.quantities, self.top_model.areas, None)
         table_layout.addWidget(self.top_table)
 
-        # Add bottom table
-        self.bottom_table = QTableWidget()
+        # Add bottom table, a filtered view of the weights derived from the top table
+        self.bottom_model = WeightDistributionModel(self.top_model, self.allocation, self)
+        self.bottom_proxy = VisibleRowsProxy(self)
+        self.bottom_proxy.setSourceModel(self.bottom_model)
+        self.bottom_table = QTableView()
+        self.bottom_table.setModel(self.bottom_proxy)
+        self.bottom_table.setItemDelegate(CellDelegate(self.bottom_table))
         self.bottom_table.setFont(QFont("Courier New", self.top_table_font_size))
         self.setup_bottom_table()
+        self.schedule_recalculation()
 
          # Hide in production (PyInstaller)
         if getattr(sys, 'frozen', False):
@@ -1126,6 +1135,7 @@ class DownAllocationApp(QMainWindow):
         main_layout.addWidget(table_container)
 
         # Set modern style
+        self.startup_step("Applying style...")
         fusion_style = QStyleFactory.create("Fusion")
         if fusion_style:
             self.setStyle(fusion_style)
@@ -1148,8 +1158,31 @@ class DownAllocationApp(QMainWindow):
         palette.setColor(QPalette.ColorRole.HighlightedText, QColor(0, 0, 0))
         self.setPalette(palette)
 
+    def create_file_menu(self):
+        file_menu = self.menuBar().addMenu("&File")
+        for text, shortcut, slot in (
+                ("&Open...", QKeySequence.StandardKey.Open, self.open_project_file),
+                ("&Save", QKeySequence.StandardKey.Save, self.save_project_file),
+                ("Save &As...", QKeySequence.StandardKey.SaveAs, self.save_project_file_as)):
+            action = QAction(text, self)
+            action.setShortcut(shortcut)
+            action.triggered.connect(slot)
+            file_menu.addAction(action)
+
+        file_menu.addSeparator()
+        for text, shortcut, slot in (
+                ("Open from &Library...", "Ctrl+L", self.open_from_library),
+                ("Save to Li&brary", "Ctrl+B", self.save_to_library)):
+            action = QAction(text, self)
+            action.setShortcut(QKeySequence(shortcut))
+            action.triggered.connect(slot)
+            file_menu.addAction(action)
+
     def connect_change_trackers(self):
         """Connect all input fields to track changes"""
+        if self.instrumentation is not None:
+            self.watch_user_actions()
+
         # Form fields
         self.date_input.dateChanged.connect(self.enable_reset_button)
         self.buyer_input.textChanged.connect(self.enable_reset_button)
@@ -1161,99 +1194,51 @@ class DownAllocationApp(QMainWindow):
         self.approx_weight_input.textChanged.connect(self.enable_reset_button)
         self.base_size_combo.currentTextChanged.connect(self.enable_reset_button)
         
-        # Connect signals for real-time updates
-        self.top_table.itemChanged.connect(self.update_bottom_table)
-        self.ecodown_input.textChanged.connect(self.update_bottom_table)
-        self.garment_weight_input.textChanged.connect(self.update_bottom_table)
-        self.base_size_combo.currentTextChanged.connect(self.update_bottom_table)
+        # Connect signals for real-time updates, exactly once per table
+        self.top_model.cellEdited.connect(self.update_table)
+        self.top_model.blockEdited.connect(self.on_block_edited)
+        self.top_model.duplicateSizes.connect(self.warn_duplicate_sizes)
+        self.top_model.modelReset.connect(self.on_sheet_reset)
+        self.ecodown_input.textChanged.connect(self.on_weight_input_changed)
+        self.garment_weight_input.textChanged.connect(self.on_weight_input_changed)
+        self.base_size_combo.currentTextChanged.connect(
+            lambda: self.schedule_recalculation())
+        self.top_model.cellEdited.connect(
+            lambda row, col, old_text: self.schedule_suggestions(row, col, row, col))
+        self.top_model.blockEdited.connect(self.schedule_suggestions)
+        self.top_model.modelReset.connect(self.suggestion_frame.hide)
+
+    def stall_context(self):
+        """What the stall watchdog logs besides the stack, read from its own thread"""
+        context = {"grid": f"{self.top_model.n_panels} panels x {self.top_model.n_sizes} sizes"}
+        if self.instrumentation is not None:
+            context["action"] = self.instrumentation.current.label
+        return context
+
+    def watch_user_actions(self):
+        """Start an instrumentation action on input changes, before the slots doing the work"""
+        start_action = self.instrumentation.start_action
+        self.base_size_combo.currentTextChanged.connect(
+            lambda text: start_action(f"Base size {text or '-'}"))
+        self.ecodown_input.textChanged.connect(lambda: start_action("Ecodown weight"))
+        self.garment_weight_input.textChanged.connect(lambda: start_action("Garment weight"))
+        self.statusBar().addWidget(InstrumentationOverlay(self.instrumentation, self), 1)
 
     def enable_reset_button(self):
         """Enable the reset button when called"""
         self.reset_btn.setEnabled(True)
 
     def setup_table(self):
-        # Calculate total rows needed (headers + data + total)
-        total_rows = 2 + self.default_data_rows + 1
-
-        # Set table dimensions
-        self.top_table.setRowCount(total_rows)
-        self.top_table.setColumnCount(self.default_cols)
-
-        # Change all self.top_table references to self.top_table
-        for row in range(self.top_table.rowCount()):
-            for col in range(self.top_table.columnCount()):
-                if self.top_table.columnSpan(row, col) > 1 or self.top_table.rowSpan(row, col) > 1:
-                    self.top_table.setSpan(row, col, 1, 1)
+        # Give the model its new dimensions; every cell starts empty
+        self.top_model.reset_shape(self.default_data_rows, self.default_cols - 2)
+        total_rows = self.top_model.rowCount()
 
         # Set up header merges
+        self.top_table.clearSpans()
         self.top_table.setSpan(0, 0, 2, 1)  # PANEL NAME (span 2 rows)
         self.top_table.setSpan(0, 1, 2, 1)  # PANEL QUANTITY (span 2 rows)
         self.top_table.setSpan(0, 2, 1, self.default_cols - 2)  # SIZE header span
-
-        # Create and set header items
-        headers = [
-            ("PANEL NAME", 0, 0),
-            ("PANEL QUANTITY", 0, 1),
-            ("SIZE || PANEL SEWING AREA", 0, 2)
-        ]
-
-        for text, row, col in headers:
-            item = QTableWidgetItem(text)
-            item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            item.setFont(
-                QFont("Courier New", self.top_table_font_size, QFont.Weight.Bold))
-            # Make completely non-interactive
-            item.setFlags(Qt.ItemFlag.NoItemFlags)
-            self.top_table.setItem(row, col, item)
-
-        # Set size headers in row 1 (below merged SIZE header)
-        for col in range(2, self.default_cols):
-            item = QTableWidgetItem()
-            item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            item.setFont(QFont("Courier New", self.top_table_font_size))
-            item.setToolTip("Enter size name like XS, S, M, L")
-            # Make size headers fully editable
-            item.setFlags(Qt.ItemFlag.ItemIsEnabled |
-                          Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsEditable)
-            self.top_table.setItem(1, col, item)
-            self.top_table.itemChanged.connect(self.format_size_headers)
-
-        # Set up data rows (from row 2 to second-to-last row)
-        for row in range(2, total_rows - 1):
-            # Panel Name column
-            name_item = QTableWidgetItem()
-            name_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            self.top_table.setItem(row, 0, name_item)
-
-            # Panel Quantity column
-            qty_item = QTableWidgetItem()
-            qty_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            self.top_table.setItem(row, 1, qty_item)
-
-            # Sewing area columns
-            for col in range(2, self.default_cols):
-                area_item = QTableWidgetItem()
-                area_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-                self.top_table.setItem(row, col, area_item)
-
-        # Set up TOTAL row
-        total_item = QTableWidgetItem("TOTAL")
-        total_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-        total_item.setFont(
-            QFont("Courier New", self.top_table_font_size, QFont.Weight.Bold))
-        total_item.setFlags(Qt.ItemFlag.ItemIsEnabled |
-                            Qt.ItemFlag.ItemIsSelectable)  # Not editable
-        self.top_table.setItem(total_rows - 1, 0, total_item)
-        self.top_table.setSpan(total_rows - 1, 0, 1, 2)
-
-        for col in range(2, self.default_cols):
-            total_cell = QTableWidgetItem("0.00")
-            total_cell.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            total_cell.setFont(
-                QFont("Courier New", self.top_table_font_size, QFont.Weight.Bold))
-            total_cell.setFlags(Qt.ItemFlag.ItemIsEnabled |
-                                Qt.ItemFlag.ItemIsSelectable)  # Not editable
-            self.top_table.setItem(total_rows - 1, col, total_cell)
+        self.top_table.setSpan(total_rows - 1, 0, 1, 2)  # TOTAL label
 
         # Configure table appearance
         self.top_table.horizontalHeader().setVisible(False)
@@ -1266,64 +1251,14 @@ class DownAllocationApp(QMainWindow):
         for col in range(2, self.default_cols):
             self.top_table.setColumnWidth(col, self.sewing_area_col_width)
 
-        # Set up item delegates for validation and formatting
-        self.top_table.setItemDelegate(UpperCaseItemDelegate(self.top_table))  # First for real-time uppercase
-        self.top_table.setItemDelegate(TableItemDelegate(self.top_table))      # Second for validation
-
-        # Connect signals
-        self.top_table.itemChanged.connect(self.update_table)
-        self.top_table.itemChanged.connect(self.format_table_text)
-
         # Update base size dropdown
         self.update_base_size_dropdown()
-        
-    def setup_bottom_table(self):
-        # Calculate rows needed (2 header rows + 2 rows per data row + 2 total rows)
-        data_rows = self.default_data_rows
-        total_rows = 2 + (2 * data_rows) + 2  # Headers + data + totals
-        # Columns match top table but with extra "WEIGHT" column
-        total_cols = self.default_cols + 1
-        self.bottom_table.setRowCount(total_rows)
-        self.bottom_table.setColumnCount(total_cols)
-
-        # Clear all spans first
-        for row in range(self.bottom_table.rowCount()):
-            for col in range(self.bottom_table.columnCount()):
-                if self.bottom_table.columnSpan(row, col) > 1 or self.bottom_table.rowSpan(row, col) > 1:
-                    self.bottom_table.setSpan(row, col, 1, 1)
 
-        # Set up header merges (rows 0-1 are headers)
-        self.bottom_table.setSpan(0, 0, 2, 1)  # PANEL NAME (span 2 rows)
-        self.bottom_table.setSpan(0, 1, 2, 1)  # PANEL QTY (span 2 rows)
-        self.bottom_table.setSpan(0, 2, 2, 1)  # WEIGHT (span 2 rows)
-        self.bottom_table.setSpan(0, 3, 1, total_cols - 3)  # SIZE header span
-
-        # Create and set header items
-        headers = [
-            ("PANEL NAME", 0, 0),
-            ("PANEL QTY", 0, 1),
-            ("WEIGHT", 0, 2),
-            ("SIZE || WEIGHT DISTRIBUTION", 0, 3)
-        ]
-        for text, row, col in headers:
-            item = QTableWidgetItem(text)
-            item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            item.setFont(QFont("Courier New", self.table_font_size, QFont.Weight.Bold))
-            item.setFlags(Qt.ItemFlag.NoItemFlags)
-            self.bottom_table.setItem(row, col, item)
-
-        # Set size headers in row 1 (below merged SIZE header)
-        for col in range(3, total_cols):
-            item = QTableWidgetItem()
-            # Copy size names from top table
-            if (col - 3) < (self.top_table.columnCount() - 2):
-                size_item = self.top_table.item(1, col - 1)  # Adjust for extra column
-                if size_item:
-                    item.setText(size_item.text())
-            item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            item.setFont(QFont("Courier New", self.table_font_size))
-            item.setFlags(Qt.ItemFlag.NoItemFlags)
-            self.bottom_table.setItem(1, col, item)
+    def setup_bottom_table(self):
+        # The bottom model derives its shape from the top model, nothing is copied
+        self.bottom_model.refresh_layout()
+        self.bottom_proxy.refresh_filter()
+        self._bottom_visibility = None
 
         # Configure table appearance
         self.bottom_table.horizontalHeader().setVisible(False)
@@ -1335,7 +1270,7 @@ class DownAllocationApp(QMainWindow):
         self.bottom_table.setColumnWidth(0, self.panel_name_col_width)
         self.bottom_table.setColumnWidth(1, self.panel_qty_col_width)
 
-        # Set initial width for weight column based on text length
+        # Set width for weight column based on text length
         font_metrics = self.bottom_table.fontMetrics()
         weight_col_width = max(
             font_metrics.horizontalAdvance("DOWN WEIGHT"),
@@ -1343,339 +1278,73 @@ class DownAllocationApp(QMainWindow):
         ) + 20  # Add padding
         self.bottom_table.setColumnWidth(2, weight_col_width)
 
-        for col in range(3, total_cols):
+        for col in range(3, self.bottom_model.columnCount()):
             self.bottom_table.setColumnWidth(col, self.sewing_area_col_width)
 
-        # Initialize data rows (starting from row 2)
-        self.update_bottom_table()
-
-
-    def update_bottom_table(self):
-        if not hasattr(self, 'bottom_table') or not self.bottom_table:
-            return
-
-        # Prevent recursion during updates
-        if getattr(self, '_updating_bottom_table', False):
-            return
-
-        self._updating_bottom_table = True
-
-        try:
-            # Get input weights
-            try:
-                ecodown_weight = float(self.ecodown_input.text()) if self.ecodown_input.text() else 0.0
-            except:
-                ecodown_weight = 0.0
-            try:
-                garment_weight = float(self.garment_weight_input.text()) if self.garment_weight_input.text() else 0.0
-            except:
-                garment_weight = 0.0
-
-            # Get base size column from top table
-            base_size = self.base_size_combo.currentText()
-            base_col_top = None
-            if base_size:
-                for col in range(2, self.top_table.columnCount()):
-                    item = self.top_table.item(1, col)
-                    if item and item.text().strip() == base_size:
-                        base_col_top = col
-                        break
+        self.apply_bottom_spans()
 
-            # Calculate total sewing area for base size
-            total_base_area = 0.0
-            if base_col_top is not None:
-                for row in range(2, self.top_table.rowCount() - 1):
-                    qty_item = self.top_table.item(row, 1)
-                    area_item = self.top_table.item(row, base_col_top)
-                    try:
-                        qty = int(qty_item.text()) if qty_item and qty_item.text().isdigit() else 1
-                        area = float(area_item.text()) if area_item and area_item.text() else 0.0
-                        total_base_area += qty * area
-                    except:
-                        continue
-
-            # Clear previous highlights in bottom_table only
-            for row in range(self.bottom_table.rowCount()):
-                for col in range(3, self.bottom_table.columnCount()):  # Skip first 3 cols
-                    item = self.bottom_table.item(row, col)
-                    if item:
-                        font = item.font()
-                        font.setBold(False)
-                        item.setFont(font)
-                        item.setForeground(QColor(0, 0, 0))  # Reset to black
-
-            # Update each panel's data (starting from row 2 in bottom table)
-            for top_row in range(2, self.top_table.rowCount() - 1):
-                bottom_row = 2 + ((top_row - 2) * 2)
+    def apply_bottom_spans(self):
+        """Merge the header, panel and total cells of the rows that are shown"""
+        self.bottom_table.clearSpans()
+        n_sizes = self.bottom_model.columnCount() - 3
 
+        # Set up header merges (rows 0-1 are headers)
+        self.bottom_table.setSpan(0, 0, 2, 1)  # PANEL NAME (span 2 rows)
+        self.bottom_table.setSpan(0, 1, 2, 1)  # PANEL QTY (span 2 rows)
+        self.bottom_table.setSpan(0, 2, 2, 1)  # WEIGHT (span 2 rows)
+        if n_sizes > 1:
+            self.bottom_table.setSpan(0, 3, 1, n_sizes)  # SIZE header span
+
+        # Spans are set on proxy rows, hidden panels have no row to merge
+        total_row = self.bottom_model.total_row()
+        for proxy_row in range(2, self.bottom_proxy.rowCount()):
+            source_row = self.bottom_proxy.mapToSource(
+                self.bottom_proxy.index(proxy_row, 0)).row()
+            if source_row >= total_row:
+                self.bottom_table.setSpan(proxy_row, 0, 1, 3)
+            elif source_row % 2 == 0 and self.bottom_model.garment_weight > 0:
                 # Panel name and quantity (merged across 2 rows)
-                name_item = self.top_table.item(top_row, 0)
-                qty_item = self.top_table.item(top_row, 1)
-
-                # Check if panel quantity is valid
-                try:
-                    panel_qty = int(qty_item.text()) if qty_item and qty_item.text().isdigit() else 0
-                except:
-                    panel_qty = 0
-
-                is_valid_panel = panel_qty > 0
-                show_garment_label = is_valid_panel and garment_weight > 0
-
-                # Set panel name
-                name_cell = self.bottom_table.item(bottom_row, 0)
-                if not name_cell:
-                    name_cell = QTableWidgetItem()
-                    name_cell.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-                    name_cell.setFlags(Qt.ItemFlag.NoItemFlags)
-                    self.bottom_table.setItem(bottom_row, 0, name_cell)
-                name_cell.setText(name_item.text() if name_item and is_valid_panel else "")
-                self.bottom_table.setSpan(bottom_row, 0, 2, 1)
-                self.bottom_table.setRowHidden(bottom_row, not is_valid_panel)
-                self.bottom_table.setRowHidden(bottom_row + 1, not show_garment_label)
-
-                # Set panel quantity with "1X" prefix
-                qty_cell = self.bottom_table.item(bottom_row, 1)
-                if not qty_cell:
-                    qty_cell = QTableWidgetItem()
-                    qty_cell.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-                    qty_cell.setFlags(Qt.ItemFlag.NoItemFlags)
-                    self.bottom_table.setItem(bottom_row, 1, qty_cell)
-                try:
-                    qty_value = int(qty_item.text()) if qty_item and qty_item.text().isdigit() else 0
-                except:
-                    qty_value = 0
-                qty_cell.setText(f"1X{qty_value}" if qty_value > 0 else "")
-                self.bottom_table.setSpan(bottom_row, 1, 2, 1)
-
-                # Set weight labels explicitly
-                down_label_cell = self.bottom_table.item(bottom_row, 2)
-                if not down_label_cell:
-                    down_label_cell = QTableWidgetItem("DOWN WEIGHT")
-                    down_label_cell.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-                    down_label_cell.setFlags(Qt.ItemFlag.NoItemFlags)
-                    self.bottom_table.setItem(bottom_row, 2, down_label_cell)
-                else:
-                    down_label_cell.setText("DOWN WEIGHT" if is_valid_panel else "")
-
-                garment_label_cell = self.bottom_table.item(bottom_row + 1, 2)
-                if not garment_label_cell:
-                    garment_label_cell = QTableWidgetItem("GARMENTS WEIGHT")
-                    garment_label_cell.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-                    garment_label_cell.setFlags(Qt.ItemFlag.NoItemFlags)
-                    self.bottom_table.setItem(bottom_row + 1, 2, garment_label_cell)
-                else:
-                    garment_label_cell.setText("GARMENTS WEIGHT" if show_garment_label else "")
-
-                # Skip further processing if panel is invalid
-                if not is_valid_panel:
-                    for col in range(3, self.bottom_table.columnCount()):
-                        down_cell = self.bottom_table.item(bottom_row, col)
-                        if not down_cell:
-                            down_cell = QTableWidgetItem()
-                            down_cell.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-                            down_cell.setFlags(Qt.ItemFlag.NoItemFlags)
-                            self.bottom_table.setItem(bottom_row, col, down_cell)
-                        down_cell.setText("")
-                        garment_cell = self.bottom_table.item(bottom_row + 1, col)
-                        if garment_cell:
-                            garment_cell.setText("")
-                    continue
-
-                # Calculate and set weights for each size
-                if base_col_top is not None and total_base_area > 0:
-                    base_area_item = self.top_table.item(top_row, base_col_top)
-                    try:
-                        base_area = float(base_area_item.text()) if base_area_item and base_area_item.text() else 0.0
-                        base_sewing_area = panel_qty * base_area
-                    except:
-                        base_sewing_area = 0.0
-
-                    for col in range(3, self.bottom_table.columnCount()):
-                        top_col = col - 1
-                        if top_col >= self.top_table.columnCount():
-                            continue
-
-                        area_item = self.top_table.item(top_row, top_col)
-                        try:
-                            size_area = float(area_item.text()) if area_item and area_item.text() else 0.0
-                            sewing_area = panel_qty * size_area
-                        except:
-                            sewing_area = 0.0
-
-                        if base_sewing_area > 0:
-                            # Distribute based on panel quantity
-                            down_weight_val = (ecodown_weight / total_base_area) * sewing_area
-                            garment_weight_val = (garment_weight / total_base_area) * sewing_area
-
-                            # Distribute per panel
-                            if panel_qty > 0:
-                                down_weight_val /= panel_qty
-                                garment_weight_val /= panel_qty
-                        else:
-                            down_weight_val = 0.0
-                            garment_weight_val = 0.0
-
-                        # Down weight row
-                        down_cell = self.bottom_table.item(bottom_row, col)
-                        if not down_cell:
-                            down_cell = QTableWidgetItem()
-                            down_cell.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-                            down_cell.setFlags(Qt.ItemFlag.NoItemFlags)
-                            self.bottom_table.setItem(bottom_row, col, down_cell)
-                        down_cell.setText(f"{down_weight_val:.2f}" if down_weight_val != 0 else "")
-
-                        # Garment weight row
-                        garment_cell = self.bottom_table.item(bottom_row + 1, col)
-                        if garment_weight > 0:
-                            if not garment_cell:
-                                garment_cell = QTableWidgetItem()
-                                garment_cell.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-                                garment_cell.setFlags(Qt.ItemFlag.NoItemFlags)
-                                self.bottom_table.setItem(bottom_row + 1, col, garment_cell)
-                            garment_cell.setText(f"{garment_weight_val:.2f}" if garment_weight_val != 0 else "")
-                        else:
-                            if garment_cell:
-                                garment_cell.setText("")
-
-                        # Apply bold and blue highlight to this column in bottom_table only
-                        if base_col_top is not None and top_col == base_col_top:
-                            font = down_cell.font()
-                            font.setBold(True)
-                            down_cell.setFont(font)
-                            down_cell.setForeground(QColor(0, 0, 255))  # Blue
-                            if garment_cell:
-                                g_font = garment_cell.font()
-                                g_font.setBold(True)
-                                garment_cell.setFont(g_font)
-                                garment_cell.setForeground(QColor(0, 0, 255))
-                else:
-                    # No valid base size - clear all values
-                    for col in range(3, self.bottom_table.columnCount()):
-                        down_cell = self.bottom_table.item(bottom_row, col)
-                        if not down_cell:
-                            down_cell = QTableWidgetItem()
-                            down_cell.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-                            down_cell.setFlags(Qt.ItemFlag.NoItemFlags)
-                            self.bottom_table.setItem(bottom_row, col, down_cell)
-                        down_cell.setText("")
-                        garment_cell = self.bottom_table.item(bottom_row + 1, col)
-                        if garment_cell:
-                            garment_cell.setText("")
-
-            # Auto-resize weight column to fit content
-            self.bottom_table.resizeColumnToContents(2)
-            font_metrics = self.bottom_table.fontMetrics()
-            min_width = max(
-                font_metrics.horizontalAdvance("DOWN WEIGHT"),
-                font_metrics.horizontalAdvance("GARMENTS WEIGHT")
-            ) + 20
-            if self.bottom_table.columnWidth(2) < min_width:
-                self.bottom_table.setColumnWidth(2, min_width)
-
-            # Ensure all cells are centered
-            for row in range(self.bottom_table.rowCount()):
-                for col in range(self.bottom_table.columnCount()):
-                    item = self.bottom_table.item(row, col)
-                    if item:
-                        item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-
-            # Update totals
-            self.update_bottom_totals()
-
-        finally:
-            self._updating_bottom_table = False  # Always reset the flag
-        
-
-    def update_bottom_totals(self):
-        if not hasattr(self, 'bottom_table') or not self.bottom_table:
-            return
-
-        total_rows = self.bottom_table.rowCount()
-        total_cols = self.bottom_table.columnCount()
-
-        down_totals = [0.0] * (total_cols - 3)
-        garment_totals = [0.0] * (total_cols - 3)
+                self.bottom_table.setSpan(proxy_row, 0, 2, 1)
+                self.bottom_table.setSpan(proxy_row, 1, 2, 1)
 
-        for row in range(2, total_rows - 2, 2):  # Skip header and total rows
-            qty_item = self.bottom_table.item(row, 1)
-            try:
-                qty = int(qty_item.text().replace("1X", "")) if qty_item and qty_item.text().startswith("1X") else 1
-            except:
-                qty = 1
+    def read_weight_input(self, line_edit):
+        try:
+            return float(line_edit.text()) if line_edit.text() else 0.0
+        except ValueError:
+            return 0.0
+
+    def find_base_size(self):
+        """Index of the selected base size among the size columns, or None"""
+        base_text = self.base_size_combo.currentText()
+        if base_text and base_text in self.top_model.size_names:
+            return self.top_model.size_names.index(base_text)
+        return None
 
-            for i, col in enumerate(range(3, total_cols)):
-                down_cell = self.bottom_table.item(row, col)
-                try:
-                    down_val = float(down_cell.text()) if down_cell and down_cell.text() else 0.0
-                    down_totals[i] += down_val * qty
-                except:
-                    pass
-
-                garment_row = row + 1
-                if not self.bottom_table.isRowHidden(garment_row):
-                    garment_cell = self.bottom_table.item(garment_row, col)
-                    try:
-                        g_val = float(garment_cell.text()) if garment_cell and garment_cell.text() else 0.0
-                        garment_totals[i] += g_val * qty
-                    except:
-                        pass
-
-        # TOTAL DOWN WEIGHT row
-        total_row = total_rows - 2
-        self.bottom_table.setSpan(total_row, 0, 1, 3)
-        self.bottom_table.setRowHidden(total_row, False)
-        label_item = QTableWidgetItem("TOTAL DOWN WEIGHT")
-        label_item.setFlags(Qt.ItemFlag.NoItemFlags)
-        label_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-        label_item.setFont(QFont("Courier New", self.table_font_size, QFont.Weight.Bold))
-        self.bottom_table.setItem(total_row, 0, label_item)
-
-        for i, col in enumerate(range(3, total_cols)):
-            item = QTableWidgetItem(f"{round(down_totals[i]):.0f}")  # Rounded
-            item.setFlags(Qt.ItemFlag.NoItemFlags)
-            item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            self.bottom_table.setItem(total_row, col, item)
-
-        # GARMENT TOTAL row
-        total_row = total_rows - 1
-        self.bottom_table.setSpan(total_row, 0, 1, 3)
-        show_garments_total = float(self.garment_weight_input.text() or 0) > 0
-        self.bottom_table.setRowHidden(total_row, not show_garments_total)
-
-        if show_garments_total:
-            label_item = QTableWidgetItem("TOTAL GARMENT WEIGHT")
-            label_item.setFlags(Qt.ItemFlag.NoItemFlags)
-            label_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            label_item.setFont(QFont("Courier New", self.table_font_size, QFont.Weight.Bold))
-            self.bottom_table.setItem(total_row, 0, label_item)
-
-            for i, col in enumerate(range(3, total_cols)):
-                item = QTableWidgetItem(f"{round(garment_totals[i]):.0f}")  # Rounded
-                item.setFlags(Qt.ItemFlag.NoItemFlags)
-                item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-                self.bottom_table.setItem(total_row, col, item)
-
-
-    def format_table_text(self, item):
-        # Only convert for Panel Name (column 0) and Size Name (row 1, columns ≥2)
-        if (item.column() == 0 and item.row() >= 2) or (item.row() == 1 and item.column() >= 2):
-            text = item.text()
-            if text and not text.isupper():
-                self.top_table.blockSignals(True)
-                item.setText(text.upper())
-                self.top_table.blockSignals(False)
-                if item.row() == 1:  # If size header changed
-                    self.update_base_size_dropdown()
-
-    def format_size_headers(self, item):
-        if item.row() == 1 and item.column() >= 2:  # Only for size headers
-            text = item.text()
-            if text:
-                # Block signals to prevent recursive calls
-                self.top_table.blockSignals(True)
-                item.setText(text.upper())
-                self.top_table.blockSignals(False)
-                self.update_base_size_dropdown()  # Update dropdown if sizes changed
+    def update_bottom_table(self):
+        """Every weight may have changed, re-read the inputs and the base size"""
+        base_size = self.find_base_size()
+        if base_size != self.allocation.base_size and not self._reload_pending:
+            if self.allocation.is_cached(base_size) or not self.is_large_sheet():
+                self.recalc_worker.cancel()
+                self.allocation.set_base_size(base_size)
+            elif not (self.recalc_worker.is_busy() and base_size == self._pending_base_size):
+                self.start_base_size_switch(base_size)
+
+        garment_weight = self.garment_weight
+        self.bottom_model.set_weights(self.ecodown_weight, garment_weight)
+
+        # Only re-filter when a quantity or the garment weight hid or showed rows
+        visibility = (garment_weight > 0, np.flatnonzero(self.top_model.quantities).tobytes())
+        if visibility != self._bottom_visibility:
+            self._bottom_visibility = visibility
+            self.bottom_proxy.refresh_filter()
+            self.apply_bottom_spans()
+
+        self.bottom_model.refresh()
+
+    def update_bottom_columns(self, sizes):
+        """Refresh only the given size columns of the bottom table"""
+        self.bottom_model.refresh_sizes(sizes)
 
     def set_table_dimensions(self):
         try:
@@ -1685,34 +1354,9 @@ class DownAllocationApp(QMainWindow):
             if new_data_rows < 1 or new_size_cols < 1:
                 return
 
-            # Show progress dialog
-            progress = ProgressDialog(
-                "Resizing Table", "Preparing table adjustment...", self)
-            progress.show()
-            QApplication.processEvents()
-            progress.update_progress(5)
-
-            # Save existing data
-            saved_data = self.save_table_data()
-            progress.update_progress(20)
-
-            # Update dimensions
-            self.default_data_rows = new_data_rows
-            self.default_cols = new_size_cols + 2
-
-            # Rebuild both tables
-            self.setup_table()
-            self.setup_bottom_table()
-            progress.update_progress(80)
-
-            # Restore data
-            self.restore_table_data(saved_data)
-            progress.update_progress(95)
-
-            # Update calculations
-            self.calculate_totals()
-            self.update_bottom_table()
-            progress.update_progress(100)
+            # Grow or shrink in place, cells outside the new size are dropped
+            with self.progress_dialog.operation("Resizing Table", "Adjusting table size...", 2):
+                self.resize_sheet(new_data_rows, new_size_cols, self.progress_dialog)
 
         except ValueError as e:
             QMessageBox.warning(self, "Input Error",
@@ -1720,135 +1364,140 @@ class DownAllocationApp(QMainWindow):
         except Exception as e:
             QMessageBox.critical(self, "Error", f"An error occurred: {str(e)}")
 
-    def save_table_data(self):
-        """Save all table data before expansion"""
-        saved_data = {
-            'size_names': [],
-            'panel_names': [],
-            'panel_qtys': [],
-            'sewing_areas': []
-        }
+    def resize_sheet(self, n_panels, n_sizes, progress=None):
+        """Give both tables new dimensions, adding or removing rows and columns at the end.
+
+        progress is advanced once for the rows and once for the columns.
+        """
+        model = self.top_model
+        with self.recalc_scheduler.suspended():
+            if n_panels > model.n_panels:
+                self.insert_panels(model.n_panels, n_panels - model.n_panels)
+            elif n_panels < model.n_panels:
+                self.remove_panels(n_panels, model.n_panels - n_panels)
+            if progress is not None:
+                progress.advance()
+            if n_sizes > model.n_sizes:
+                self.insert_sizes(model.n_sizes, n_sizes - model.n_sizes)
+            elif n_sizes < model.n_sizes:
+                self.remove_sizes(n_sizes, model.n_sizes - n_sizes)
+            if progress is not None:
+                progress.advance()
+
+        self.default_data_rows = n_panels
+        self.default_cols = n_sizes + 2
+        self.row_input.setText(str(n_panels))
+        self.col_input.setText(str(n_sizes))
+
+    # The engine is told first, removals still need to read the cells that go
+    def insert_panels(self, position, count):
+        self.autosave_record("insert_panels", position, count)
+        self.allocation.insert_panels(position, count)
+        self.top_model.insert_panels(position, count)
+        self.allocation.attach(self.top_model.quantities, self.top_model.areas)
+        self.bottom_model.insert_panels(position, count)
+        self.restart_background_recalc()
+        self.schedule_recalculation()
+
+    def remove_panels(self, position, count):
+        self.autosave_record("remove_panels", position, count)
+        self.allocation.remove_panels(position, count)
+        self.top_model.remove_panels(position, count)
+        self.allocation.attach(self.top_model.quantities, self.top_model.areas)
+        self.bottom_model.remove_panels(position, count)
+        self.restart_background_recalc()
+        self.schedule_recalculation()
+
+    def insert_sizes(self, position, count):
+        self.autosave_record("insert_sizes", position, count)
+        self.allocation.insert_sizes(position, count)
+        self.top_model.insert_sizes(position, count)
+        self.allocation.attach(self.top_model.quantities, self.top_model.areas)
+        self.bottom_model.insert_sizes(position, count)
+
+        # Only the new columns need a width
+        for size in range(position, position + count):
+            self.top_table.setColumnWidth(size + 2, self.sewing_area_col_width)
+            self.bottom_table.setColumnWidth(size + 3, self.sewing_area_col_width)
+        self.update_size_header_spans()
+        self.restart_background_recalc()
+        self.schedule_recalculation()
+
+    def remove_sizes(self, position, count):
+        self.autosave_record("remove_sizes", position, count)
+        self.allocation.remove_sizes(position, count)
+        self.top_model.remove_sizes(position, count)
+        self.allocation.attach(self.top_model.quantities, self.top_model.areas)
+        self.bottom_model.remove_sizes(position, count)
+        self.update_size_header_spans()
+        self.update_base_size_dropdown()
+        self.restart_background_recalc()
+        self.schedule_recalculation()
 
-        # Save size names (row 1, columns 2+)
-        for col in range(2, self.top_table.columnCount()):
-            item = self.top_table.item(1, col)
-            saved_data['size_names'].append(item.text() if item else "")
-
-        # Save panel names and quantities (rows 2+)
-        for row in range(2, self.top_table.rowCount() - 1):  # Exclude TOTAL row
-            name_item = self.top_table.item(row, 0)
-            qty_item = self.top_table.item(row, 1)
-            saved_data['panel_names'].append(
-                name_item.text() if name_item else "")
-            saved_data['panel_qtys'].append(
-                qty_item.text() if qty_item else "")
-
-        # Save sewing area data (rows 2+, columns 2+)
-        for row in range(2, self.top_table.rowCount() - 1):
-            row_data = []
-            for col in range(2, self.top_table.columnCount()):
-                item = self.top_table.item(row, col)
-                row_data.append(item.text() if item else "")
-            saved_data['sewing_areas'].append(row_data)
-
-        return saved_data
-
-    def restore_table_data(self, saved_data):
-        """Restore table data after expansion"""
-        # Restore size names
-        for col in range(2, min(self.top_table.columnCount(), len(saved_data['size_names']) + 2)):
-            if col - 2 < len(saved_data['size_names']):
-                item = self.top_table.item(1, col)
-                if item:
-                    item.setText(saved_data['size_names'][col - 2])
-
-        # Restore panel names and quantities
-        for row in range(2, min(2 + self.default_data_rows, len(saved_data['panel_names']) + 2)):
-            if row - 2 < len(saved_data['panel_names']):
-                name_item = self.top_table.item(row, 0)
-                if name_item:
-                    name_item.setText(saved_data['panel_names'][row - 2])
-
-                qty_item = self.top_table.item(row, 1)
-                if qty_item:
-                    qty_item.setText(saved_data['panel_qtys'][row - 2])
-
-        # Restore sewing area data
-        for row in range(2, min(2 + self.default_data_rows, len(saved_data['sewing_areas']) + 2)):
-            if row - 2 < len(saved_data['sewing_areas']):
-                for col in range(2, min(self.top_table.columnCount(), len(saved_data['sewing_areas'][row - 2]) + 2)):
-                    if col - 2 < len(saved_data['sewing_areas'][row - 2]):
-                        item = self.top_table.item(row, col)
-                        if item:
-                            item.setText(saved_data['sewing_areas'][row - 2][col - 2])
-
-    def update_table(self, item):
-        # Save state for undo/redo
-        self.top_table.push_undo_state()
+    def update_size_header_spans(self):
+        """Stretch the SIZE headers of both tables over every size column"""
+        n_sizes = self.top_model.n_sizes
+        if n_sizes > 1:
+            self.top_table.setSpan(0, 2, 1, n_sizes)
+            self.bottom_table.setSpan(0, 3, 1, n_sizes)
 
+    def update_table(self, row, col, old_text):
         # Update base size dropdown when size names change
-        if item.row() == 1 and item.column() >= 2:
+        if row == 1 and col >= 2:
             self.update_base_size_dropdown()
-            self.setup_bottom_table()  # Rebuild bottom table when sizes change
+            self.update_bottom_size_header(col)
+            self.schedule_recalculation()
 
         # Check for duplicates
-        if item.row() == 1 and item.column() >= 2:
-            current_text = item.text().strip()
+        if row == 1 and col >= 2:
+            current_text = self.top_model.size_names[col - 2]
             if current_text:
-                for col in range(2, self.top_table.columnCount()):
-                    if col != item.column():
-                        other_item = self.top_table.item(1, col)
-                        if other_item and other_item.text().strip() == current_text:
-                            QMessageBox.warning(self, "Duplicate Size",
-                                                f"Size '{current_text}' already exists!")
-                            item.setText("")
-                            break
+                for size, other_text in enumerate(self.top_model.size_names):
+                    if size != col - 2 and other_text == current_text:
+                        QMessageBox.warning(self, "Duplicate Size",
+                                            f"Size '{current_text}' already exists!")
+                        self.top_model.set_cell_text(row, col, "")
+                        break
 
             # If user deleted a size that was selected as base size, reset selection
             current_base = self.base_size_combo.currentText()
             if current_base and current_base not in self.get_available_sizes():
                 self.base_size_combo.setCurrentIndex(0)
-                self.highlight_base_size("")
 
-        # Calculate totals when data changes
-        if (item.column() == 1 and item.row() >= 2) or (item.column() >= 2 and item.row() >= 2 and item.row() < self.top_table.rowCount() - 1):
-            self.calculate_totals()
-            self.update_bottom_table()  # Update bottom table when data changes
+        # Recalculate only what the edited cell affects
+        if self.top_model.is_data_row(row):
+            self.recalculate_cell(row, col, old_text)
 
-    def get_available_sizes(self):
-        return [self.top_table.item(1, col).text().strip()
-                for col in range(2, self.top_table.columnCount())
-                if self.top_table.item(1, col) and self.top_table.item(1, col).text().strip()]
+    def recalculate_cell(self, row, col, old_text):
+        """Tell the engine about one edited cell and refresh what it changed"""
+        panel = row - 2
+        if panel >= self.allocation.n_panels:
+            return
 
-    def highlight_base_size(self, size):
-        try:
-            # Clear previous highlights in bottom_table only
-            for row in range(self.bottom_table.rowCount()):
-                for col in range(3, self.bottom_table.columnCount()):  # Skip first 3 cols
-                    item = self.bottom_table.item(row, col)
-                    if item:
-                        font = item.font()
-                        font.setBold(False)
-                        item.setFont(font)
-                        item.setForeground(QColor(0, 0, 0))  # Black
-
-            # Highlight selected base size in bottom_table only
-            if size and str(size).strip():
-                size = str(size).strip()
-                for col in range(3, self.bottom_table.columnCount()):
-                    header_item = self.bottom_table.item(1, col)
-                    if header_item and header_item.text().strip() == size:
-                        # Apply bold + blue to entire column
-                        for row in range(2, self.bottom_table.rowCount()):
-                            item = self.bottom_table.item(row, col)
-                            if item:
-                                font = item.font()
-                                font.setBold(True)
-                                item.setFont(font)
-                                item.setForeground(QColor(0, 0, 255))  # Blue
-                        break
-        except Exception as e:
-            print(f"Error highlighting base size: {str(e)}")
+        if col == 0:
+            # Panel names never change a weight, only the bottom name cell
+            self.bottom_model.refresh_cell(self.bottom_model.panel_row(panel), 0)
+            return
+
+        # A background result computed before this edit is stale. A pending
+        # reload restarts from the new values, nothing to update incrementally.
+        if self.restart_background_recalc() and self._reload_pending:
+            return
+
+        # The model already holds the new value, the engine shares its arrays
+        if col == 1:
+            changed = self.allocation.quantity_changed(panel)
+        else:
+            changed = self.allocation.area_changed(col - 2, panel)
+
+        if changed is None:
+            # total_base_area or a quantity changed, every weight rescales
+            self.schedule_recalculation()
+        elif changed:
+            self.schedule_recalculation(changed)
+
+    def get_available_sizes(self):
+        return [size for size in self.top_model.size_names if size]
 
     def update_base_size_dropdown(self):
         try:
@@ -1857,11 +1506,9 @@ class DownAllocationApp(QMainWindow):
 
             sizes = []
             # Collect sizes in the order they appear in the table (left to right)
-            for col in range(2, self.top_table.columnCount()):
-                size_item = self.top_table.item(1, col)
-                if size_item and (size_text := size_item.text().strip()):
-                    if size_text not in sizes:  # Avoid duplicates while preserving order
-                        sizes.append(size_text)
+            for size_text in self.top_model.size_names:
+                if size_text and size_text not in sizes:  # Avoid duplicates while preserving order
+                    sizes.append(size_text)
 
             current_selection = self.base_size_combo.currentText()
             self.base_size_combo.clear()
@@ -1882,33 +1529,119 @@ class DownAllocationApp(QMainWindow):
             self.base_size_combo.blockSignals(False)
 
     def calculate_totals(self):
-        # Top table totals
-        for col in range(2, self.top_table.columnCount()):
-            total = 0.0
-            for row in range(2, self.top_table.rowCount() - 1):
-                # Get quantity value
-                qty_item = self.top_table.item(row, 1)
-                try:
-                    qty = int(qty_item.text()) if qty_item and qty_item.text().isdigit() and 1 <= int(qty_item.text()) <= 9 else 1
-                except:
-                    qty = 1
+        # Reload the whole top table into the engine, reading the model arrays in place
+        quantities, areas = self.top_model.quantities, self.top_model.areas
+        base_size = self.find_base_size()
+        if not self.is_large_sheet():
+            self.recalc_worker.cancel()
+            self.set_reload_pending(False)
+            self.allocation.load(quantities, areas, base_size)
+            self.schedule_recalculation()
+            return
 
-                # Get sewing area value
-                area_item = self.top_table.item(row, col)
-                try:
-                    area = float(area_item.text()) if area_item and area_item.text().replace(".", "", 1).isdigit() else 0.0
-                except:
-                    area = 0.0
+        # The old engine already reads the new values against its old sums, so
+        # the bottom table stays blank until the new engine is ready
+        self.set_reload_pending(True)
+        self._pending_base_size = None
+        self.recalc_worker.submit(
+            lambda cancelled: load_allocator(quantities, areas, base_size, cancelled),
+            self.on_allocation_loaded)
+
+    def set_reload_pending(self, pending):
+        self._reload_pending = pending
+        self.bottom_model.set_pending(pending)
+
+    def is_large_sheet(self):
+        return self.top_model.areas.size >= self.background_recalc_cells
+
+    def on_allocation_loaded(self, allocation):
+        """A background reload finished with no edit since, show its weights"""
+        allocation.cells_touched += self.allocation.cells_touched
+        self.allocation = allocation
+        self.bottom_model.allocation = allocation
+        self.set_reload_pending(False)
+        self.schedule_recalculation()
+
+    def start_base_size_switch(self, base_size):
+        """Allocate a large sheet from a new base size on the worker thread"""
+        quantities, areas = self.top_model.quantities, self.top_model.areas
+        self._pending_base_size = base_size
+        self.recalc_worker.submit(
+            lambda cancelled: base_allocation(quantities, areas, base_size, cancelled),
+            lambda allocation: self.on_base_size_allocated(base_size, allocation))
+
+    def on_base_size_allocated(self, base_size, allocation):
+        self._pending_base_size = None
+        self.allocation.set_base_size(base_size, allocation)
+        self.schedule_recalculation()
+
+    def restart_background_recalc(self):
+        """Drop a running background job after an edit, queueing it again.
+
+        Returns whether a job was running.
+        """
+        if not self.recalc_worker.is_busy():
+            return False
+        self.recalc_worker.cancel()
+        self._pending_base_size = None
+        if self._reload_pending:
+            self.calculate_totals()
+        else:
+            # update_bottom_table() starts the base size switch again
+            self.schedule_recalculation()
+        return True
+
+    def schedule_recalculation(self, sizes=None):
+        self.recalc_scheduler.schedule(sizes)
+
+    def on_weight_input_changed(self):
+        self.ecodown_weight = self.read_weight_input(self.ecodown_input)
+        self.garment_weight = self.read_weight_input(self.garment_weight_input)
+        self.schedule_input_recalculation()
+
+    def schedule_input_recalculation(self):
+        # Wait for the user to stop typing a weight before recomputing
+        self.recalc_scheduler.schedule(delay=self.input_debounce_ms)
+
+    def run_recalculation(self, sizes):
+        """Refresh the totals and the bottom table for the dirty sizes"""
+        self.update_top_totals(sizes)
+        if sizes is None:
+            self.update_bottom_table()
+        else:
+            self.update_bottom_columns(sizes)
 
-                total += qty * area
+    def update_bottom_size_header(self, col):
+        """Show a renamed size in the bottom header row"""
+        self.bottom_model.refresh_cell(1, col + 1)
 
-            # Update total cell
-            total_item = self.top_table.item(self.top_table.rowCount() - 1, col)
-            if total_item:
-                total_item.setText(f"{total:.2f}")
+    def on_block_edited(self, first_row, first_col, last_row, last_col):
+        """A paste or an undo wrote many cells at once, recompute them in one go"""
+        if self.top_table.pasting:
+            return  # The paste calls this once for the whole block when it is done
+        if first_row <= 1:
+            self.update_base_size_dropdown()
+        self.calculate_totals()
 
-        # Update bottom table
-        self.update_bottom_table()
+    def warn_duplicate_sizes(self, names):
+        """A paste brought size names that already exist, they were left empty"""
+        listed = "', '".join(dict.fromkeys(names))
+        QMessageBox.warning(self, "Duplicate Size", f"Size '{listed}' already exists!")
+
+    def on_sheet_reset(self):
+        """The top model replaced its arrays, point the engine and the bottom table at them"""
+        # The bottom table is laid out for the new shape at once, so load here
+        self.recalc_worker.cancel()
+        self.set_reload_pending(False)
+        self._pending_base_size = None
+        self.allocation.load(self.top_model.quantities, self.top_model.areas,
+                             self.find_base_size())
+        self.setup_bottom_table()
+        self.schedule_recalculation()
+
+    def update_top_totals(self, sizes=None):
+        """Show the engine column totals in the TOTAL row of the top table"""
+        self.top_model.set_totals(self.allocation.column_totals, sizes)
 
     def reset_table(self):
         confirm = ConfirmationDialog(
@@ -1920,91 +1653,324 @@ class DownAllocationApp(QMainWindow):
         result = confirm.exec()
         
         if result == QDialog.DialogCode.Accepted:
-            try:
-                # Show progress dialog
-                progress = ProgressDialog("Resetting Table", "Clearing table data...", self)
-                progress.show()
-                QApplication.processEvents()
-                progress.update_progress(10)
-
-                # Store factory info
-                factory_name = self.factory_name_label.text()
-                factory_location = self.factory_location_label.text()
-                progress.update_progress(20)
-
-                # Clear table
-                for row in range(self.top_table.rowCount()):
-                    for col in range(self.top_table.columnCount()):
-                        if row == 0:  # Skip headers
-                            continue
-                        item = self.top_table.item(row, col)
-                        if item:
-                            item.setText("")
-                    
-                    if row % 10 == 0:
-                        progress_val = 20 + 30 * row / self.top_table.rowCount()
-                        progress.update_progress(int(progress_val))
-                        QApplication.processEvents()
-
-                progress.update_progress(50)
-
-                # Reset dimensions
-                self.default_data_rows = 10
-                self.default_cols = 10
-                self.row_input.setText(str(self.default_data_rows))
-                self.col_input.setText(str(self.default_cols - 2))
-                progress.update_progress(60)
-
-                # Rebuild table
-                self.setup_table()
-                progress.update_progress(80)
-
-                # Reset form fields
-                self.date_input.setDate(QDate.currentDate())
-                self.season_combo.setCurrentIndex(0)
-                self.ecodown_input.clear()
-                self.buyer_input.clear()
-                self.garments_stage_combo.setCurrentIndex(0)
-                self.garment_weight_input.clear()
-                self.style_input.clear()
-                self.base_size_combo.clear()
-                self.approx_weight_input.clear()
-                progress.update_progress(90)
-
-                # Restore factory info
-                self.update_factory_display(factory_name, factory_location)
-                progress.update_progress(100)
-
-                # Disable reset button after successful reset
-                self.reset_btn.setEnabled(False)
-
-            except Exception as e:
-                QMessageBox.warning(self, "Error", f"Reset failed: {str(e)}")
+            with self.recalc_scheduler.suspended():
+                try:
+                    progress = self.progress_dialog
+                    with progress.operation("Resetting Table", "Clearing table data...", 3):
+                        # Store factory info
+                        factory_name = self.factory_name_label.text()
+                        factory_location = self.factory_location_label.text()
+
+                        progress.advance(label="Rebuilding table...")
+
+                        # Reset dimensions
+                        self.default_data_rows = 10
+                        self.default_cols = 10
+                        self.row_input.setText(str(self.default_data_rows))
+                        self.col_input.setText(str(self.default_cols - 2))
+
+                        # Rebuild table, the old undo steps no longer apply to it
+                        self.setup_table()
+                        self.top_table.journal.clear()
+                        self.schedule_recalculation()
+                        progress.advance(label="Resetting form...")
+
+                        # Reset form fields
+                        self.date_input.setDate(QDate.currentDate())
+                        self.season_combo.setCurrentIndex(0)
+                        self.ecodown_input.clear()
+                        self.buyer_input.clear()
+                        self.garments_stage_combo.setCurrentIndex(0)
+                        self.garment_weight_input.clear()
+                        self.style_input.clear()
+                        self.base_size_combo.clear()
+                        self.approx_weight_input.clear()
+
+                        # Restore factory info
+                        self.update_factory_display(factory_name, factory_location)
+                        progress.advance()
+
+                    # Disable reset button after successful reset, the sheet is a new one
+                    self.reset_btn.setEnabled(False)
+                    self.project_path = None
+
+                except Exception as e:
+                    QMessageBox.warning(self, "Error", f"Reset failed: {str(e)}")
         elif result == QDialog.DialogCode.Rejected:
             # User clicked No or closed the dialog
             pass
 
+    def form_widgets(self):
+        """The form fields a project keeps, base size last as it needs the size names"""
+        return {
+            "date": self.date_input,
+            "buyer": self.buyer_input,
+            "style": self.style_input,
+            "season": self.season_combo,
+            "garments_stage": self.garments_stage_combo,
+            "ecodown_weight": self.ecodown_input,
+            "garment_weight": self.garment_weight_input,
+            "approx_weight": self.approx_weight_input,
+            "base_size": self.base_size_combo,
+        }
+
+    def form_value(self, name):
+        widget = self.form_widgets()[name]
+        if isinstance(widget, QDateEdit):
+            return widget.date().toString(Qt.DateFormat.ISODate)
+        if isinstance(widget, QComboBox):
+            return widget.currentText()
+        return widget.text()
+
+    def set_form_field(self, name, value):
+        widget = self.form_widgets().get(name)
+        if isinstance(widget, QDateEdit):
+            date = QDate.fromString(value, Qt.DateFormat.ISODate)
+            widget.setDate(date if date.isValid() else QDate.currentDate())
+        elif isinstance(widget, QComboBox):
+            widget.setCurrentText(value)
+        elif widget is not None:
+            widget.setText(value)
+
+    def project_state(self):
+        """Everything a project file keeps: the form fields and the whole sheet"""
+        model = self.top_model
+        return {
+            "form": {name: self.form_value(name) for name in self.form_widgets()},
+            "size_names": model.size_names,
+            "panel_names": model.panel_names,
+            "quantities": model.quantities,
+            "areas": model.areas,
+            "area_valid": model.area_valid,
+        }
+
+    def apply_project(self, project):
+        """Show a loaded project, replacing the sheet and the form"""
+        n_sizes, n_panels = project["areas"].shape
+        form = project["form"]
+        with self.recalc_scheduler.suspended():
+            self.resize_sheet(n_panels, n_sizes)
+            self.top_model.load_sheet(project["size_names"], project["panel_names"],
+                                      project["quantities"], project["areas"],
+                                      project["area_valid"])
+            # The old undo steps no longer apply to this sheet
+            self.top_table.journal.clear()
+            self.update_base_size_dropdown()
+            for name in self.form_widgets():
+                self.set_form_field(name, form.get(name, ""))
+
+    def read_project(self, path):
+        self.apply_project(load_project(path))
+        self.project_path = path
+        self.autosave_record("project_path", path)
+
+    def write_project(self, path):
+        save_project(path, self.project_state())
+        self.project_path = path
+        self.autosave_record("project_path", path)
+
+    def style_library(self):
+        if self.library is None:
+            self.library = StyleLibrary(self.library_path)
+        return self.library
+
+    def save_to_library(self):
+        if not self.style_input.text().strip():
+            QMessageBox.warning(self, "Library Error", "Please enter the style before saving it")
+            self.style_input.setFocus()
+            return
+        project = self.project_state()
+        try:
+            library = self.style_library()
+            if library.find_style(project["form"]) is not None:
+                confirm = ConfirmationDialog(
+                    "Replace Style",
+                    f"{self.buyer_input.text()} {self.style_input.text()} is already in the library "
+                    f"for this season and stage.\nReplace it?",
+                    self
+                )
+                if confirm.exec() != QDialog.DialogCode.Accepted:
+                    return
+            library.save(project)
+        except sqlite3.Error as e:
+            QMessageBox.warning(self, "Library Error", f"Could not save to the library:\n{e}")
+            return
+        self.statusBar().showMessage(
+            f"Saved {self.buyer_input.text()} {self.style_input.text()} to the library", 5000)
+
+    def open_from_library(self):
+        try:
+            library = self.style_library()
+            dialog = LibraryDialog(
+                library,
+                [self.season_combo.itemText(i) for i in range(self.season_combo.count())],
+                [self.garments_stage_combo.itemText(i)
+                 for i in range(self.garments_stage_combo.count())],
+                self)
+            if dialog.exec() != QDialog.DialogCode.Accepted or dialog.selected_style_id() is None:
+                return
+            project = library.load(dialog.selected_style_id())
+        except sqlite3.Error as e:
+            QMessageBox.warning(self, "Library Error", f"Could not read the library:\n{e}")
+            return
+        if project is not None:
+            self.apply_project(project)
+            # Saving writes a new file, not the library entry
+            self.project_path = None
+            self.autosave_record("project_path", None)
+
+    def schedule_suggestions(self, first_row, first_col, last_row, last_col):
+        """Look for similar styles once typing pauses, if a feature area changed"""
+        if last_col >= 2 and last_row >= MIN_FEATURE_PANELS and first_row <= FEATURE_PANELS + 1:
+            self.suggestion_timer.start()
+
+    def suggest_similar_styles(self):
+        """Offer the library styles whose panel proportions are closest to the typed areas"""
+        model = self.top_model
+        # Nothing saved yet, do not create a library just to look into it
+        if self.library is None and not os.path.exists(self.library_path or default_library_path()):
+            return
+        base_size = self.find_base_size()
+        features = sheet_features(model.areas, model.area_valid, base_size)
+        if len(features) < MIN_FEATURE_PANELS:
+            self.suggestion_frame.hide()
+            return
+        try:
+            matches = self.style_library().similar_styles(model.areas, model.area_valid, limit=6,
+                                                          size=base_size)
+        except sqlite3.Error:
+            self.suggestion_frame.hide()
+            return
+
+        # The style being edited is no suggestion for itself
+        current = (self.buyer_input.text(), self.style_input.text())
+        matches = [(row, distance) for row, distance in matches if tuple(row[1:3]) != current][:5]
+        self.suggestions = [row for row, distance in matches]
+        self.suggestion_combo.clear()
+        for (style_id, buyer, style, season, stage, date, n_panels, n_sizes), distance in matches:
+            # Distances are in log areas, shown as the typical relative difference
+            off = np.expm1(distance / np.sqrt(len(features))) * 100
+            self.suggestion_combo.addItem(
+                f"{buyer} {style} {season} {stage} - {n_panels} x {n_sizes}, ~{off:.0f}% off")
+        self.suggestion_frame.setVisible(bool(matches))
+
+    def prefill_from_suggestion(self):
+        """Copy the size names, panel names and quantities of the chosen style, keeping the areas"""
+        index = self.suggestion_combo.currentIndex()
+        if index < 0:
+            return
+        try:
+            project = self.style_library().load(self.suggestions[index][0])
+        except sqlite3.Error as e:
+            QMessageBox.warning(self, "Library Error", f"Could not read the library:\n{e}")
+            return
+        if project is None:
+            return
+
+        n_sizes, n_panels = project["areas"].shape
+        model = self.top_model
+        grid = [["", "", *project["size_names"]]]
+        grid += [[name, str(int(quantity)) if quantity else ""]
+                 for name, quantity in zip(project["panel_names"], project["quantities"])]
+        with self.recalc_scheduler.suspended():
+            self.resize_sheet(max(n_panels, model.n_panels), max(n_sizes, model.n_sizes))
+            # Short rows leave the area cells alone, the whole prefill is one undo step
+            with self.top_table.journal.group("Prefill") as group:
+                group.extend(model.paste_block(1, 0, grid))
+        self.suggestion_timer.stop()
+        self.suggestion_frame.hide()
+
+    def enable_autosave(self, autosave):
+        """Journal every edit from now on, so a crash can be recovered from"""
+        self.autosave = autosave
+        self.top_table.cellsChanged.connect(
+            lambda changes: self.autosave_record("cells", changes))
+        # A reset or a load replaces the whole sheet, the journal starts again from it
+        self.top_model.modelReset.connect(self.autosave_checkpoint)
+        for name, widget in self.form_widgets().items():
+            if isinstance(widget, QDateEdit):
+                signal = widget.dateChanged
+            elif isinstance(widget, QComboBox):
+                signal = widget.currentTextChanged
+            else:
+                signal = widget.textChanged
+            signal.connect(lambda *args, name=name: self.autosave_record(
+                "form", name, self.form_value(name)))
+        self.autosave_checkpoint()
+
+    def autosave_checkpoint(self):
+        if self.autosave is not None:
+            self.autosave.checkpoint(self.project_state(), self.project_path)
+
+    def autosave_record(self, kind, *args):
+        if self.autosave is not None:
+            self.autosave.append([kind, *args])
+
+    def replay_autosave(self, records):
+        """Redo the journalled edits on top of the snapshot they followed"""
+        with self.recalc_scheduler.suspended():
+            for kind, *args in records:
+                if kind == "cells":
+                    self.top_table.restore_state([tuple(change) for change in args[0]])
+                elif kind in ("insert_panels", "remove_panels", "insert_sizes", "remove_sizes"):
+                    getattr(self, kind)(*args)
+                elif kind == "form":
+                    self.set_form_field(*args)
+                elif kind == "project_path":
+                    self.project_path = args[0]
+
+    def recover_autosave(self, autosave):
+        """Offer the edits a crashed session left in the autosave journal"""
+        recovery = autosave.find_recovery()
+        if recovery is None:
+            return
+        project, records = recovery
+        answer = QMessageBox.question(
+            self, "Recover Unsaved Work",
+            f"The last session ended unexpectedly with {len(records)} unsaved "
+            f"change(s).\nDo you want to recover them?")
+        if answer != QMessageBox.StandardButton.Yes:
+            return
+        self.apply_project(project)
+        self.project_path = project["project_path"]
+        self.replay_autosave(records)
+
+    def open_project_file(self):
+        path, _ = QFileDialog.getOpenFileName(
+            self, "Open Project", os.path.dirname(self.project_path or ""),
+            f"Down allocation projects (*{FILE_EXTENSION})")
+        if not path:
+            return
+        try:
+            self.read_project(path)
+        except (OSError, ProjectFileError) as e:
+            QMessageBox.warning(self, "Open Error", f"Could not open {path}:\n{e}")
+
+    def save_project_file(self):
+        if self.project_path is None:
+            self.save_project_file_as()
+            return
+        try:
+            self.write_project(self.project_path)
+        except OSError as e:
+            QMessageBox.warning(self, "Save Error", f"Could not save {self.project_path}:\n{e}")
+
+    def save_project_file_as(self):
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Save Project As", self.project_path or "",
+            f"Down allocation projects (*{FILE_EXTENSION})")
+        if not path:
+            return
+        if not path.endswith(FILE_EXTENSION):
+            path += FILE_EXTENSION
+        try:
+            self.write_project(path)
+        except OSError as e:
+            QMessageBox.warning(self, "Save Error", f"Could not save {path}:\n{e}")
+
     def clear_table(self):
         # Clear all data but keep structure
-        for row in range(self.top_table.rowCount()):
-            for col in range(self.top_table.columnCount()):
-                if row == 0:  # Main headers
-                    continue
-                elif row == 1 and col >= 2:  # Size headers
-                    item = self.top_table.item(row, col)
-                    if item:
-                        item.setText("")
-                elif row == self.top_table.rowCount() - 1:  # Total row
-                    if col == 0:
-                        continue
-                    elif col >= 2:
-                        item = self.top_table.item(row, col)
-                        if item:
-                            item.setText("0.00")
-                else:  # Data rows
-                    item = self.top_table.item(row, col)
-                    if item:
-                        item.setText("")
+        self.top_model.reset_shape(self.top_model.n_panels, self.top_model.n_sizes)
 
         # Reset base size dropdown
         self.base_size_combo.clear()
@@ -2029,30 +1995,145 @@ class DownAllocationApp(QMainWindow):
         self.setWindowTitle(f"Automatic Down Allocation System - {name}")
 
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
-    font = QFont("Courier New", 10)
-    app.setFont(font)
-
-    splash_path = os.path.join(os.path.dirname(__file__), '..', 'assets', 'splash_image.png')
-    pixmap = QPixmap(os.path.abspath(splash_path))
-
-    splash = SplashScreen(pixmap, version="1.0.0")
-    splash.show_centered()
-    splash.start_animation(2500)
-
-    # Declare global window reference to keep it alive
-    global main_window
+    parser = argparse.ArgumentParser(description="Automatic Down Allocation System")
+    parser.add_argument("--no-splash", action="store_true",
+                        help="open the window without the splash screen")
+    parser.add_argument("--profile-startup", nargs="?", const="-", metavar="REPORT",
+                        help="time the startup phases, write them as JSON to REPORT "
+                             "(default stdout) and exit instead of running")
+    parser.add_argument("--instrument", nargs="?", const="instrumentation.json", metavar="LOG",
+                        help="count and time the recompute hot paths per user action, show the "
+                             "last action in the status bar and write them all to LOG on exit "
+                             "(default instrumentation.json)")
+    parser.add_argument("--stall-threshold", type=float, default=100, metavar="MS",
+                        help="log the Python stack when the event loop blocks longer than "
+                             "this (default 100, 0 turns the watchdog off)")
+    parser.add_argument("--stall-log", metavar="PATH",
+                        help="rotating stall log (default DownAllocation/stalls.log in the "
+                             "user's data folder)")
+    parser.add_argument("--telemetry", metavar="LOG",
+                        help="append a resource sample (RSS, undo journal size, signal "
+                             "receivers, live objects) to LOG as a JSON line every minute")
+    parser.add_argument("--no-autosave", action="store_true",
+                        help="do not journal edits for crash recovery")
+    parser.add_argument("--autosave-dir", metavar="DIR",
+                        help="folder of the crash recovery journal (default "
+                             "DownAllocation/autosave in the user's data folder)")
+    parser.add_argument("--library", metavar="PATH",
+                        help="style library database (default DownAllocation/library.sqlite3 "
+                             "in the user's data folder)")
+    parser.add_argument("--startup-baseline", metavar="JSON",
+                        help="with --profile-startup, exit with status 1 when startup "
+                             "is slower than the run stored in JSON for the same start "
+                             "mode (splash or --no-splash)")
+    parser.add_argument("--record-baseline", action="store_true",
+                        help="with --startup-baseline, store this run in JSON as the "
+                             "baseline of its start mode instead of comparing")
+    parser.add_argument("--startup-threshold", type=float, default=0.25,
+                        help="slowdown over the baseline that still passes (default 0.25)")
+    args, qt_args = parser.parse_known_args()
+
+    profile = None
+    if args.profile_startup:
+        profile = StartupProfile(_startup_started)
+        profile.add("import_pyqt6", _startup_started, _pyqt_imported)
+        profile.add("import_modules", _pyqt_imported, _modules_imported)
+        for name in ("init_ui", "setup_table", "setup_bottom_table",
+                     "connect_change_trackers", "load_factory_info"):
+            profile.time_method(DownAllocationApp, name)
+    phase = profile.phase if profile else lambda name: nullcontext()
+
+    instrumentation = None
+    if args.instrument:
+        instrumentation = Instrumentation()
+        instrumentation.time_methods(DownAllocationApp, (
+            "update_table", "recalculate_cell", "calculate_totals", "run_recalculation",
+            "update_bottom_table", "update_bottom_columns", "update_top_totals",
+            "update_base_size_dropdown", "setup_table", "setup_bottom_table"))
+        instrumentation.time_methods(TableWidget, ("on_cell_edited", "restore_state"))
+        instrumentation.action_method(
+            TableItemDelegate, "setModelData",
+            lambda delegate, editor, model, index: f"Edit R{index.row()}C{index.column()}")
+        instrumentation.action_method(TableWidget, "paste_to_selection", "Paste")
+        instrumentation.action_method(TableWidget, "clear_selection", "Delete")
+        instrumentation.action_method(TableWidget, "undo", "Undo")
+        instrumentation.action_method(TableWidget, "redo", "Redo")
+        instrumentation.action_method(DownAllocationApp, "set_table_dimensions", "Resize")
+        instrumentation.action_method(DownAllocationApp, "reset_table", "Reset")
+
+    with phase("create_application"):
+        app = QApplication(sys.argv[:1] + qt_args)
+        font = QFont("Courier New", 10)
+        app.setFont(font)
+
+    # Keep a reference so the window is not garbage collected
     main_window = None
 
-    def transition_to_main():
-        def show_main():
-            splash.deleteLater()
-            global main_window
-            main_window = DownAllocationApp()
+    if args.no_splash:
+        with phase("create_window"):
+            main_window = DownAllocationApp(instrumentation=instrumentation)
+        with phase("show_window"):
             main_window.showMaximized()
-
-        splash.fade_out(callback=show_main)
-
-    QTimer.singleShot(2700, transition_to_main)
-
-    sys.exit(app.exec())
\ No newline at end of file
+            main_window.repaint()
+    else:
+        splash_path = os.path.join(os.path.dirname(__file__), '..', 'assets', 'splash_image.png')
+        with phase("splash_pixmap_load"):
+            pixmap = QPixmap(os.path.abspath(splash_path))
+
+        with phase("splash_create"):
+            splash = SplashScreen(pixmap, version="1.0.0")  # Scales the pixmap
+        with phase("splash_show"):
+            splash.start_steps(DownAllocationApp.STARTUP_STEPS)
+            splash.show_centered()
+            app.processEvents()
+
+        # Build the window while the splash shows its real progress, then swap them
+        with phase("create_window"):
+            main_window = DownAllocationApp(on_startup_step=splash.step,
+                                            instrumentation=instrumentation)
+        with phase("show_window"):
+            main_window.showMaximized()
+            main_window.repaint()
+            splash.finish(main_window)
+
+    if profile is not None:
+        report = profile.report("no-splash" if args.no_splash else "splash")
+        write_report(report, args.profile_startup)
+        failures = []
+        if args.startup_baseline and args.record_baseline:
+            save_baseline(report, args.startup_baseline)
+        elif args.startup_baseline:
+            baseline = load_baseline(args.startup_baseline, report["mode"])
+            if baseline is None:
+                failures = [f"no {report['mode']} baseline in {args.startup_baseline}"]
+            else:
+                failures = check_regressions(report, baseline, args.startup_threshold)
+        for failure in failures:
+            print(f"Startup regression: {failure}", file=sys.stderr)
+        sys.exit(1 if failures else 0)
+
+    main_window.library_path = args.library
+
+    if instrumentation is not None:
+        app.aboutToQuit.connect(lambda: instrumentation.dump(args.instrument))
+
+    if not args.no_autosave:
+        autosave = AutosaveJournal(args.autosave_dir, parent=app)
+        # A second window leaves the journal to the first one
+        if autosave.acquire():
+            main_window.recover_autosave(autosave)
+            main_window.enable_autosave(autosave)
+            app.aboutToQuit.connect(autosave.discard)
+
+    if args.stall_threshold > 0:
+        watchdog = StallWatchdog(args.stall_threshold, args.stall_log,
+                                 describe=main_window.stall_context, parent=app)
+        watchdog.start()
+        app.aboutToQuit.connect(watchdog.stop)
+
+    if args.telemetry:
+        telemetry = ResourceTelemetry(main_window, args.telemetry, parent=app)
+        telemetry.start()
+        app.aboutToQuit.connect(telemetry.log_sample)
+
+    sys.exit(app.exec())
@@ -0,0 +1,113 @@
+import json
+import os
+import struct
+
+import numpy as np
+
+MAGIC = b"DOWNALLC"
+FORMAT_VERSION = 1
+# Magic, format version and the byte length of the JSON header that follows
+PREAMBLE = struct.Struct("<8sII")
+ALIGNMENT = 16
+FILE_EXTENSION = ".dap"
+
+# Arrays stored as raw blocks after the header, in this order
+BLOCK_DTYPES = {
+    "quantities": np.dtype("<i1"),
+    "areas": np.dtype("<f8"),
+    "area_valid": np.dtype("|b1"),
+}
+
+
+class ProjectFileError(Exception):
+    """A project file that is not one, is damaged or is from a newer version"""
+
+
+def _aligned(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def save_project(path, project):
+    """Write a project dict to path, replacing any old file only once complete.
+
+    project holds "form" (the form fields as a JSON-able dict),
+    "size_names", "panel_names", and the "quantities", "areas" (sizes x
+    panels) and "area_valid" arrays of the sheet. The names and the form
+    go in a small JSON header. Every array is written as one contiguous
+    little-endian block, so loading it is a single read with no parsing.
+    """
+    arrays = {name: np.ascontiguousarray(project[name], dtype=dtype)
+              for name, dtype in BLOCK_DTYPES.items()}
+    blocks = {}
+    offset = 0
+    for name, array in arrays.items():
+        blocks[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+        offset = _aligned(offset + array.nbytes)
+
+    header = json.dumps({
+        "form": project.get("form", {}),
+        "size_names": list(project["size_names"]),
+        "panel_names": list(project["panel_names"]),
+        "blocks": blocks,
+    }, ensure_ascii=False).encode("utf-8")
+    data_start = _aligned(PREAMBLE.size + len(header))
+
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as f:
+        f.write(PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header)))
+        f.write(header)
+        for name, array in arrays.items():
+            f.seek(data_start + blocks[name]["offset"])
+            f.write(memoryview(array).cast("B"))
+        f.truncate()
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+def load_project(path):
+    """Read a file written by save_project() back into a project dict.
+
+    The arrays are read-only views of the file's bytes, copy them before
+    writing to them.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) < PREAMBLE.size:
+        raise ProjectFileError("The file is too short to be a project")
+    magic, version, header_size = PREAMBLE.unpack_from(data)
+    if magic != MAGIC:
+        raise ProjectFileError("The file is not a down allocation project")
+    if version > FORMAT_VERSION:
+        raise ProjectFileError(f"The project was saved by a newer version (format {version})")
+
+    try:
+        header = json.loads(data[PREAMBLE.size:PREAMBLE.size + header_size].decode("utf-8"))
+    except (UnicodeDecodeError, ValueError) as e:
+        raise ProjectFileError(f"The project header is damaged: {e}") from e
+    data_start = _aligned(PREAMBLE.size + header_size)
+
+    try:
+        project = {
+            "form": header.get("form", {}),
+            "size_names": header["size_names"],
+            "panel_names": header["panel_names"],
+        }
+        for name in BLOCK_DTYPES:
+            block = header["blocks"][name]
+            dtype = np.dtype(block["dtype"])
+            shape = tuple(block["shape"])
+            count = int(np.prod(shape))
+            start = data_start + block["offset"]
+            if start + count * dtype.itemsize > len(data):
+                raise ProjectFileError(f"The project is truncated, {name} is incomplete")
+            project[name] = np.frombuffer(data, dtype, count, start).reshape(shape)
+    except (KeyError, TypeError, ValueError) as e:
+        raise ProjectFileError(f"The project header is damaged: {e}") from e
+
+    n_sizes, n_panels = project["areas"].shape
+    if (len(project["size_names"]) != n_sizes or len(project["panel_names"]) != n_panels
+            or project["quantities"].shape != (n_panels,)
+            or project["area_valid"].shape != (n_sizes, n_panels)):
+        raise ProjectFileError("The project's names and arrays do not match in size")
+    return project
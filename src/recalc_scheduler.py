@@ -0,0 +1,65 @@
+from contextlib import contextmanager
+
+from PyQt6.QtCore import QObject, QTimer
+
+
+class RecalcScheduler(QObject):
+    """Collapses bursts of change notifications into a single recompute.
+
+    Callers mark size columns (or the whole sheet) dirty as often as they
+    like. The callback runs at most once per event-loop turn with the union
+    of everything marked since the last run, or later when a debounce delay
+    was requested, e.g. while the user is still typing a weight.
+    """
+
+    def __init__(self, callback, parent=None):
+        super().__init__(parent)
+        self.callback = callback
+        self.run_count = 0
+        self._suspended = 0
+        self._full = False
+        self._sizes = set()
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self.flush)
+
+    def schedule(self, sizes=None, delay=0):
+        """Mark sizes dirty (None for everything) and queue a recompute"""
+        if sizes is None:
+            self._full = True
+        else:
+            self._sizes.update(sizes)
+
+        if delay > 0 and self._timer.isActive() and self._timer.interval() == 0:
+            return  # An immediate run is already queued and will pick this up
+        self._timer.start(delay)
+
+    @contextmanager
+    def suspended(self):
+        """Hold every recompute until a bulk operation has finished.
+
+        Bulk operations that call processEvents() would otherwise let the
+        timer fire half way through.
+        """
+        self._suspended += 1
+        try:
+            yield
+        finally:
+            self._suspended -= 1
+            if not self._suspended and self.is_pending():
+                self._timer.start(0)
+
+    def is_pending(self):
+        return self._full or bool(self._sizes)
+
+    def flush(self):
+        """Run the pending recompute now, if there is one"""
+        self._timer.stop()
+        if self._suspended or not self.is_pending():
+            return
+        sizes = None if self._full else sorted(self._sizes)
+        self._full = False
+        self._sizes = set()
+        self.run_count += 1
+        self.callback(sizes)
@@ -0,0 +1,67 @@
+import threading
+
+from PyQt6.QtCore import QObject, QThreadPool, pyqtSignal
+
+
+class RecalcWorker(QObject):
+    """Runs one heavy recompute at a time on a worker thread.
+
+    Every submitted job gets a new generation number and the previous job
+    is cancelled. A job's result only reaches its callback, on the GUI
+    thread, when no newer job was submitted and cancel() was not called in
+    the meantime; anything else is stale and dropped.
+
+    A job is called with a cancelled() function it should check between
+    steps, returning early (with any value) once it is true.
+    """
+
+    _finished = pyqtSignal(int, object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.generation = 0
+        self.dropped_count = 0
+        self._callback = None
+        self._cancel_event = None
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(1)
+        # Emitted from the pool thread, so the slot runs queued on the GUI thread
+        self._finished.connect(self._deliver)
+
+    def submit(self, job, callback):
+        """Run job(cancelled) off the GUI thread and pass its result to callback"""
+        self.cancel()
+        generation = self.generation
+        cancel_event = threading.Event()
+        self._callback = callback
+        self._cancel_event = cancel_event
+
+        def run():
+            result = job(cancel_event.is_set)
+            self._finished.emit(generation, result)
+
+        self._pool.start(run)
+        return generation
+
+    def cancel(self):
+        """Drop the result of the running job, if there is one"""
+        self.generation += 1
+        if self._cancel_event is not None:
+            self._cancel_event.set()
+            self._cancel_event = None
+        self._callback = None
+
+    def is_busy(self):
+        return self._callback is not None
+
+    def wait(self):
+        """Block until the worker thread is idle, results still arrive as events"""
+        self._pool.waitForDone()
+
+    def _deliver(self, generation, result):
+        if generation != self.generation or self._callback is None:
+            self.dropped_count += 1
+            return
+        callback, self._callback = self._callback, None
+        self._cancel_event = None
+        callback(result)
@@ -0,0 +1,87 @@
+import gc
+import json
+import os
+import time
+
+from PyQt6.QtCore import QObject, QTimer
+
+# (attribute of the window, signal) pairs whose connections should never grow
+WATCHED_SIGNALS = (
+    ("top_model", "cellEdited"),
+    ("top_model", "blockEdited"),
+    ("top_model", "dataChanged"),
+    ("top_model", "modelReset"),
+    ("bottom_model", "dataChanged"),
+    ("bottom_model", "modelReset"),
+    ("base_size_combo", "currentTextChanged"),
+    ("ecodown_input", "textChanged"),
+    ("garment_weight_input", "textChanged"),
+)
+
+
+def process_rss():
+    """Resident memory of this process in bytes, or None where it is unknown"""
+    try:
+        import psutil
+    except ImportError:
+        pass
+    else:
+        return psutil.Process().memory_info().rss
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class ResourceTelemetry(QObject):
+    """Samples what a long session holds on to, to spot leaks over a shift.
+
+    A sample counts the QObjects under the window, the Python objects the
+    garbage collector tracks, the receivers of the signals the tables
+    connect to, the undo journal's size and the process RSS. With a
+    log_path, start() appends a sample as one JSON line every interval_s.
+    """
+
+    def __init__(self, window, log_path=None, interval_s=60, parent=None):
+        super().__init__(parent)
+        self.window = window
+        self.log_path = log_path
+        self._started = time.monotonic()
+        self._timer = QTimer(self)
+        self._timer.setInterval(int(interval_s * 1000))
+        self._timer.timeout.connect(self.log_sample)
+
+    def receiver_counts(self):
+        counts = {}
+        for owner_name, signal_name in WATCHED_SIGNALS:
+            owner = getattr(self.window, owner_name)
+            counts[f"{owner_name}.{signal_name}"] = owner.receivers(getattr(owner, signal_name))
+        return counts
+
+    def sample(self):
+        journal = self.window.top_table.journal
+        return {
+            "elapsed_s": round(time.monotonic() - self._started, 3),
+            "grid": [self.window.top_model.n_panels, self.window.top_model.n_sizes],
+            "rss_bytes": process_rss(),
+            "journal_bytes": journal.memory_used,
+            "undo_steps": len(journal.undo_stack),
+            "redo_steps": len(journal.redo_stack),
+            "qobjects": len(self.window.findChildren(QObject)),
+            "python_objects": len(gc.get_objects()),
+            "receivers": self.receiver_counts(),
+        }
+
+    def start(self):
+        self.log_sample()
+        self._timer.start()
+
+    def stop(self):
+        self._timer.stop()
+
+    def log_sample(self):
+        if not self.log_path:
+            return
+        with open(self.log_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(self.sample()) + "\n")
@@ -0,0 +1,188 @@
+import numpy as np
+
+# Leading panels of a size column that describe a style
+FEATURE_PANELS = 8
+# Fewest leading panels that are compared, fewer give too little shape to match on
+MIN_FEATURE_PANELS = 3
+
+
+def sheet_features(areas, area_valid, size=None):
+    """The feature vector of a sheet: log1p of the leading panel areas of one size.
+
+    Only the areas up to the first empty cell of a column count, so a sheet
+    being typed in describes itself with the panels it has so far. The
+    column with the most of them is used, size (e.g. the base size) when it
+    has as many as any other, else the leftmost. The log makes a distance
+    measure relative differences, 10% off a small panel weighs as much as
+    10% off a large one.
+    """
+    valid = np.asarray(area_valid, dtype=bool)[:, :FEATURE_PANELS]
+    if not valid.size:
+        return np.empty(0)
+    # Leading filled cells of every size column
+    leading = np.where(valid.all(axis=1), valid.shape[1], np.argmin(valid, axis=1))
+    best = int(np.argmax(leading))
+    if size is not None and 0 <= size < len(leading) and leading[size] == leading[best]:
+        best = size
+    return np.log1p(np.asarray(areas[best][:leading[best]], dtype=np.float64))
+
+
+def feature_shape(features):
+    """Features less their mean, the same for any size of a style graded up or down"""
+    features = np.asarray(features, dtype=np.float64)
+    return features - features.mean(axis=-1, keepdims=True)
+
+
+class KDTree:
+    """Static k-d tree over the rows of points, for k nearest neighbour queries.
+
+    Built once by median splits on the widest dimension down to LEAF_SIZE
+    points, every node keeping the bounding box of its points. A query
+    walks the nearer child first and skips every subtree whose box is
+    further away than the k-th best distance so far; the points of a leaf
+    are contiguous and compared in one numpy expression.
+    """
+
+    LEAF_SIZE = 128
+
+    def __init__(self, points):
+        points = np.asarray(points, dtype=np.float64)
+        self.order = np.arange(len(points))
+        # Per node: split dimension (-1 for a leaf), children and point range
+        self.split_dim, self.children, self.ranges = [], [], []
+        lows, highs = [], []
+        stack = [self._add_node(0, len(points))] if len(points) else []
+        while stack:
+            node = stack.pop()
+            start, end = self.ranges[node]
+            indexes = self.order[start:end]
+            block = points[indexes]
+            low, high = block.min(axis=0), block.max(axis=0)
+            lows.append((node, low))
+            highs.append(high)
+            if end - start <= self.LEAF_SIZE:
+                continue
+            dim = int(np.argmax(high - low))
+            middle = (end - start) // 2
+            self.order[start:end] = indexes[np.argpartition(block[:, dim], middle)]
+            self.split_dim[node] = dim
+            left = self._add_node(start, start + middle)
+            right = self._add_node(start + middle, end)
+            self.children[node] = (left, right)
+            stack.extend((left, right))
+
+        n_dims = points.shape[1] if points.ndim == 2 else 0
+        self.low = np.empty((len(self.ranges), n_dims))
+        self.high = np.empty((len(self.ranges), n_dims))
+        for (node, low), high in zip(lows, highs):
+            self.low[node], self.high[node] = low, high
+        self.points = points[self.order]  # Leaf by leaf
+
+    def _add_node(self, start, end):
+        self.split_dim.append(-1)
+        self.children.append((-1, -1))
+        self.ranges.append((start, end))
+        return len(self.ranges) - 1
+
+    def query(self, point, k=1):
+        """(indexes, distances) of the k rows nearest to point, nearest first"""
+        point = np.asarray(point, dtype=np.float64)
+        if k < 1 or not len(self.points):
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        best_index = np.empty(0, dtype=np.int64)
+        best_distance = np.empty(0)
+        worst = np.inf
+        stack = [(0, 0.0)]
+        while stack:
+            node, bound = stack.pop()
+            if bound >= worst:
+                continue
+            if self.split_dim[node] < 0:
+                start, end = self.ranges[node]
+                distances = ((self.points[start:end] - point) ** 2).sum(axis=1)
+                closer = np.flatnonzero(distances < worst)
+                best_index = np.concatenate((best_index, closer + start))
+                best_distance = np.concatenate((best_distance, distances[closer]))
+                if len(best_distance) > k:
+                    keep = np.argpartition(best_distance, k - 1)[:k]
+                    best_index, best_distance = best_index[keep], best_distance[keep]
+                if len(best_distance) == k:
+                    worst = best_distance.max()
+                continue
+            # Squared distance from the point to the box of either child
+            children = self.children[node]
+            gaps = np.maximum(np.maximum(self.low[list(children)] - point,
+                                         point - self.high[list(children)]), 0)
+            left_bound, right_bound = (gaps * gaps).sum(axis=1)
+            if left_bound < right_bound:
+                stack.extend(((children[1], right_bound), (children[0], left_bound)))
+            else:
+                stack.extend(((children[0], left_bound), (children[1], right_bound)))
+        order = np.argsort(best_distance)
+        return self.order[best_index[order]], np.sqrt(best_distance[order])
+
+
+class SimilarityIndex:
+    """Nearest stored styles to the leading panel areas of a sheet.
+
+    Styles are compared by feature_shape(), the proportions of their panels,
+    so areas typed into any size column find a style stored from another
+    one. That takes at least two areas. A query with n areas is answered by
+    a KDTree over the shape of the first n features of every style that has
+    at least n, built on first use. Styles saved or deleted since a tree
+    was built are kept aside and compared by brute force, until
+    REBUILD_AFTER of them make the tree worth rebuilding.
+    """
+
+    REBUILD_AFTER = 1000
+
+    def __init__(self):
+        self.features = {}  # Style id -> feature vector
+        self._trees = {}  # Number of features -> (KDTree, style ids, changed style ids)
+
+    def load(self, features):
+        self.features.update(features)
+        self._trees.clear()
+
+    def set_style(self, style_id, features):
+        self.features[style_id] = np.asarray(features, dtype=np.float64)
+        self._changed(style_id)
+
+    def remove_style(self, style_id):
+        self.features.pop(style_id, None)
+        self._changed(style_id)
+
+    def _changed(self, style_id):
+        for n_features, (tree, style_ids, changed) in list(self._trees.items()):
+            changed.add(style_id)
+            if len(changed) > self.REBUILD_AFTER:
+                del self._trees[n_features]
+
+    def _tree(self, n_features):
+        entry = self._trees.get(n_features)
+        if entry is None:
+            style_ids = np.array([style_id for style_id, features in self.features.items()
+                                  if len(features) >= n_features], dtype=np.int64)
+            points = np.array([self.features[style_id][:n_features]
+                               for style_id in style_ids.tolist()]).reshape(-1, n_features)
+            entry = (KDTree(feature_shape(points)), style_ids, set())
+            self._trees[n_features] = entry
+        return entry
+
+    def nearest(self, features, limit=5):
+        """(style id, distance) of the styles nearest to features, nearest first"""
+        n_features = len(features)
+        if n_features < MIN_FEATURE_PANELS:
+            return []
+        features = feature_shape(features)
+        tree, style_ids, changed = self._tree(n_features)
+        indexes, distances = tree.query(features, min(limit + len(changed), len(style_ids)))
+        matches = [(style_id, distance)
+                   for style_id, distance in zip(style_ids[indexes].tolist(), distances.tolist())
+                   if style_id not in changed]
+        for style_id in changed:
+            stored = self.features.get(style_id)
+            if stored is not None and len(stored) >= n_features:
+                distance = np.linalg.norm(feature_shape(stored[:n_features]) - features)
+                matches.append((style_id, float(distance)))
+        return sorted(matches, key=lambda match: match[1])[:limit]
@@ -1,11 +1,10 @@
 import os
 import sys
 from PyQt6.QtWidgets import (
-    QSplashScreen, QProgressBar, QVBoxLayout, QWidget, QApplication,
-    QGraphicsOpacityEffect
+    QSplashScreen, QProgressBar, QVBoxLayout, QWidget, QApplication
 )
 from PyQt6.QtGui import QPixmap, QColor, QFont, QPainter
-from PyQt6.QtCore import Qt, QTimer, QRect, QPropertyAnimation, QEasingCurve
+from PyQt6.QtCore import Qt, QRect
 
 class SplashScreen(QSplashScreen):
     def __init__(self, pixmap=None, version="1.0.0"):
@@ -25,7 +24,6 @@ class SplashScreen(QSplashScreen):
         self.setEnabled(False)
 
         self.setup_ui()
-        self.setup_fade_effect()
 
     def setup_ui(self):
         self.container = QWidget(self)
@@ -58,48 +56,34 @@ class SplashScreen(QSplashScreen):
         layout.addWidget(self.progress)
 
         self.setFont(QFont("Arial", 8, QFont.Weight.Bold))
+        self.show_status("")
+
+        self.steps_done = 0
+        self.total_steps = 1
+
+    def show_status(self, text):
+        message = f"{text}    Version {self.version}" if text else f"Version {self.version}"
         self.showMessage(
-            f"Version {self.version}",
+            message,
             alignment=Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignBottom,
             color=QColor(255, 255, 255, 180)
         )
 
-        self.progress_value = 0
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.update_progress)
-
-    def setup_fade_effect(self):
-        self.opacity_effect = QGraphicsOpacityEffect(self)
-        self.setGraphicsEffect(self.opacity_effect)
-        self.fade_anim = QPropertyAnimation(self.opacity_effect, b"opacity")
-        self.fade_anim.setDuration(800)
-        self.fade_anim.setEasingCurve(QEasingCurve.Type.InOutQuad)
-
-    def fade_in(self):
-        self.opacity_effect.setOpacity(0.0)
-        self.fade_anim.setStartValue(0.0)
-        self.fade_anim.setEndValue(1.0)
-        self.fade_anim.start()
-
-    def fade_out(self, callback=None):
-        self.fade_anim.setStartValue(1.0)
-        self.fade_anim.setEndValue(0.0)
-        self.fade_anim.finished.connect(callback)
-        self.fade_anim.start()
-
-    def start_animation(self, duration=2500):
-        self.progress_value = 0
+    def start_steps(self, total_steps):
+        """Reset the progress bar for a startup made of total_steps steps"""
+        self.steps_done = 0
+        self.total_steps = max(total_steps, 1)
         self.progress.setValue(0)
-        interval = duration // 100
-        self.timer.start(interval)
-        self.fade_in()
 
-    def update_progress(self):
-        if self.progress_value < 100:
-            self.progress_value += 1
-            self.progress.setValue(self.progress_value)
-        else:
-            self.timer.stop()
+    def step(self, text):
+        """One startup step is starting, move the bar and name the step.
+
+        Startup runs before the event loop does, so paint right away.
+        """
+        self.progress.setValue(self.steps_done * 100 // self.total_steps)
+        self.steps_done += 1
+        self.show_status(text)
+        self.repaint()
 
     def show_centered(self):
         screen_geometry = QApplication.primaryScreen().availableGeometry()
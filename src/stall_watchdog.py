@@ -0,0 +1,108 @@
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from logging.handlers import RotatingFileHandler
+
+from PyQt6.QtCore import QObject, QStandardPaths, Qt, QTimer
+
+
+def default_log_path():
+    data_dir = QStandardPaths.writableLocation(QStandardPaths.StandardLocation.GenericDataLocation)
+    return os.path.join(data_dir, "DownAllocation", "stalls.log")
+
+
+class StallWatchdog(QObject):
+    """Logs what the main thread was doing whenever the event loop blocks.
+
+    A timer on the GUI thread beats every HEARTBEAT_MS. A daemon thread
+    checks the beat, and once it is late by threshold_ms it records the
+    main thread's Python stack, the outermost application frame (the slot
+    or handler the stall started from) and describe()'s context, e.g. the
+    grid dimensions, to a rotating log. When the loop turns again, the
+    total length of the stall is logged too.
+    """
+
+    HEARTBEAT_MS = 25
+    MAX_LOG_BYTES = 1024 * 1024
+    LOG_BACKUPS = 3
+
+    def __init__(self, threshold_ms=100, log_path=None, describe=None, parent=None):
+        super().__init__(parent)
+        self.threshold = threshold_ms / 1000
+        self.describe = describe
+        self.stall_count = 0
+        self._main_thread_id = threading.get_ident()
+        self._source_dir = os.path.dirname(os.path.abspath(__file__))
+        self._last_beat = time.monotonic()
+        self._reported_beat = None
+        self._stop_event = threading.Event()
+        self._thread = None
+
+        log_path = log_path or default_log_path()
+        os.makedirs(os.path.dirname(os.path.abspath(log_path)), exist_ok=True)
+        self.log_path = log_path
+        self.logger = logging.getLogger(f"down_allocation.stalls.{id(self)}")
+        self.logger.propagate = False
+        self.logger.setLevel(logging.INFO)
+        self._handler = RotatingFileHandler(log_path, maxBytes=self.MAX_LOG_BYTES,
+                                            backupCount=self.LOG_BACKUPS, encoding="utf-8")
+        self._handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+        self.logger.addHandler(self._handler)
+
+        self._timer = QTimer(self)
+        self._timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self._timer.timeout.connect(self._beat)
+
+    def start(self):
+        self._last_beat = time.monotonic()
+        self._timer.start(self.HEARTBEAT_MS)
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._watch, name="stall-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._timer.stop()
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.logger.removeHandler(self._handler)
+        self._handler.close()
+
+    def _beat(self):
+        now = time.monotonic()
+        last_beat, self._last_beat = self._last_beat, now
+        if self._reported_beat == last_beat:
+            self.logger.info("Event loop ran again after %.0f ms", (now - last_beat) * 1000)
+
+    def _watch(self):
+        poll = max(self.threshold / 4, 0.005)
+        late_after = self.threshold + self.HEARTBEAT_MS / 1000
+        while not self._stop_event.wait(poll):
+            last_beat = self._last_beat
+            blocked = time.monotonic() - last_beat
+            if blocked >= late_after and self._reported_beat != last_beat:
+                self._reported_beat = last_beat  # One report per stall
+                self.stall_count += 1
+                self._report(blocked)
+
+    def _report(self, blocked):
+        frame = sys._current_frames().get(self._main_thread_id)
+        if frame is None:
+            return
+        stack = traceback.extract_stack(frame)
+        entry = next((f"{frame.name} ({os.path.basename(frame.filename)}:{frame.lineno})"
+                      for frame in stack if frame.filename.startswith(self._source_dir)
+                      and frame.name != "<module>"),
+                     "outside the application")
+        context = ""
+        if self.describe is not None:
+            try:
+                context = ", ".join(f"{key} {value}" for key, value in self.describe().items())
+            except Exception as e:  # Reading state mid-update must never kill the watchdog
+                context = f"context unavailable: {e}"
+        self.logger.info("Event loop blocked for %.0f ms, entered at %s [%s]\n%s",
+                         blocked * 1000, entry, context, "".join(stack.format()).rstrip())
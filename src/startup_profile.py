@@ -0,0 +1,125 @@
+import json
+import os
+import platform
+import sys
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+
+class StartupProfile:
+    """Wall time of the phases of one application start.
+
+    Phases may nest, setup_table runs inside init_ui for example. Each is
+    reported with its own duration and its start relative to started, the
+    time taken before the first import.
+    """
+
+    def __init__(self, started=None):
+        self.started = time.perf_counter() if started is None else started
+        self.phases = []
+
+    def add(self, name, start, end):
+        self.phases.append({
+            "name": name,
+            "start_ms": round((start - self.started) * 1000, 3),
+            "duration_ms": round((end - start) * 1000, 3),
+        })
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, start, time.perf_counter())
+
+    def time_method(self, cls, name, phase=None):
+        """Record every call of cls.name from now on as a phase"""
+        method = getattr(cls, name)
+
+        @wraps(method)
+        def timed(*args, **kwargs):
+            with self.phase(phase or name):
+                return method(*args, **kwargs)
+
+        setattr(cls, name, timed)
+
+    def durations(self):
+        """Total milliseconds per phase name, a phase may run more than once"""
+        totals = {}
+        for phase in self.phases:
+            totals[phase["name"]] = round(totals.get(phase["name"], 0.0) + phase["duration_ms"], 3)
+        return totals
+
+    def report(self, mode=None):
+        """The phases as a JSON-ready dict, mode names how the application started"""
+        return {
+            "mode": mode,
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 3),
+            "durations_ms": self.durations(),
+            "phases": sorted(self.phases, key=lambda phase: phase["start_ms"]),
+            "argv": sys.argv[1:],
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "qt_platform": os.environ.get("QT_QPA_PLATFORM", ""),
+        }
+
+
+def write_report(report, path):
+    """Write a report as JSON to path, or to stdout for "-" """
+    if path == "-":
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+        return
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+        f.write("\n")
+
+
+def load_report(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_baseline(path, mode):
+    """The report stored for mode in a baseline file, or None.
+
+    A baseline file maps every start mode ("splash", "no-splash") to a
+    report, a run is only ever compared with one that started the same way.
+    """
+    try:
+        baselines = load_report(path)
+    except FileNotFoundError:
+        return None
+    return baselines.get(mode)
+
+
+def save_baseline(report, path):
+    """Store report as the baseline of its mode, keeping the other modes"""
+    try:
+        baselines = load_report(path)
+    except FileNotFoundError:
+        baselines = {}
+    baselines[report["mode"]] = report
+    write_report(dict(sorted(baselines.items())), path)
+
+
+def check_regressions(report, baseline, threshold=0.25, min_delta_ms=20.0):
+    """Describe every phase, and the total, slower than baseline allows.
+
+    A phase regresses when it takes more than (1 + threshold) times its
+    baseline and at least min_delta_ms longer, so a 1 ms phase doubling
+    is not reported as noise. Phases missing from the baseline are skipped.
+    """
+    current = dict(report["durations_ms"], total=report["total_ms"])
+    expected = dict(baseline["durations_ms"], total=baseline["total_ms"])
+    failures = []
+    for name, duration in current.items():
+        allowed = expected.get(name)
+        if allowed is None:
+            continue
+        if duration > allowed * (1 + threshold) and duration - allowed >= min_delta_ms:
+            failures.append(f"{name}: {duration:.1f} ms, baseline {allowed:.1f} ms "
+                            f"(+{(duration / allowed - 1) * 100 if allowed else float('inf'):.0f}%)")
+    return failures
@@ -0,0 +1,303 @@
+import json
+import os
+import sqlite3
+import time
+
+import numpy as np
+from PyQt6.QtCore import QStandardPaths
+
+from project_file import BLOCK_DTYPES
+from similarity_index import SimilarityIndex, sheet_features
+from trigram_index import TrigramIndex
+
+SCHEMA_VERSION = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS styles (
+    id INTEGER PRIMARY KEY,
+    buyer TEXT NOT NULL,
+    style TEXT NOT NULL,
+    season TEXT NOT NULL,
+    garments_stage TEXT NOT NULL,
+    date TEXT NOT NULL,
+    saved_at REAL NOT NULL,
+    n_panels INTEGER NOT NULL,
+    n_sizes INTEGER NOT NULL,
+    UNIQUE (buyer, style, season, garments_stage)
+);
+-- The unique index above serves buyer lookups
+CREATE INDEX IF NOT EXISTS styles_style ON styles (style);
+CREATE INDEX IF NOT EXISTS styles_season ON styles (season, date);
+CREATE INDEX IF NOT EXISTS styles_stage ON styles (garments_stage, date);
+CREATE INDEX IF NOT EXISTS styles_date ON styles (date);
+
+-- Kept apart so listing styles never reads past the small rows above
+CREATE TABLE IF NOT EXISTS style_sheets (
+    style_id INTEGER PRIMARY KEY REFERENCES styles (id) ON DELETE CASCADE,
+    form TEXT NOT NULL,
+    size_names TEXT NOT NULL,
+    panel_names TEXT NOT NULL,
+    quantities BLOB NOT NULL,
+    areas BLOB NOT NULL,
+    area_valid BLOB NOT NULL
+);
+
+-- Words of the buyer, style and panel names of every style, for the fuzzy search
+CREATE TABLE IF NOT EXISTS search_terms (
+    id INTEGER PRIMARY KEY,
+    term TEXT NOT NULL UNIQUE
+);
+-- The ids of a style's words as one int32 blob, read back in a single pass
+CREATE TABLE IF NOT EXISTS style_terms (
+    style_id INTEGER PRIMARY KEY REFERENCES styles (id) ON DELETE CASCADE,
+    term_ids BLOB NOT NULL
+);
+
+-- Feature vector of every style's areas, for the similar style suggestions
+CREATE TABLE IF NOT EXISTS style_features (
+    style_id INTEGER PRIMARY KEY REFERENCES styles (id) ON DELETE CASCADE,
+    features BLOB NOT NULL
+);
+"""
+
+# Columns of a listed style, in the order list_styles() returns them
+STYLE_COLUMNS = ("id", "buyer", "style", "season", "garments_stage", "date",
+                 "n_panels", "n_sizes")
+
+
+def default_library_path():
+    data_dir = QStandardPaths.writableLocation(QStandardPaths.StandardLocation.GenericDataLocation)
+    return os.path.join(data_dir, "DownAllocation", "library.sqlite3")
+
+
+def style_words(project):
+    """The words a style is found by: its buyer, style and panel names"""
+    form = project["form"]
+    text = " ".join([form.get("buyer", ""), form.get("style", ""), *project["panel_names"]])
+    return set(text.upper().split())
+
+
+def _style_key(form):
+    return tuple(form.get(name, "") for name in ("buyer", "style", "season", "garments_stage"))
+
+
+def _prefix_range(prefix):
+    # "AC" matches from "AC" up to, not including, "AD", so the index is used
+    return prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+class StyleLibrary:
+    """Saved sheets in an embedded SQLite database.
+
+    A style is keyed by buyer, style, season and garments stage, saving
+    the same one again replaces it. Listing goes through indexes on every
+    filter column and the date, and pages with a (date, id) key instead of
+    an OFFSET, so the 100th page is as quick as the first. The sheet
+    arrays are stored as raw blobs and come back without parsing.
+
+    The words of every style are kept in style_terms. search() builds a
+    TrigramIndex from them on first use and save() updates both. The same
+    goes for the area features in style_features and similar_styles().
+    """
+
+    def __init__(self, path=None):
+        self.path = path or default_library_path()
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.connection = sqlite3.connect(self.path)
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.execute("PRAGMA synchronous = NORMAL")
+        version = self.connection.execute("PRAGMA user_version").fetchone()[0]
+        if version > SCHEMA_VERSION:
+            raise sqlite3.DatabaseError(
+                f"The style library was made by a newer version (schema {version})")
+        self._search_index = None
+        self._similarity_index = None
+        with self.connection:
+            self.connection.executescript(SCHEMA)
+            if 0 < version < SCHEMA_VERSION:
+                # Styles saved by older versions have no search data yet
+                for style_id, in self.connection.execute("SELECT id FROM styles").fetchall():
+                    project = self.load(style_id)
+                    if version < 2:
+                        self._index_words(style_id, style_words(project))
+                    self._store_features(style_id, project)
+            self.connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def close(self):
+        self.connection.close()
+
+    def find_style(self, form):
+        """Id of the style stored under the buyer, style, season and stage of form, or None"""
+        row = self.connection.execute(
+            "SELECT id FROM styles WHERE buyer = ? AND style = ? AND season = ? "
+            "AND garments_stage = ?", _style_key(form)).fetchone()
+        return row[0] if row else None
+
+    def save(self, project):
+        """Store a project dict (see project_file.save_project), returns its id.
+
+        A style already stored under the same buyer, style, season and stage
+        is replaced, see find_style.
+        """
+        form = project["form"]
+        key = _style_key(form)
+        arrays = [np.ascontiguousarray(project[name], dtype=dtype).tobytes()
+                  for name, dtype in BLOCK_DTYPES.items()]
+        n_sizes, n_panels = np.shape(project["areas"])
+        with self.connection:
+            self.connection.execute(
+                "INSERT INTO styles (buyer, style, season, garments_stage, date, saved_at, "
+                "n_panels, n_sizes) VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (buyer, style, season, garments_stage) DO UPDATE SET "
+                "date = excluded.date, saved_at = excluded.saved_at, "
+                "n_panels = excluded.n_panels, n_sizes = excluded.n_sizes",
+                (*key, form.get("date", ""), time.time(), n_panels, n_sizes))
+            style_id = self.find_style(form)
+            self.connection.execute(
+                "INSERT OR REPLACE INTO style_sheets VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (style_id, json.dumps(form), json.dumps(list(project["size_names"])),
+                 json.dumps(list(project["panel_names"])), *arrays))
+            self._index_words(style_id, style_words(project))
+            self._store_features(style_id, project)
+        return style_id
+
+    def _store_features(self, style_id, project):
+        features = sheet_features(project["areas"], project["area_valid"])
+        self.connection.execute("INSERT OR REPLACE INTO style_features VALUES (?, ?)",
+                                (style_id, features.tobytes()))
+        if self._similarity_index is not None:
+            self._similarity_index.set_style(style_id, features)
+
+    def _index_words(self, style_id, words):
+        words = sorted(words)
+        self.connection.executemany("INSERT OR IGNORE INTO search_terms (term) VALUES (?)",
+                                    [(word,) for word in words])
+        terms = []
+        for start in range(0, len(words), 500):  # SQLite caps the number of parameters
+            chunk = words[start:start + 500]
+            terms += self.connection.execute(
+                f"SELECT id, term FROM search_terms WHERE term IN ({', '.join('?' * len(chunk))})",
+                chunk).fetchall()
+        term_ids = np.array([term_id for term_id, term in terms], dtype=np.int32)
+        self.connection.execute("INSERT OR REPLACE INTO style_terms VALUES (?, ?)",
+                                (style_id, term_ids.tobytes()))
+
+        index = self._search_index
+        if index is not None:
+            index.load_terms([(term_id, term) for term_id, term in terms
+                              if term not in index.term_ids])
+            index.set_style(style_id, term_ids)
+
+    def load(self, style_id):
+        """The project dict of a stored style, or None when it is gone"""
+        row = self.connection.execute(
+            "SELECT form, size_names, panel_names, quantities, areas, area_valid, "
+            "n_panels, n_sizes FROM style_sheets JOIN styles ON styles.id = style_id "
+            "WHERE style_id = ?", (style_id,)).fetchone()
+        if row is None:
+            return None
+        form, size_names, panel_names, quantities, areas, area_valid, n_panels, n_sizes = row
+        shapes = {"quantities": (n_panels,), "areas": (n_sizes, n_panels),
+                  "area_valid": (n_sizes, n_panels)}
+        project = {"form": json.loads(form), "size_names": json.loads(size_names),
+                   "panel_names": json.loads(panel_names)}
+        for name, blob in zip(BLOCK_DTYPES, (quantities, areas, area_valid)):
+            project[name] = np.frombuffer(blob, BLOCK_DTYPES[name]).reshape(shapes[name])
+        return project
+
+    def delete(self, style_id):
+        with self.connection:
+            self.connection.execute("DELETE FROM styles WHERE id = ?", (style_id,))
+        if self._search_index is not None:
+            self._search_index.remove_style(style_id)
+        if self._similarity_index is not None:
+            self._similarity_index.remove_style(style_id)
+
+    def _where(self, buyer="", style="", season="", garments_stage=""):
+        clauses, params = [], []
+        for column, prefix in (("buyer", buyer), ("style", style)):
+            if prefix:
+                clauses.append(f"{column} >= ? AND {column} < ?")
+                params.extend(_prefix_range(prefix))
+        for column, value in (("season", season), ("garments_stage", garments_stage)):
+            if value:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        return clauses, params
+
+    def count_styles(self, **filters):
+        clauses, params = self._where(**filters)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        return self.connection.execute(f"SELECT COUNT(*) FROM styles{where}", params).fetchone()[0]
+
+    def list_styles(self, after=None, limit=100, **filters):
+        """One page of styles, newest date first, as tuples of STYLE_COLUMNS.
+
+        buyer and style match as prefixes, season and garments_stage
+        exactly. Pass the last row of a page as after to get the next one.
+        """
+        clauses, params = self._where(**filters)
+        if after is not None:
+            clauses.append("(date, id) < (?, ?)")
+            params.extend((after[STYLE_COLUMNS.index("date")], after[0]))
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        return self.connection.execute(
+            f"SELECT {', '.join(STYLE_COLUMNS)} FROM styles{where} "
+            f"ORDER BY date DESC, id DESC LIMIT ?", (*params, limit)).fetchall()
+
+    def search_index(self):
+        """The trigram index of every style's words, built on first use"""
+        if self._search_index is None:
+            index = TrigramIndex()
+            index.load_terms(self.connection.execute("SELECT id, term FROM search_terms"))
+            index.load_styles({
+                style_id: np.frombuffer(blob, dtype=np.int32)
+                for style_id, blob in self.connection.execute(
+                    "SELECT style_id, term_ids FROM style_terms")})
+            self._search_index = index
+        return self._search_index
+
+    def search(self, text, limit=100, season="", garments_stage="", candidates=1000):
+        """Styles whose buyer, style or panel names are close to the words of text.
+
+        Rows are tuples of STYLE_COLUMNS, best match first. season and
+        garments_stage filter the best `candidates` matches.
+        """
+        ids = self.search_index().search(text, candidates)
+        if not ids:
+            return []
+        clauses, params = self._where(season=season, garments_stage=garments_stage)
+        clauses.append(f"id IN ({', '.join('?' * len(ids))})")
+        rows = self.connection.execute(
+            f"SELECT {', '.join(STYLE_COLUMNS)} FROM styles WHERE {' AND '.join(clauses)}",
+            (*params, *ids)).fetchall()
+        rank = {style_id: position for position, style_id in enumerate(ids)}
+        return sorted(rows, key=lambda row: rank[row[0]])[:limit]
+
+    def similarity_index(self):
+        """The area features of every style, loaded on first use"""
+        if self._similarity_index is None:
+            index = SimilarityIndex()
+            index.load({style_id: np.frombuffer(blob, dtype=np.float64)
+                        for style_id, blob in self.connection.execute(
+                            "SELECT style_id, features FROM style_features")})
+            self._similarity_index = index
+        return self._similarity_index
+
+    def similar_styles(self, areas, area_valid, limit=5, size=None):
+        """Styles whose leading panel areas are in the nearest proportions to a sheet's.
+
+        Returns (row, distance) pairs, nearest first, rows being tuples of
+        STYLE_COLUMNS. size is the column to prefer, see
+        similarity_index.sheet_features for the features and the distance.
+        """
+        matches = self.similarity_index().nearest(sheet_features(areas, area_valid, size), limit)
+        if not matches:
+            return []
+        rows = {row[0]: row for row in self.connection.execute(
+            f"SELECT {', '.join(STYLE_COLUMNS)} FROM styles "
+            f"WHERE id IN ({', '.join('?' * len(matches))})",
+            [style_id for style_id, distance in matches])}
+        return [(rows[style_id], distance) for style_id, distance in matches if style_id in rows]
@@ -0,0 +1,694 @@
+import math
+
+import numpy as np
+from PyQt6.QtCore import (Qt, QAbstractTableModel, QModelIndex, QSortFilterProxyModel,
+                          pyqtSignal)
+
+# Data role holding a CellStyle, read by the painting delegate
+CellStyleRole = Qt.ItemDataRole.UserRole + 1
+
+# Decimals of a sewing area, as the cell editor accepts and the sheet shows them.
+# Only the display is rounded, the sheet keeps every area at full precision.
+AREA_DECIMALS = 2
+
+
+class CellStyle:
+    """Bit flags returned for CellStyleRole, plain ints so painting stays cheap"""
+    PLAIN = 0
+    BOLD = 1
+    HIGHLIGHT = 2  # Base size column
+
+
+def parse_quantity(text):
+    """Panel quantity (1-9) from cell text, 0 for empty, None when invalid"""
+    text = text.strip()
+    if not text:
+        return 0
+    if text.isdigit() and 1 <= int(text) <= 9:
+        return int(text)
+    return None
+
+
+def parse_area(text):
+    """Sewing area from cell text, 0.0 for empty, None when invalid"""
+    text = text.strip()
+    if not text:
+        return 0.0
+    try:
+        value = float(text)
+    except ValueError:
+        return None
+    return value if math.isfinite(value) and value >= 0 else None
+
+
+def format_area(value):
+    return f"{value:.{AREA_DECIMALS}f}"
+
+
+def area_text(value):
+    """Text that parses back to exactly value, for undo, copy and the autosave journal"""
+    return repr(float(value))
+
+
+class SewingAreaModel(QAbstractTableModel):
+    """Top table of the sheet, stored as typed arrays.
+
+    The grid keeps the layout of the original widget: row 0 holds the merged
+    headers, row 1 the size names, then one row per panel and a TOTAL row.
+    Column 0 is the panel name, column 1 the panel quantity and every
+    further column one size. Quantities are int8 (0 for empty) and areas a
+    float64 sizes x panels matrix that the allocation engine reads in place.
+    Since 0 is a valid area, area_valid flags the area cells that hold a
+    value; empty cells are 0.0 so they can be summed without a mask.
+
+    Text is parsed once when a cell is edited and only produced again when
+    the view asks for it, calculations never go back to the strings.
+    """
+
+    # row, column, text of the cell before the edit
+    cellEdited = pyqtSignal(int, int, str)
+    # first row, first column, last row, last column of a bulk write
+    blockEdited = pyqtSignal(int, int, int, int)
+    # pasted size names left out because another column already has them
+    duplicateSizes = pyqtSignal(list)
+
+    HEADERS = {0: "PANEL NAME", 1: "PANEL QUANTITY", 2: "SIZE || PANEL SEWING AREA"}
+
+    def __init__(self, n_panels, n_sizes, parent=None):
+        super().__init__(parent)
+        self._allocate(n_panels, n_sizes)
+
+    def _allocate(self, n_panels, n_sizes):
+        self.size_names = [""] * n_sizes
+        self.panel_names = [""] * n_panels
+        self._quantity_store = np.zeros(n_panels, dtype=np.int8)
+        self._area_store = np.zeros((n_sizes, n_panels), dtype=np.float64)
+        self._valid_store = np.zeros((n_sizes, n_panels), dtype=bool)
+        self.totals = np.zeros(n_sizes, dtype=np.float64)
+        self._update_views()
+
+    def _update_views(self):
+        # The stores may hold spare rows and columns, only the used part is shown
+        n_panels, n_sizes = self.n_panels, self.n_sizes
+        self.quantities = self._quantity_store[:n_panels]
+        self.areas = self._area_store[:n_sizes, :n_panels]
+        self.area_valid = self._valid_store[:n_sizes, :n_panels]
+
+    def _reserve(self, n_panels, n_sizes):
+        size_capacity, panel_capacity = self._area_store.shape
+        if n_sizes <= size_capacity and n_panels <= panel_capacity:
+            return
+        # Double the capacity so growing one row at a time copies the grid rarely
+        if n_panels > panel_capacity:
+            panel_capacity = max(n_panels, 2 * panel_capacity)
+        if n_sizes > size_capacity:
+            size_capacity = max(n_sizes, 2 * size_capacity)
+        used_sizes, used_panels = self.n_sizes, self.n_panels
+
+        quantity_store = np.zeros(panel_capacity, dtype=np.int8)
+        quantity_store[:used_panels] = self.quantities
+        self._quantity_store = quantity_store
+        for name in ('_area_store', '_valid_store'):
+            old = getattr(self, name)
+            store = np.zeros((size_capacity, panel_capacity), dtype=old.dtype)
+            store[:used_sizes, :used_panels] = old[:used_sizes, :used_panels]
+            setattr(self, name, store)
+
+    @property
+    def n_panels(self):
+        return len(self.panel_names)
+
+    @property
+    def n_sizes(self):
+        return len(self.size_names)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.n_panels + 3
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.n_sizes + 2
+
+    def is_data_row(self, row):
+        return 2 <= row < self.n_panels + 2
+
+    def is_total_row(self, row):
+        return row == self.n_panels + 2
+
+    def cell_text(self, row, col, exact=False):
+        """Text of a cell as shown, or with exact the areas at full precision"""
+        if row == 0:
+            return self.HEADERS.get(col, "")
+        if row == 1:
+            return self.size_names[col - 2] if col >= 2 else ""
+        if self.is_total_row(row):
+            if col == 0:
+                return "TOTAL"
+            return f"{self.totals[col - 2]:.2f}" if col >= 2 else ""
+        panel = row - 2
+        if col == 0:
+            return self.panel_names[panel]
+        if col == 1:
+            quantity = int(self.quantities[panel])
+            return str(quantity) if quantity else ""
+        if not self.area_valid[col - 2, panel]:
+            return ""
+        area = float(self.areas[col - 2, panel])
+        return area_text(area) if exact else format_area(area)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row, col = index.row(), index.column()
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
+            return self.cell_text(row, col)
+        if role == Qt.ItemDataRole.TextAlignmentRole:
+            return Qt.AlignmentFlag.AlignCenter
+        if role == CellStyleRole:
+            if row == 0 or self.is_total_row(row):
+                return CellStyle.BOLD
+            return CellStyle.PLAIN
+        if role == Qt.ItemDataRole.ToolTipRole and row == 1 and col >= 2:
+            return "Enter size name like XS, S, M, L"
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.ItemFlag.NoItemFlags
+        row, col = index.row(), index.column()
+        if row == 0 or (row == 1 and col < 2):
+            # Make completely non-interactive
+            return Qt.ItemFlag.NoItemFlags
+        if self.is_total_row(row):
+            return Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
+        return (Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable |
+                Qt.ItemFlag.ItemIsEditable)
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        if not index.isValid() or role != Qt.ItemDataRole.EditRole:
+            return False
+        text = str(value or "")
+        if text.strip() == self.cell_text(index.row(), index.column()):
+            # The editor shows areas rounded, committing it unchanged keeps the full value
+            return True
+        return self.set_cell_text(index.row(), index.column(), text)
+
+    def is_editable(self, row, col):
+        if not 0 <= col < self.n_sizes + 2:
+            return False
+        return (row == 1 and col >= 2) or self.is_data_row(row)
+
+    def set_cell_text(self, row, col, text):
+        """Parse and store one edited cell. Returns False for invalid text."""
+        if not self.is_editable(row, col):
+            return False
+        old_text = self.cell_text(row, col, exact=True)
+        if not self._write_cell(row, col, text):
+            return False
+
+        if self.cell_text(row, col, exact=True) != old_text:
+            index = self.index(row, col)
+            self.dataChanged.emit(index, index)
+            self.cellEdited.emit(row, col, old_text)
+        return True
+
+    def _write_cell(self, row, col, text):
+        text = text.strip()
+        if row == 1:
+            self.size_names[col - 2] = text.upper()
+        elif col == 0:
+            self.panel_names[row - 2] = text.upper()
+        elif col == 1:
+            quantity = parse_quantity(text)
+            if quantity is None:
+                return False
+            self.quantities[row - 2] = quantity
+        else:
+            area = parse_area(text)
+            if area is None:
+                return False
+            self.areas[col - 2, row - 2] = area
+            self.area_valid[col - 2, row - 2] = bool(text)
+        return True
+
+    def set_cells(self, changes):
+        """Write (row, col, text) cells with one notification for all of them.
+
+        Returns the number of cells that took the new text.
+        """
+        rows, cols = [], []
+        for row, col, text in changes:
+            if self.is_editable(row, col) and self._write_cell(row, col, text):
+                rows.append(row)
+                cols.append(col)
+        if rows:
+            self._block_changed(min(rows), min(cols), max(rows), max(cols))
+        return len(rows)
+
+    def paste_block(self, first_row, first_col, grid):
+        """Validate and write a pasted grid of text in one pass.
+
+        Cells outside the editable area, empty quantities and areas and
+        invalid values are skipped, the rest is written at once. A pasted
+        size name another column already has is written empty, like a typed
+        duplicate, and reported by duplicateSizes. Returns the (row, col,
+        old, new) text of every cell that changed.
+        """
+        lengths = np.array([len(line) for line in grid])
+        n_cols = int(lengths.max())
+        padded = [line + [""] * (n_cols - len(line)) for line in grid]
+        block = np.char.strip(np.array(padded, dtype=str))
+        present = np.arange(n_cols) < lengths[:, None]  # Short lines leave cells alone
+
+        # Clip to the size header row, the panel rows and the existing columns
+        last_row = min(first_row + len(grid), self.n_panels + 2)
+        last_col = min(first_col + n_cols, self.n_sizes + 2)
+        edits = []
+        duplicates = []
+
+        start = max(first_col, 2)  # First size column in the block
+        if first_row <= 1 < last_row and start < last_col:
+            names = np.char.upper(block[1 - first_row, start - first_col:last_col - first_col])
+            used = present[1 - first_row, start - first_col:last_col - first_col]
+            pasted = {col - 2: name for col, name, is_used
+                      in zip(range(start, last_col), names.tolist(), used) if is_used}
+            # Names of the columns the paste leaves alone, then each pasted one in turn
+            taken = {name for size, name in enumerate(self.size_names) if size not in pasted}
+            for size, name in pasted.items():
+                if name and name in taken:
+                    duplicates.append(name)
+                    name = ""
+                taken.add(name)
+                if name != self.size_names[size]:
+                    edits.append((1, size + 2, self.size_names[size], name))
+                    self.size_names[size] = name
+
+        top = max(first_row, 2)
+        if top < last_row:
+            panels = slice(top - 2, last_row - 2)
+            rows = slice(top - first_row, last_row - first_row)
+
+            if first_col == 0:
+                names = np.char.upper(block[rows, 0]).tolist()
+                for panel, name, is_used in zip(range(top - 2, last_row - 2),
+                                                names, present[rows, 0]):
+                    if is_used and name != self.panel_names[panel]:
+                        edits.append((panel + 2, 0, self.panel_names[panel], name))
+                        self.panel_names[panel] = name
+
+            if first_col <= 1 < last_col:
+                text = block[rows, 1 - first_col]
+                # Quantities are a single digit from 1 to 9
+                valid = (present[rows, 1 - first_col] & (np.char.str_len(text) == 1) &
+                         np.char.isdigit(text) & (text != "0"))
+                new = np.where(valid, text, "0").astype(np.int8)
+                old = self.quantities[panels]
+                changed = valid & (new != old)
+                for panel in np.flatnonzero(changed).tolist():
+                    edits.append((top + panel, 1, str(int(old[panel])) if old[panel] else "",
+                                  str(int(new[panel]))))
+                old[changed] = new[changed]
+
+            if start < last_col:
+                sizes = slice(start - 2, last_col - 2)
+                text = block[rows, start - first_col:last_col - first_col]
+                valid = present[rows, start - first_col:last_col - first_col] & (text != "")
+                new = np.zeros(text.shape, dtype=np.float64)
+                try:
+                    new[valid] = text[valid].astype(np.float64)
+                except ValueError:
+                    # Some cell is not a number, parse them one by one to find it
+                    parsed = [parse_area(value) for value in text[valid].tolist()]
+                    new[valid] = [np.nan if value is None else value for value in parsed]
+                with np.errstate(invalid="ignore"):
+                    valid &= np.isfinite(new) & (new >= 0)
+
+                # The model stores areas as sizes x panels
+                new, valid = new.T, valid.T
+                old = self.areas[sizes, panels]
+                old_valid = self.area_valid[sizes, panels]
+                changed = valid & ((new != old) | ~old_valid)
+                changed_sizes, changed_panels = np.nonzero(changed)
+                for size, panel in zip(changed_sizes.tolist(), changed_panels.tolist()):
+                    old_text = area_text(old[size, panel]) if old_valid[size, panel] else ""
+                    edits.append((top + panel, start + size, old_text,
+                                  area_text(new[size, panel])))
+                old[changed] = new[changed]
+                old_valid[changed] = True
+
+        if edits:
+            self._block_changed(first_row, first_col, last_row - 1, last_col - 1)
+        if duplicates:
+            self.duplicateSizes.emit(duplicates)
+        return edits
+
+    def _block_changed(self, first_row, first_col, last_row, last_col):
+        self.dataChanged.emit(self.index(first_row, first_col), self.index(last_row, last_col))
+        self.blockEdited.emit(first_row, first_col, last_row, last_col)
+
+    def set_totals(self, totals, sizes=None):
+        """Show the engine column totals in the TOTAL row"""
+        self.totals = totals
+        total_row = self.n_panels + 2
+        if sizes is None:
+            first, last = 0, self.n_sizes - 1
+        else:
+            first, last = min(sizes), max(sizes)
+        if self.n_sizes:
+            self.dataChanged.emit(self.index(total_row, first + 2),
+                                  self.index(total_row, last + 2))
+
+    def reset_shape(self, n_panels, n_sizes):
+        """Empty the sheet and give it new dimensions"""
+        self.beginResetModel()
+        self._allocate(n_panels, n_sizes)
+        self.endResetModel()
+
+    def insert_panels(self, position, count):
+        """Insert empty panel rows before panel index position"""
+        n_panels, n_sizes = self.n_panels, self.n_sizes
+        self.beginInsertRows(QModelIndex(), position + 2, position + count + 1)
+        self._reserve(n_panels + count, n_sizes)
+        end = n_panels + count
+        # Shift the panels after position along and clear the new slice
+        self._quantity_store[position + count:end] = self._quantity_store[position:n_panels]
+        self._quantity_store[position:position + count] = 0
+        for store in (self._area_store, self._valid_store):
+            store[:n_sizes, position + count:end] = store[:n_sizes, position:n_panels]
+            store[:n_sizes, position:position + count] = 0
+        self.panel_names[position:position] = [""] * count
+        self._update_views()
+        self.endInsertRows()
+
+    def remove_panels(self, position, count):
+        n_panels, n_sizes = self.n_panels, self.n_sizes
+        self.beginRemoveRows(QModelIndex(), position + 2, position + count + 1)
+        end = n_panels - count
+        self._quantity_store[position:end] = self._quantity_store[position + count:n_panels]
+        for store in (self._area_store, self._valid_store):
+            store[:n_sizes, position:end] = store[:n_sizes, position + count:n_panels]
+        del self.panel_names[position:position + count]
+        self._update_views()
+        self.endRemoveRows()
+
+    def insert_sizes(self, position, count):
+        """Insert empty size columns before size index position"""
+        n_panels, n_sizes = self.n_panels, self.n_sizes
+        self.beginInsertColumns(QModelIndex(), position + 2, position + count + 1)
+        self._reserve(n_panels, n_sizes + count)
+        end = n_sizes + count
+        for store in (self._area_store, self._valid_store):
+            store[position + count:end, :n_panels] = store[position:n_sizes, :n_panels]
+            store[position:position + count, :n_panels] = 0
+        self.size_names[position:position] = [""] * count
+        self.totals = np.insert(self.totals, position, np.zeros(count))
+        self._update_views()
+        self.endInsertColumns()
+
+    def remove_sizes(self, position, count):
+        n_panels, n_sizes = self.n_panels, self.n_sizes
+        self.beginRemoveColumns(QModelIndex(), position + 2, position + count + 1)
+        end = n_sizes - count
+        for store in (self._area_store, self._valid_store):
+            store[position:end, :n_panels] = store[position + count:n_sizes, :n_panels]
+        del self.size_names[position:position + count]
+        self.totals = np.delete(self.totals, slice(position, position + count))
+        self._update_views()
+        self.endRemoveColumns()
+
+    def load_sheet(self, size_names, panel_names, quantities, areas, area_valid=None):
+        """Replace every cell at once, keeping the current dimensions.
+
+        Without area_valid every non-zero area counts as filled in.
+        """
+        self.beginResetModel()
+        n_sizes, n_panels = self.n_sizes, self.n_panels
+        self._allocate(n_panels, n_sizes)
+        size_names = list(size_names)[:n_sizes]
+        panel_names = list(panel_names)[:n_panels]
+        self.size_names[:len(size_names)] = size_names
+        self.panel_names[:len(panel_names)] = panel_names
+        quantities = np.asarray(quantities)[:n_panels]
+        self.quantities[:len(quantities)] = quantities
+        areas = np.asarray(areas)[:n_sizes, :n_panels]
+        self.areas[:areas.shape[0], :areas.shape[1]] = areas
+        if area_valid is None:
+            area_valid = areas != 0
+        area_valid = np.asarray(area_valid, dtype=bool)[:n_sizes, :n_panels]
+        self.area_valid[:area_valid.shape[0], :area_valid.shape[1]] = area_valid
+        self.endResetModel()
+
+
+class WeightDistributionModel(QAbstractTableModel):
+    """Read-only WEIGHT DISTRIBUTION grid derived from the top table.
+
+    Nothing is stored per cell. Every value is computed from the sheet model
+    and the allocation engine when the view asks for it, so only the rows on
+    screen are ever formatted. Row 0 holds the merged headers, row 1 the
+    size names, then a DOWN WEIGHT and a GARMENTS WEIGHT row per panel and
+    finally the two total rows. Column 0 is the panel name, 1 the quantity,
+    2 the weight label and every further column one size.
+    """
+
+    HEADERS = {0: "PANEL NAME", 1: "PANEL QTY", 2: "WEIGHT", 3: "SIZE || WEIGHT DISTRIBUTION"}
+
+    def __init__(self, sheet, allocation, parent=None):
+        super().__init__(parent)
+        self.sheet = sheet
+        self.allocation = allocation
+        self.ecodown_weight = 0.0
+        self.garment_weight = 0.0
+        self.pending = False  # The engine is being rebuilt, weights are left blank
+        self._n_panels = sheet.n_panels
+        self._n_sizes = sheet.n_sizes
+        self._update_totals()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else 2 * self._n_panels + 4
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._n_sizes + 3
+
+    def total_row(self):
+        return 2 * self._n_panels + 2
+
+    def panel_row(self, panel):
+        return 2 + 2 * panel
+
+    def is_row_visible(self, row):
+        if row < 2:
+            return True
+        if row >= self.total_row():
+            return row == self.total_row() or self.garment_weight > 0
+        panel, is_garment = divmod(row - 2, 2)
+        if self.sheet.quantities[panel] <= 0:
+            return False
+        return not is_garment or self.garment_weight > 0
+
+    def _update_totals(self):
+        # Column sums are cached by the engine, scaling them is O(sizes)
+        self.down_totals = self.allocation.totals(self.ecodown_weight).tolist()
+        self.garment_totals = self.allocation.totals(self.garment_weight).tolist()
+
+    def cell_text(self, row, col):
+        if row == 0:
+            return self.HEADERS.get(col, "")
+        if row == 1:
+            return self.sheet.size_names[col - 3] if col >= 3 else ""
+
+        total_row = self.total_row()
+        if row >= total_row:
+            is_garment = row > total_row
+            if col == 0:
+                return "TOTAL GARMENT WEIGHT" if is_garment else "TOTAL DOWN WEIGHT"
+            if col < 3 or self.pending:
+                return ""
+            totals = self.garment_totals if is_garment else self.down_totals
+            return f"{round(totals[col - 3]):.0f}"  # Rounded
+
+        panel, is_garment = divmod(row - 2, 2)
+        quantity = int(self.sheet.quantities[panel])
+        if quantity <= 0:
+            return ""
+        if col == 0:
+            return "" if is_garment else self.sheet.panel_names[panel]
+        if col == 1:
+            return "" if is_garment else f"1X{quantity}"
+        if col == 2:
+            return "GARMENTS WEIGHT" if is_garment else "DOWN WEIGHT"
+        if self.pending:
+            return ""
+        weight = self.garment_weight if is_garment else self.ecodown_weight
+        value = self.allocation.panel_weight(col - 3, panel, weight)
+        return f"{value:.2f}" if value != 0 else ""
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row, col = index.row(), index.column()
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self.cell_text(row, col)
+        if role == Qt.ItemDataRole.TextAlignmentRole:
+            return Qt.AlignmentFlag.AlignCenter
+        if role == CellStyleRole:
+            if 2 <= row < self.total_row() and col - 3 == self.allocation.base_size:
+                return CellStyle.BOLD | CellStyle.HIGHLIGHT
+            if row == 0 or (row >= self.total_row() and col == 0):
+                return CellStyle.BOLD
+            return CellStyle.PLAIN
+        return None
+
+    def flags(self, index):
+        return Qt.ItemFlag.NoItemFlags
+
+    def set_weights(self, ecodown_weight, garment_weight):
+        self.ecodown_weight = ecodown_weight
+        self.garment_weight = garment_weight
+
+    def set_pending(self, pending):
+        """Blank the weights while the engine reading the sheet is out of date"""
+        if pending != self.pending:
+            self.pending = pending
+            self.refresh()
+
+    def refresh(self):
+        """Every value may have changed, let the view re-read what it shows"""
+        self._update_totals()
+        if self.rowCount() and self.columnCount():
+            self.dataChanged.emit(self.index(0, 0),
+                                  self.index(self.rowCount() - 1, self.columnCount() - 1))
+
+    def refresh_sizes(self, sizes):
+        """Only the given size columns changed"""
+        self._update_totals()
+        if sizes:
+            self.dataChanged.emit(self.index(1, min(sizes) + 3),
+                                  self.index(self.rowCount() - 1, max(sizes) + 3))
+
+    def refresh_cell(self, row, col):
+        index = self.index(row, col)
+        self.dataChanged.emit(index, index)
+
+    def insert_panels(self, position, count):
+        """Follow panels inserted into the sheet, two rows per panel"""
+        self.beginInsertRows(QModelIndex(), self.panel_row(position),
+                             self.panel_row(position + count) - 1)
+        self._n_panels += count
+        self.endInsertRows()
+
+    def remove_panels(self, position, count):
+        self.beginRemoveRows(QModelIndex(), self.panel_row(position),
+                             self.panel_row(position + count) - 1)
+        self._n_panels -= count
+        self.endRemoveRows()
+
+    def insert_sizes(self, position, count):
+        self.beginInsertColumns(QModelIndex(), position + 3, position + count + 2)
+        self._n_sizes += count
+        self._update_totals()
+        self.endInsertColumns()
+
+    def remove_sizes(self, position, count):
+        self.beginRemoveColumns(QModelIndex(), position + 3, position + count + 2)
+        self._n_sizes -= count
+        self._update_totals()
+        self.endRemoveColumns()
+
+    def refresh_layout(self):
+        """The sheet was replaced as a whole"""
+        self.beginResetModel()
+        self._n_panels = self.sheet.n_panels
+        self._n_sizes = self.sheet.n_sizes
+        self._update_totals()
+        self.endResetModel()
+
+
+class VisibleRowsProxy(QSortFilterProxyModel):
+    """Filters out the bottom rows that have nothing to show.
+
+    Filtering is only re-run by refresh_filter(), when a quantity or the
+    garment weight changes which rows are visible, never on value changes.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setDynamicSortFilter(False)
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        return self.sourceModel().is_row_visible(source_row)
+
+    def refresh_filter(self):
+        self.invalidateFilter()
+
+
+class StyleListModel(QAbstractTableModel):
+    """Styles of the library matching some filters, fetched a page at a time.
+
+    The view asks for more rows through fetchMore() as it scrolls, so a
+    filter matching tens of thousands of styles only ever reads the pages
+    that were shown.
+    """
+
+    PAGE_SIZE = 100
+    SEARCH_LIMIT = 200  # Fuzzy matches shown, best first
+    HEADERS = ("Buyer", "Style", "Season", "Stage", "Date", "Panels x Sizes")
+
+    def __init__(self, library, parent=None):
+        super().__init__(parent)
+        self.library = library
+        self.filters = {}
+        self.rows = []
+        self.total = 0
+
+    def set_filters(self, search="", **filters):
+        """Show the styles matching filters, or the closest ones to search.
+
+        A search ranks styles by their buyer, style and panel names and
+        only keeps the season and garments_stage filters.
+        """
+        self.beginResetModel()
+        self.filters = filters
+        if search.strip():
+            self.rows = self.library.search(search, limit=self.SEARCH_LIMIT,
+                                            season=filters.get("season", ""),
+                                            garments_stage=filters.get("garments_stage", ""))
+            self.total = len(self.rows)
+        else:
+            self.rows = self.library.list_styles(limit=self.PAGE_SIZE, **filters)
+            self.total = (len(self.rows) if len(self.rows) < self.PAGE_SIZE
+                          else self.library.count_styles(**filters))
+        self.endResetModel()
+
+    def style_id(self, row):
+        return self.rows[row][0]
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and len(self.rows) < self.total
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or not self.rows:
+            return
+        page = self.library.list_styles(after=self.rows[-1], limit=self.PAGE_SIZE,
+                                        **self.filters)
+        if not page:
+            self.total = len(self.rows)  # The library changed since it was counted
+            return
+        self.beginInsertRows(QModelIndex(), len(self.rows), len(self.rows) + len(page) - 1)
+        self.rows.extend(page)
+        self.endInsertRows()
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole or not index.isValid():
+            return None
+        style_id, buyer, style, season, stage, date, n_panels, n_sizes = self.rows[index.row()]
+        return (buyer, style, season, stage, date, f"{n_panels} x {n_sizes}")[index.column()]
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.HEADERS[section]
+        return None
@@ -0,0 +1,111 @@
+import numpy as np
+
+
+def trigrams(word):
+    """The trigrams of a word padded like pg_trgm, so its start weighs more"""
+    padded = f"  {word} "
+    return {padded[index:index + 3] for index in range(len(padded) - 2)}
+
+
+class TrigramIndex:
+    """Fuzzy lookup of styles by the words of their buyer, style and panel names.
+
+    Every distinct word (term) is indexed by its trigrams, and every term
+    keeps the ids of the styles using it. A query word is compared with the
+    terms sharing a trigram with it, scored by trigram similarity (shared
+    over distinct trigrams of both), and a style scores the best similarity
+    among its terms, summed over the query words. Postings are numpy
+    arrays, so scoring is a few concatenations and a np.unique even when a
+    word like FRONT is in every style.
+    """
+
+    def __init__(self, min_similarity=0.3):
+        self.min_similarity = min_similarity
+        self.term_ids = {}
+        self.term_sizes = []  # Number of distinct trigrams of every term
+        self._term_sizes_array = None
+        self.trigram_terms = {}  # Trigram -> array of term ids
+        self.term_styles = []  # Term id -> array of style ids
+        self.style_terms = {}  # Style id -> array of term ids
+        self.max_style_id = 0
+
+    def load_terms(self, terms):
+        """Index many (term id, word) pairs at once, ids are small ints like rowids"""
+        grams_terms = {}
+        for term_id, term in terms:
+            self.term_ids[term] = term_id
+            while len(self.term_sizes) <= term_id:
+                self.term_sizes.append(0)
+                self.term_styles.append(np.empty(0, dtype=np.int64))
+            grams = trigrams(term)
+            self.term_sizes[term_id] = len(grams)
+            for gram in grams:
+                grams_terms.setdefault(gram, []).append(term_id)
+        for gram, term_ids in grams_terms.items():
+            known = self.trigram_terms.get(gram)
+            added = np.array(term_ids, dtype=np.int64)
+            self.trigram_terms[gram] = added if known is None else np.concatenate((known, added))
+        self._term_sizes_array = None
+
+    def load_styles(self, style_terms):
+        """Fill the postings from a dict of style id -> array of its term ids"""
+        self.style_terms.update(style_terms)
+        if not style_terms:
+            return
+        style_ids = np.fromiter(style_terms, dtype=np.int64, count=len(style_terms))
+        term_ids = np.concatenate(list(style_terms.values())).astype(np.int64)
+        styles = np.repeat(style_ids, [len(terms) for terms in style_terms.values()])
+
+        order = np.argsort(term_ids, kind="stable")
+        bounds = np.searchsorted(term_ids[order], np.arange(len(self.term_styles) + 1))
+        styles = styles[order]
+        for term_id in range(len(self.term_styles)):
+            self.term_styles[term_id] = styles[bounds[term_id]:bounds[term_id + 1]]
+        self.max_style_id = max(self.max_style_id, int(style_ids.max()))
+
+    def set_style(self, style_id, term_ids):
+        """Replace the terms of one style, e.g. after it was saved again"""
+        self.remove_style(style_id)
+        term_ids = np.unique(np.asarray(term_ids, dtype=np.int64))
+        for term_id in term_ids.tolist():
+            self.term_styles[term_id] = np.append(self.term_styles[term_id], style_id)
+        self.style_terms[style_id] = term_ids
+        self.max_style_id = max(self.max_style_id, style_id)
+
+    def remove_style(self, style_id):
+        for term_id in self.style_terms.pop(style_id, np.empty(0, dtype=np.int64)).tolist():
+            styles = self.term_styles[term_id]
+            self.term_styles[term_id] = styles[styles != style_id]
+
+    def similar_terms(self, word):
+        """(term ids, similarities) of the terms close enough to word"""
+        grams = [self.trigram_terms[gram] for gram in trigrams(word) if gram in self.trigram_terms]
+        if not grams:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        candidates, shared = np.unique(np.concatenate(grams), return_counts=True)
+        if self._term_sizes_array is None:
+            self._term_sizes_array = np.array(self.term_sizes)
+        sizes = self._term_sizes_array[candidates]
+        similarity = shared / (len(trigrams(word)) + sizes - shared)
+        close = similarity >= self.min_similarity
+        return candidates[close], similarity[close]
+
+    def search(self, text, limit=50):
+        """Ids of the styles best matching the words of text, best first"""
+        words = text.upper().split()
+        if not words or not self.style_terms:
+            return []
+        n_ids = self.max_style_id + 1
+        scores = np.zeros(n_ids)
+        for word in words:
+            best = np.zeros(n_ids)
+            term_ids, similarity = self.similar_terms(word)
+            # Ascending, so a style ends up with the best of its terms
+            for term_id, value in zip(term_ids[np.argsort(similarity)].tolist(),
+                                      np.sort(similarity).tolist()):
+                best[self.term_styles[term_id]] = value
+            scores += best
+        matches = np.flatnonzero(scores)
+        # Best score first, the newest style first among equals
+        order = np.lexsort((-matches, -scores[matches]))[:limit]
+        return matches[order].tolist()
@@ -0,0 +1,138 @@
+import sys
+from collections import deque
+from contextlib import contextmanager
+
+# Rough cost of one recorded edit besides its two strings: the tuple and
+# the row/column ints
+EDIT_OVERHEAD = 120
+
+
+class EditGroup:
+    """One user action (typing a cell, a paste, a delete) as cell deltas.
+
+    edits holds (row, col, old, new) tuples in the order they happened, so
+    undo walks them backwards and redo forwards.
+    """
+
+    __slots__ = ("label", "edits", "size")
+
+    def __init__(self, label):
+        self.label = label
+        self.edits = []
+        self.size = 0
+
+    def add(self, row, col, old, new):
+        self.edits.append((row, col, old, new))
+        self.size += EDIT_OVERHEAD + sys.getsizeof(old) + sys.getsizeof(new)
+
+    def extend(self, edits):
+        for row, col, old, new in edits:
+            self.add(row, col, old, new)
+
+    def undo_changes(self):
+        return [(row, col, old) for row, col, old, new in reversed(self.edits)]
+
+    def redo_changes(self):
+        return [(row, col, new) for row, col, old, new in self.edits]
+
+    def __len__(self):
+        return len(self.edits)
+
+
+class UndoJournal:
+    """Undo/redo history that records only the cells an action changed.
+
+    Both stacks are bounded deques. Besides max_groups, the oldest undo
+    groups are dropped once the estimated size of everything recorded goes
+    over memory_budget bytes, so a few huge pastes cannot hold on to an
+    unbounded amount of memory while many small edits still fit.
+    on_commit, when given, is called with every new step.
+    """
+
+    def __init__(self, memory_budget=32 * 1024 * 1024, max_groups=1000, on_commit=None):
+        self.memory_budget = memory_budget
+        self.on_commit = on_commit
+        self.undo_stack = deque(maxlen=max_groups)
+        self.redo_stack = deque(maxlen=max_groups)
+        self.memory_used = 0
+        self._open = None
+        self._depth = 0
+
+    @contextmanager
+    def group(self, label):
+        """Record every edit made inside the block as a single undo step"""
+        if self._depth == 0:
+            self._open = EditGroup(label)
+        self._depth += 1
+        try:
+            yield self._open
+        finally:
+            self._depth -= 1
+            if self._depth == 0:
+                group, self._open = self._open, None
+                self._commit(group)
+
+    def record(self, row, col, old, new):
+        """Add one cell edit to the open group, or as an undo step of its own"""
+        if old == new:
+            return
+        if self._open is not None:
+            self._open.add(row, col, old, new)
+            return
+        group = EditGroup("Edit")
+        group.add(row, col, old, new)
+        self._commit(group)
+
+    def _commit(self, group):
+        if not group:
+            return
+        self._clear_stack(self.redo_stack)  # A new action ends the redo history
+        self._push(self.undo_stack, group)
+        # Always keep the newest step, even when it alone is over budget
+        while self.memory_used > self.memory_budget and len(self.undo_stack) > 1:
+            self.memory_used -= self.undo_stack.popleft().size
+        if self.on_commit is not None:
+            self.on_commit(group)
+
+    def _push(self, stack, group):
+        if len(stack) == stack.maxlen:
+            self.memory_used -= stack.popleft().size
+        stack.append(group)
+        self.memory_used += group.size
+
+    def _clear_stack(self, stack):
+        self.memory_used -= sum(group.size for group in stack)
+        stack.clear()
+
+    def take_undo(self):
+        """Move the newest step to the redo stack and return it, or None"""
+        if not self.undo_stack:
+            return None
+        group = self.undo_stack.pop()
+        self.memory_used -= group.size
+        self._push(self.redo_stack, group)
+        return group
+
+    def take_redo(self):
+        """Move the next redo step back to the undo stack and return it, or None"""
+        if not self.redo_stack:
+            return None
+        group = self.redo_stack.pop()
+        self.memory_used -= group.size
+        self._push(self.undo_stack, group)
+        return group
+
+    def discard_undo(self):
+        """Remove the newest step without offering it for redo, or return None.
+
+        The caller rolls the cells back, e.g. for an action that was cancelled.
+        """
+        if not self.undo_stack:
+            return None
+        group = self.undo_stack.pop()
+        self.memory_used -= group.size
+        return group
+
+    def clear(self):
+        self._clear_stack(self.undo_stack)
+        self._clear_stack(self.redo_stack)